@@ -7,11 +7,24 @@
 
 from flask import Flask, jsonify
 from .config import Config
-from .extensions import db, migrate, jwt, cors
+from .json_provider import FastJSONProvider
+from .extensions import (
+    db, migrate, jwt, cors, upstream, pdf_cache, replica_router, query_stats, metrics, profiler,
+    tracer, compressor,
+)
 from .routes.auth import auth_bp,profile_bp
 from .routes.settings import settings_bp
 from .routes.user_sites import bp as user_sites_bp
 from .routes.products import products_bp
+from .routes.session import session_bp
+from .routes.sites import sites_bp
+from .routes.dashboard import dashboard_bp
+from .routes.account import account_bp
+from .routes.quotes import quotes_bp
+from .routes.cart import cart_bp
+from .routes.admin import admin_bp, diagnostics_guard
+from .site_directory import site_directory
+from .db_pool import pool_stats, pool_gauges
 
 def create_app():
     """
@@ -23,6 +36,9 @@ def create_app():
     # -----------------------------------------------------------
     app = Flask(__name__)
 
+    # Faster JSON responses (orjson when installed, cached fragments)
+    app.json = FastJSONProvider(app)
+
     # -----------------------------------------------------------
     # Load configuration settings from Config class
     # (contains database URI, JWT secret, etc.)
@@ -30,18 +46,50 @@ def create_app():
     app.config.from_object(Config())
 
     # -----------------------------------------------------------
-    # Initialize extensions (DB, Migrations, JWT, CORS)
+    # Initialize extensions (DB, Migrations, JWT, Upstream, CORS)
     # -----------------------------------------------------------
     
     # Initialize SQLAlchemy ORM
     db.init_app(app)
 
+    # Route @read_replica handlers to the replica bind (if configured)
+    replica_router.init_app(app)
+
+    # Per-request SQL counts / DB time / N+1 warnings
+    query_stats.init_app(app)
+
+    # Request latency / status metrics for GET /metrics
+    metrics.init_app(app)
+    metrics.registry.add_collector(
+        "db_pool",
+        lambda: pool_gauges({name or "primary": e.pool for name, e in db.engines.items()}),
+    )
+
+    # Opt-in stack-sampling profiler for sampled / slow requests
+    profiler.init_app(app)
+
+    # Request tracing: SQL / upstream / SMTP spans exported as OTLP JSON
+    tracer.init_app(app)
+
     # Enable database migrations
     migrate.init_app(app, db)
 
     # Set up JWT authentication
     jwt.init_app(app)
 
+    # Shared pooled HTTP client for the Amazon site API
+    upstream.init_app(app)
+
+    # In-memory prefix index over the site directory (autocomplete)
+    site_directory.init_app(app)
+
+    # Disk cache for upstream quote PDFs
+    pdf_cache.init_app(app)
+
+    # gzip / brotli responses (registered late so its after_request runs
+    # first and request metrics include the compression time)
+    compressor.init_app(app)
+
     cors_origins = app.config.get("CORS_ORIGINS", "")
     if isinstance(cors_origins, str):
         # allow comma-separated values in env variable
@@ -73,6 +121,28 @@ def create_app():
     #Product routes
     app.register_blueprint(products_bp)
 
+    # Session bootstrap (GET /api/session/bootstrap)
+    app.register_blueprint(session_bp, url_prefix="/api/session")
+
+    # Site directory autocomplete (GET /api/sites/search) + `flask sites ...`
+    app.register_blueprint(sites_bp, url_prefix="/api/sites")
+
+    # Multi-site dashboard summary (GET /api/dashboard/summary)
+    app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
+
+    # Orders / quotes from the local mirror (GET /api/account/orders|quotes)
+    # + `flask account sync`
+    app.register_blueprint(account_bp, url_prefix="/api/account")
+
+    # Cached quote PDFs (GET /api/quotes/<name>/pdf)
+    app.register_blueprint(quotes_bp, url_prefix="/api/quotes")
+
+    # Server-side cart / quote draft (GET|PATCH /api/cart/<cart|quote>)
+    app.register_blueprint(cart_bp, url_prefix="/api/cart")
+
+    # Admin diagnostics: request profiles (GET /api/admin/profiles)
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+
     # -----------------------------------------------------------
     # Root route for quick health check / info
     # -----------------------------------------------------------
@@ -94,6 +164,31 @@ def create_app():
         Can be used for uptime monitoring or load balancer checks.
         """
         return {"status": "ok"}
+
+    # -----------------------------------------------------------
+    # DB pool metrics: checkout wait time and pool saturation
+    # (bearer METRICS_TOKEN or PROFILER_ADMIN_TOKEN; 404 when neither is set)
+    # -----------------------------------------------------------
+    @app.get("/api/health/db")
+    def health_db():
+        denied = diagnostics_guard()
+        if denied is not None:
+            return denied
+        pools = {name or "primary": engine.pool for name, engine in db.engines.items()}
+        return jsonify(pool_stats.snapshot(pools))
+
+    # Prometheus scrape endpoint (bearer METRICS_TOKEN; 404 while unset)
+    @app.get("/metrics")
+    def prometheus_metrics():
+        return metrics.response()
+
+    # Per-route SQL totals (query counts, DB time, N+1 flags); same tokens
+    @app.get("/api/health/queries")
+    def health_queries():
+        denied = diagnostics_guard()
+        if denied is not None:
+            return denied
+        return jsonify(query_stats.snapshot())
     # -----------------------------------------------------------
     # Return the fully configured app instance
     # -----------------------------------------------------------
@@ -0,0 +1,81 @@
+# app/account_search.py
+
+# -----------------------------------------------------------
+# Ranked full-text search over the orders / quotes mirror
+# - Postgres: search_tsv @@ to_tsquery('simple', 'tok:* & ...'),
+#   ranked by ts_rank_cd, served from the GIN index
+# - SQLite: <table>_fts MATCH '"tok"* "tok"*', ranked by bm25
+# Every token is a prefix match, so "inv 12" finds "INV-120-12V".
+# (index DDL: models.search_index_ddl)
+# -----------------------------------------------------------
+import re
+
+from sqlalchemy import bindparam, select, text
+
+from .account_sync import DOC_TYPES
+from .extensions import db
+
+_TOKEN_RE = re.compile(r"[0-9A-Za-z]+")
+MAX_TOKENS = 8
+
+
+def query_tokens(q: str):
+    return [t.lower() for t in _TOKEN_RE.findall(q or "")][:MAX_TOKENS]
+
+
+def _ranked_ids(table: str, site_norms, tokens, n: int):
+    """[(id, rank)] best first; rank is "higher is better" on both dialects."""
+    if db.engine.dialect.name == "postgresql":
+        sql = text(
+            f"SELECT id, ts_rank_cd(search_tsv, q) AS rank "
+            f"FROM {table}, to_tsquery('simple', :tsq) AS q "
+            f"WHERE site_norm IN :sites AND search_tsv @@ q "
+            f"ORDER BY rank DESC, id DESC LIMIT :n"
+        )
+        match = " & ".join(f"{t}:*" for t in tokens)
+        params = {"tsq": match, "sites": list(site_norms), "n": n}
+    else:
+        sql = text(
+            f"SELECT d.id, -bm25({table}_fts) AS rank "
+            f"FROM {table}_fts JOIN {table} AS d ON d.id = {table}_fts.rowid "
+            f"WHERE {table}_fts MATCH :match AND d.site_norm IN :sites "
+            f"ORDER BY rank DESC, d.id DESC LIMIT :n"
+        )
+        match = " ".join(f'"{t}"*' for t in tokens)
+        params = {"match": match, "sites": list(site_norms), "n": n}
+
+    sql = sql.bindparams(bindparam("sites", expanding=True))
+    return db.session.execute(sql, params).all()
+
+
+# -----------------------------------------------------------
+# Search one or both doc types across the given sites.
+# Returns (hits, has_more); hits are (doc_type, row, rank) best first.
+# -----------------------------------------------------------
+def search_documents(site_norms, q, doc_types=("quote", "order"), limit=20, offset=0):
+    tokens = query_tokens(q)
+    if not tokens or not site_norms:
+        return [], False
+
+    window = offset + limit + 1
+    ranked = []
+    for doc_type in doc_types:
+        model = DOC_TYPES[doc_type][0]
+        for doc_id, rank in _ranked_ids(model.__tablename__, site_norms, tokens, window):
+            ranked.append((float(rank or 0), doc_id, doc_type))
+
+    ranked.sort(key=lambda r: (r[0], r[1]), reverse=True)
+    page = ranked[offset:offset + limit]
+    has_more = len(ranked) > offset + limit
+
+    # load the page's rows (one SELECT per doc type)
+    rows = {}
+    for doc_type in doc_types:
+        ids = [doc_id for _, doc_id, t in page if t == doc_type]
+        if ids:
+            model = DOC_TYPES[doc_type][0]
+            for row in db.session.execute(select(model).where(model.id.in_(ids))).scalars():
+                rows[(doc_type, row.id)] = row
+
+    hits = [(t, rows[(t, doc_id)], rank) for rank, doc_id, t in page if (t, doc_id) in rows]
+    return hits, has_more
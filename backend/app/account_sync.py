@@ -0,0 +1,261 @@
+# app/account_sync.py
+
+# -----------------------------------------------------------
+# Incremental sync of remote orders / quotes into the local mirror
+# (Order / Quote tables), one (site, doc type) at a time.
+#
+# Upstream: GET /api/account-data?account_name=&page=&type=orders|quotes
+#   -> { "orders"|"quotes": [...], "total_orders"|"total_quotes": N }
+#
+# - incremental runs send the stored cursor as updated_since and
+#   stop at the first page without any new or changed document
+#   (listing is newest-first; content_hash detects changes)
+# - full runs walk every page and drop documents no longer listed
+# - all changes for a run are written with batched INSERT ... ON CONFLICT,
+#   new rows oldest-first so "id DESC" matches the upstream order
+# - the first view of a site starts a background run
+#   (start_initial_sync) instead of syncing inside the request
+# -----------------------------------------------------------
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import delete as sa_delete, select
+
+from .extensions import db, upstream
+from .models import Order, Quote, AccountSyncState, dialect_insert
+
+# doc type -> (model, upstream "type" / list key, upstream total key)
+DOC_TYPES = {
+    "order": (Order, "orders", "total_orders"),
+    "quote": (Quote, "quotes", "total_quotes"),
+}
+
+# rows per INSERT statement (keeps bind parameters well under driver limits)
+UPSERT_BATCH = 500
+
+# a failed first-view sync is not restarted before this (seconds)
+INITIAL_SYNC_RETRY_SECONDS = 60
+
+
+def _line_total(item):
+    total = Decimal("0")
+    for line in item.get("lines") or []:
+        if not isinstance(line, dict):
+            continue
+        try:
+            qty = Decimal(str(line.get("qty", line.get("quantity")) or 0))
+            price = Decimal(str(line.get("price") or 0))
+        except InvalidOperation:
+            continue
+        total += qty * price
+    return total.quantize(Decimal("0.01"))
+
+
+# upstream keys that may carry the ship-to (document level or per shipment)
+SHIP_TO_KEYS = ("ship_to", "shipto", "shipping_address", "partner_shipping", "delivery_address")
+
+
+def _ship_to_strings(obj):
+    for key in SHIP_TO_KEYS:
+        val = obj.get(key)
+        if isinstance(val, str):
+            yield val
+        elif isinstance(val, dict):
+            yield from (str(v) for v in val.values() if isinstance(v, (str, int)))
+        elif isinstance(val, list):
+            yield from (str(v) for v in val if isinstance(v, (str, int)))
+
+
+def document_search_text(item):
+    """Searchable text: document name, status, part numbers / descriptions, ship-to."""
+    parts = [str(item.get("name") or ""), str(item.get("status") or "")]
+    for line in item.get("lines") or []:
+        if isinstance(line, dict):
+            parts.append(str(line.get("name") or ""))
+            parts.append(str(line.get("description") or ""))
+    parts.extend(_ship_to_strings(item))
+    for shipment in item.get("shipments") or []:
+        if isinstance(shipment, dict):
+            parts.extend(_ship_to_strings(shipment))
+    return " ".join(p.strip() for p in parts if p and p.strip())
+
+
+def document_values(site_norm, item, now):
+    payload = json.dumps(item, sort_keys=True, default=str)
+    return {
+        "site_norm": site_norm,
+        "name": str(item["name"])[:100],
+        "status": (str(item.get("status") or "").strip().lower() or None),
+        "total": _line_total(item),
+        "payload": item,
+        "content_hash": hashlib.sha1(payload.encode("utf-8")).hexdigest(),
+        "search_text": document_search_text(item),
+        "synced_at": now,
+    }
+
+
+def _fetch_page(list_key, account_name, page, cursor):
+    params = {"account_name": account_name, "page": page, "type": list_key}
+    if cursor:
+        params["updated_since"] = cursor
+    resp = upstream.get("account_data", "/api/account-data", params=params)
+    resp.raise_for_status()
+    return resp.json() or {}
+
+
+def _known_hashes(model, site_norm, names):
+    rows = db.session.execute(
+        select(model.name, model.content_hash)
+        .where(model.site_norm == site_norm, model.name.in_(names))
+    )
+    return dict(rows.all())
+
+
+# -----------------------------------------------------------
+# Sync one (site, doc type). Commits; returns run stats.
+# Upstream errors propagate after being recorded on the state row.
+# -----------------------------------------------------------
+def sync_account(site_norm, account_name, doc_type, full=False, max_pages=200):
+    model, list_key, total_key = DOC_TYPES[doc_type]
+
+    state = AccountSyncState.query.filter_by(site_norm=site_norm, doc_type=doc_type).first()
+    if state is None:
+        state = AccountSyncState(site_norm=site_norm, doc_type=doc_type, account_name=account_name)
+        db.session.add(state)
+    state.account_name = account_name
+    full = full or state.last_full_sync_at is None
+
+    started = datetime.now(timezone.utc)
+    cursor = None if full else state.cursor
+    changed, seen = [], set()
+    pages, exhausted = 0, False
+
+    try:
+        for page in range(1, max_pages + 1):
+            body = _fetch_page(list_key, account_name, page, cursor)
+            pages = page
+            if isinstance(body.get(total_key), int):
+                state.remote_total = body[total_key]
+
+            items = [
+                i for i in body.get(list_key) or []
+                if isinstance(i, dict) and i.get("name") and str(i["name"])[:100] not in seen
+            ]
+            if not items:
+                exhausted = True
+                break
+
+            values = [document_values(site_norm, i, started) for i in items]
+            known = _known_hashes(model, site_norm, [v["name"] for v in values])
+            page_changed = [v for v in values if known.get(v["name"]) != v["content_hash"]]
+            changed.extend(page_changed)
+            seen.update(v["name"] for v in values)
+
+            if not full and not page_changed:
+                break
+    except Exception as e:
+        db.session.rollback()
+        _record_error(site_norm, doc_type, account_name, e)
+        raise
+
+    # oldest first -> new rows get ascending ids in upstream order
+    ordered = list(reversed(changed))
+    for i in range(0, len(ordered), UPSERT_BATCH):
+        stmt = dialect_insert(model).values(ordered[i:i + UPSERT_BATCH])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["site_norm", "name"],
+            set_={
+                "status": stmt.excluded.status,
+                "total": stmt.excluded.total,
+                "payload": stmt.excluded.payload,
+                "content_hash": stmt.excluded.content_hash,
+                "search_text": stmt.excluded.search_text,
+                "synced_at": stmt.excluded.synced_at,
+            },
+        )
+        db.session.execute(stmt)
+
+    removed = 0
+    if full and exhausted:
+        # only prune after seeing the whole listing (not when max_pages cut it short)
+        res = db.session.execute(
+            sa_delete(model)
+            .where(model.site_norm == site_norm, model.name.not_in(seen))
+            .execution_options(synchronize_session=False)
+        )
+        removed = res.rowcount or 0
+    if full:
+        state.last_full_sync_at = started
+
+    state.cursor = started.isoformat()
+    state.last_synced_at = started
+    state.last_error = None
+    db.session.commit()
+
+    return {"pages": pages, "changed": len(changed), "removed": removed, "full": full}
+
+
+def _record_error(site_norm, doc_type, account_name, exc):
+    try:
+        state = AccountSyncState.query.filter_by(site_norm=site_norm, doc_type=doc_type).first()
+        if state is None:
+            state = AccountSyncState(site_norm=site_norm, doc_type=doc_type, account_name=account_name)
+            db.session.add(state)
+        state.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
+# -----------------------------------------------------------
+# First view of a (site, doc type): sync in a background thread
+# - at most one run per key per worker process; concurrent views
+#   just see "syncing" (runs in other workers are harmless, every
+#   write is an upsert)
+# - after a failure, views get an error until the retry delay passes
+# -----------------------------------------------------------
+_initial_lock = threading.Lock()
+_initial_running = set()
+_initial_failed = {}    # key -> time.monotonic() of the failure
+
+
+def start_initial_sync(app, site_norm, account_name, doc_type) -> bool:
+    """Start (or join) the background sync; False if it failed recently."""
+    key = (site_norm, doc_type)
+    with _initial_lock:
+        if key in _initial_running:
+            return True
+        failed_at = _initial_failed.get(key)
+        if failed_at is not None and time.monotonic() - failed_at < INITIAL_SYNC_RETRY_SECONDS:
+            return False
+        _initial_running.add(key)
+
+    threading.Thread(
+        target=_run_initial_sync,
+        args=(app, site_norm, account_name, doc_type),
+        name=f"account-sync-{site_norm}-{doc_type}",
+        daemon=True,
+    ).start()
+    return True
+
+
+def _run_initial_sync(app, site_norm, account_name, doc_type):
+    key = (site_norm, doc_type)
+    failed = False
+    try:
+        with app.app_context():
+            sync_account(site_norm, account_name, doc_type)
+    except Exception:
+        failed = True
+        app.logger.exception("initial account sync failed for %s/%s", site_norm, doc_type)
+    finally:
+        with _initial_lock:
+            _initial_running.discard(key)
+            if failed:
+                _initial_failed[key] = time.monotonic()
+            else:
+                _initial_failed.pop(key, None)
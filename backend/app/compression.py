@@ -0,0 +1,223 @@
+# app/compression.py
+
+# -----------------------------------------------------------
+# Response compression (COMPRESS_ENABLED)
+# - negotiates br (when `brotli` / `brotlicffi` is installed) or
+#   gzip from Accept-Encoding; always adds Vary: Accept-Encoding
+# - only text-like bodies (JSON, text/*, JS, SVG); PDFs, ranges,
+#   HEAD, 204/206/304 and already-encoded responses pass through
+# - buffered bodies under COMPRESS_MIN_SIZE are left alone; streamed
+#   bodies are compressed chunk by chunk (flushed per chunk, so the
+#   client still receives data as it is produced)
+# - views decorated with @cache_compressed return the same bytes for
+#   a while (e.g. the catalog snapshot): their variants are kept in
+#   an LRU keyed by body digest, compressed once at max quality
+# - strong ETags are weakened on compressed responses (the bytes
+#   differ per encoding; If-None-Match uses weak comparison)
+# -----------------------------------------------------------
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, request
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSIBLE_TYPES = frozenset((
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+))
+SKIP_STATUS = frozenset((204, 206, 304))
+
+
+def cache_compressed(view):
+    """Keep compressed variants of this view's responses (same bytes -> same variant)."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._compress_cache = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _gzip_compressobj(level):
+    # wbits=31: gzip container, header mtime 0 (same input -> same bytes)
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+class _Stream:
+    """Incremental compressor with one interface for gzip and brotli."""
+
+    def __init__(self, encoding, level):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=level)
+        else:
+            self._br = None
+            self._gz = _gzip_compressobj(level)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._br is not None:
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._br is not None:
+            return self._br.finish()
+        return self._gz.flush()
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    c = _gzip_compressobj(level)
+    return c.compress(data) + c.flush()
+
+
+class _VariantCache:
+    """LRU of compressed bodies, bounded by total compressed size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class Compressor:
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 1024
+        self.levels = {"gzip": 6, "br": 5}
+        self.cache = _VariantCache(8 * 1024 * 1024)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("COMPRESS_ENABLED", True))
+        self.min_size = int(app.config.get("COMPRESS_MIN_SIZE", self.min_size))
+        self.levels = {
+            "gzip": int(app.config.get("COMPRESS_GZIP_LEVEL", 6)),
+            "br": int(app.config.get("COMPRESS_BR_QUALITY", 5)),
+        }
+        self.cache = _VariantCache(int(app.config.get("COMPRESS_CACHE_MAX_BYTES", self.cache.max_bytes)))
+        app.extensions["compressor"] = self
+        if self.enabled:
+            app.after_request(self._compress)
+
+    @property
+    def encodings(self):
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self):
+        """Best encoding the client accepts (ties go to br), or None."""
+        accept = request.accept_encodings
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = accept.quality(encoding)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    @staticmethod
+    def _compressible(response) -> bool:
+        mimetype = response.mimetype or ""
+        return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith("+json")
+
+    # -----------------------------------------------------------
+    # after_request hook
+    # -----------------------------------------------------------
+    def _compress(self, response):
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in SKIP_STATUS
+            or "Content-Encoding" in response.headers
+            or "Content-Range" in response.headers
+            or "no-transform" in response.headers.get("Cache-Control", "")
+            or not self._compressible(response)
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            self._compress_stream(response, encoding)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            compressed = self._compress_body(body, encoding)
+            if len(compressed) >= len(body):
+                return response
+            response.set_data(compressed)
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compress_body(self, body: bytes, encoding: str) -> bytes:
+        if not g.get("_compress_cache"):
+            return compress(body, encoding, self.levels[encoding])
+
+        # compressed once per distinct body, so spend the CPU on ratio
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = compress(body, encoding, 11 if encoding == "br" else 9)
+            self.cache.put(key, compressed)
+        return compressed
+
+    def _compress_stream(self, response, encoding):
+        source = response.response
+        chunks = response.iter_encoded()
+        stream = _Stream(encoding, self.levels[encoding])
+
+        def generate():
+            for chunk in chunks:
+                if chunk:
+                    out = stream.chunk(chunk)
+                    if out:
+                        yield out
+            yield stream.finish()
+
+        close = getattr(source, "close", None)
+        if close is not None:
+            response.call_on_close(close)
+        response.response = generate()
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from .db_pool import engine_options
 
 load_dotenv()
 
@@ -8,6 +9,64 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///dev.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    # DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS)
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Optional read replica for @read_replica handlers, and how long a user's
+    # reads stay on the primary after their own write (read-your-writes).
+    # DB_REPLICA_STICKY_DIR shares that window across worker processes.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+    SQLALCHEMY_BINDS = (
+        {"replica": {"url": DATABASE_REPLICA_URL, **engine_options(DATABASE_REPLICA_URL)}}
+        if DATABASE_REPLICA_URL else {}
+    )
+    DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+    DB_REPLICA_STICKY_DIR = os.getenv("DB_REPLICA_STICKY_DIR", "")
+
+    # Per-request SQL accounting; X-DB-* headers are for debugging only
+    QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "True").lower() == "true"
+    QUERY_STATS_HEADERS = os.getenv("QUERY_STATS_HEADERS", "False").lower() == "true"
+    QUERY_STATS_NPLUSONE_THRESHOLD = int(os.getenv("QUERY_STATS_NPLUSONE_THRESHOLD", "5"))
+
+    # GET /metrics (Prometheus). Under gunicorn set METRICS_MULTIPROC_DIR to a
+    # directory shared by the workers (emptied on restart) so any worker
+    # can answer for all of them. Scrapes must send METRICS_TOKEN as a
+    # bearer token; /metrics is 404 while it is unset.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    # Request profiler (off by default): sample a fraction of requests
+    # and/or keep any request slower than PROFILER_SLOW_MS (0 = off)
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    PROFILER_SLOW_MS = float(os.getenv("PROFILER_SLOW_MS", "0"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "10"))
+    PROFILER_RING_SIZE = int(os.getenv("PROFILER_RING_SIZE", "20"))
+    PROFILER_TOP_STACKS = int(os.getenv("PROFILER_TOP_STACKS", "200"))
+    PROFILER_ADMIN_TOKEN = os.getenv("PROFILER_ADMIN_TOKEN", "")
+
+    # Tracing (off by default). Spans go to TRACING_FILE (JSON lines,
+    # default <instance>/traces.jsonl) and/or an OTLP/HTTP collector
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1"))
+    TRACING_FILE = os.getenv("TRACING_FILE", "")
+    TRACING_OTLP_ENDPOINT = os.getenv("TRACING_OTLP_ENDPOINT", "")
+    TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "dtg-api")
+    # peers (comma-separated IPs / CIDRs, e.g. the gateway) whose
+    # traceparent sampled flag is followed; everyone else gets the rate
+    TRACING_TRUSTED_PARENTS = os.getenv("TRACING_TRUSTED_PARENTS", "")
+
+    # Response compression (gzip; brotli when the module is installed).
+    # Bodies under COMPRESS_MIN_SIZE bytes are sent as-is; views marked
+    # @cache_compressed keep their variants in a COMPRESS_CACHE_MAX_BYTES LRU
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "True").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", "5"))
+    COMPRESS_CACHE_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
 
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-me")
@@ -15,6 +74,40 @@ class Config:
 
     AMAZON_SITE_API_URL = os.getenv("AMAZON_SITE_API_URL", "https://example.com/api")
 
+    # Upstream (Amazon site API) HTTP client: pool, timeouts, retries, breaker
+    UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "20"))
+    UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "2"))
+    UPSTREAM_DEFAULT_TIMEOUT = float(os.getenv("UPSTREAM_DEFAULT_TIMEOUT", "5"))
+    UPSTREAM_TIMEOUTS = {
+        "fetch_address": float(os.getenv("UPSTREAM_TIMEOUT_FETCH_ADDRESS", "5")),
+        "dashboard": float(os.getenv("UPSTREAM_TIMEOUT_DASHBOARD", "8")),
+        "account_data": float(os.getenv("UPSTREAM_TIMEOUT_ACCOUNT_DATA", "15")),
+        "quote_pdf": float(os.getenv("UPSTREAM_TIMEOUT_QUOTE_PDF", "30")),
+    }
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "2"))
+    UPSTREAM_BACKOFF_FACTOR = float(os.getenv("UPSTREAM_BACKOFF_FACTOR", "0.3"))
+    UPSTREAM_BACKOFF_JITTER = float(os.getenv("UPSTREAM_BACKOFF_JITTER", "0.5"))
+    UPSTREAM_BREAKER_THRESHOLD = int(os.getenv("UPSTREAM_BREAKER_THRESHOLD", "5"))
+    UPSTREAM_BREAKER_RESET_SECONDS = float(os.getenv("UPSTREAM_BREAKER_RESET_SECONDS", "30"))
+    # Optional cross-worker single-flight (empty = per-worker only)
+    UPSTREAM_SINGLEFLIGHT_LOCK_DIR = os.getenv("UPSTREAM_SINGLEFLIGHT_LOCK_DIR", "")
+    UPSTREAM_SINGLEFLIGHT_RESULT_TTL = float(os.getenv("UPSTREAM_SINGLEFLIGHT_RESULT_TTL", "2"))
+    # Concurrent fan-out (e.g. /api/dashboard/summary): worker threads per
+    # process and the shared deadline for the whole batch (seconds)
+    UPSTREAM_FANOUT_WORKERS = int(os.getenv("UPSTREAM_FANOUT_WORKERS", "16"))
+    DASHBOARD_SUMMARY_DEADLINE = float(os.getenv("DASHBOARD_SUMMARY_DEADLINE", "6"))
+
+    # Quote PDF disk cache (default: <instance>/pdf-cache)
+    QUOTE_PDF_CACHE_DIR = os.getenv("QUOTE_PDF_CACHE_DIR", "")
+    QUOTE_PDF_CACHE_MAX_BYTES = int(os.getenv("QUOTE_PDF_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+    # Server-side cart totals (same rules as the portal)
+    CART_TAX_RATE = os.getenv("CART_TAX_RATE", "0.08")
+    CART_SHIPPING_FLAT = os.getenv("CART_SHIPPING_FLAT", "9.99")
+
+    # Site directory autocomplete: max age of the in-memory index (seconds)
+    SITE_DIRECTORY_TTL = float(os.getenv("SITE_DIRECTORY_TTL", "300"))
+
     # Token location & cookie options
     JWT_TOKEN_LOCATION = os.getenv("JWT_TOKEN_LOCATION", "cookies").split(",")
     JWT_COOKIE_SECURE = os.getenv("JWT_COOKIE_SECURE", "False").lower() == "true"
@@ -0,0 +1,159 @@
+# app/db_pool.py
+
+# -----------------------------------------------------------
+# SQLAlchemy connection pool: env-driven engine options and metrics
+# - engine_options(url): SQLALCHEMY_ENGINE_OPTIONS from DB_* env vars
+#   (size, overflow, timeout, recycle, pre-ping, Postgres
+#   statement_timeout set per connection)
+# - InstrumentedQueuePool: QueuePool that times every checkout
+#   (waiting for a free slot + connect + pre-ping) and counts
+#   pool timeouts
+# - pool_stats.snapshot(pools): checkout wait / saturation numbers,
+#   served by GET /api/health/db (bearer METRICS_TOKEN / PROFILER_ADMIN_TOKEN)
+# -----------------------------------------------------------
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from .metrics import DB_POOL_CHECKOUT_TIMEOUTS, DB_POOL_CHECKOUT_WAIT
+
+# checkout wait histogram buckets (seconds)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+# -----------------------------------------------------------
+# SQLALCHEMY_ENGINE_OPTIONS for the given database URL
+# -----------------------------------------------------------
+def engine_options(url: str) -> dict:
+    opts = {
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    }
+
+    # in-memory SQLite keeps its single-connection pool
+    if url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url:
+        return opts
+
+    opts.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        pool_use_lifo=_env_bool("DB_POOL_USE_LIFO", True),
+    )
+
+    if url.startswith("postgres"):
+        # server-side guard against runaway queries (0 disables)
+        statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+        if statement_timeout > 0:
+            opts["connect_args"] = {"options": f"-c statement_timeout={statement_timeout}"}
+    return opts
+
+
+# -----------------------------------------------------------
+# Process-wide checkout counters (one pool per engine/process)
+# -----------------------------------------------------------
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_sum = 0.0
+            self.wait_max = 0.0
+            self.wait_buckets = [0] * len(WAIT_BUCKETS)
+
+    def observe(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[i] += 1
+                    break
+
+    def snapshot(self, pools: dict) -> dict:
+        """pools: {name: Pool}; only QueuePools report size / saturation."""
+        with self._lock:
+            per_pool = {}
+            for name, pool in pools.items():
+                if not isinstance(pool, QueuePool):
+                    per_pool[name] = {"class": type(pool).__name__}
+                    continue
+                capacity = pool.size() + max(pool._max_overflow, 0)
+                in_use = pool.checkedout()
+                per_pool[name] = {
+                    "size": pool.size(),
+                    "max_overflow": pool._max_overflow,
+                    "checked_out": in_use,
+                    "checked_in": pool.checkedin(),
+                    "overflow": max(pool.overflow(), 0),
+                    "saturation": round(in_use / capacity, 4) if capacity else None,
+                }
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS, self.wait_buckets):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "pools": per_pool,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_seconds": {
+                    "sum": round(self.wait_sum, 6),
+                    "max": round(self.wait_max, 6),
+                    "avg": round(self.wait_sum / self.checkouts, 6) if self.checkouts else 0.0,
+                    "buckets": buckets,
+                },
+            }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            pool_stats.observe(time.perf_counter() - start, timed_out=True)
+            DB_POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        elapsed = time.perf_counter() - start
+        pool_stats.observe(elapsed)
+        DB_POOL_CHECKOUT_WAIT.observe(elapsed)
+        return conn
+
+
+# -----------------------------------------------------------
+# Pool gauges for /metrics: [(name, help, labels, value)]
+# -----------------------------------------------------------
+POOL_GAUGES = (
+    ("size", "db_pool_size", "Configured pool size."),
+    ("checked_out", "db_pool_checked_out", "Connections currently checked out."),
+    ("overflow", "db_pool_overflow", "Overflow connections currently open."),
+    ("saturation", "db_pool_saturation", "checked_out / (size + max_overflow)."),
+)
+
+
+def pool_gauges(pools: dict):
+    out = []
+    for name, stats in pool_stats.snapshot(pools)["pools"].items():
+        for key, metric, help_text in POOL_GAUGES:
+            if stats.get(key) is not None:
+                out.append((metric, help_text, {"pool": name}, stats[key]))
+    return out
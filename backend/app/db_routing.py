@@ -0,0 +1,174 @@
+# app/db_routing.py
+
+# -----------------------------------------------------------
+# Optional read replica (DATABASE_REPLICA_URL -> bind "replica")
+# - RoutingSession: SELECTs go to the replica while the request is
+#   marked read-only; flushes, DML and everything after the first
+#   write in the session go to the primary
+# - @read_replica marks a read-only handler (after @jwt_required()),
+#   unless the user wrote within DB_REPLICA_STICKY_SECONDS
+#   (read-your-writes)
+# - ReplicaRouter keeps the per-user "last write" marks: in memory,
+#   plus mtimes in DB_REPLICA_STICKY_DIR so other workers see them
+#   (expired marker files are swept at most every STICKY_SWEEP_INTERVAL)
+# Without a replica bind everything runs on the primary as before.
+# -----------------------------------------------------------
+import os
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql import CompoundSelect, Select
+
+REPLICA_BIND = "replica"
+
+# seconds between sweeps of DB_REPLICA_STICKY_DIR; markers are deleted
+# once this long past their window, so a sweep rarely meets a user who
+# is writing again at that moment (worst case: one read on the replica)
+STICKY_SWEEP_INTERVAL = 60.0
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._replica_ok(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        if clause is not None and not isinstance(clause, (Select, CompoundSelect)):
+            # a write (or raw SQL): the rest of this session stays on the primary
+            self.info["on_primary"] = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_ok(self, clause):
+        return (
+            has_request_context()
+            and g.get("db_use_replica", False)
+            and not self._flushing
+            and not self.info.get("on_primary")
+            and isinstance(clause, (Select, CompoundSelect))
+        )
+
+    # users whose data this transaction changed (see User.bump_data_version)
+    def mark_written(self, user_id):
+        self.info.setdefault("written_users", set()).add(user_id)
+        self.info["on_primary"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    users = session.info.pop("written_users", None)
+    if users and has_request_context():
+        router = current_app.extensions.get("replica_router")
+        if router is not None and router.enabled:
+            for user_id in users:
+                router.mark(user_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _after_rollback(session):
+    session.info.pop("written_users", None)
+
+
+# -----------------------------------------------------------
+# Per-user read-your-writes window
+# -----------------------------------------------------------
+class ReplicaRouter:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sticky_seconds = 5.0
+        self.sticky_dir = ""
+        self._lock = threading.Lock()
+        self._written = {}  # user_id -> time.time() of last write
+        self._last_sweep = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND in (app.config.get("SQLALCHEMY_BINDS") or {})
+        self.sticky_seconds = float(app.config.get("DB_REPLICA_STICKY_SECONDS", self.sticky_seconds))
+        self.sticky_dir = app.config.get("DB_REPLICA_STICKY_DIR") or ""
+        if self.enabled and self.sticky_dir:
+            os.makedirs(self.sticky_dir, exist_ok=True)
+        app.extensions["replica_router"] = self
+
+    def _path(self, user_id):
+        return os.path.join(self.sticky_dir, f"u{int(user_id)}")
+
+    def mark(self, user_id):
+        now = time.time()
+        with self._lock:
+            self._written[str(user_id)] = now
+            if len(self._written) > 10000:
+                cutoff = now - self.sticky_seconds
+                self._written = {k: t for k, t in self._written.items() if t > cutoff}
+        if self.sticky_dir:
+            try:
+                with open(self._path(user_id), "a"):
+                    pass
+                os.utime(self._path(user_id), (now, now))
+            except (OSError, ValueError):
+                current_app.logger.warning("could not record replica stickiness for user %s", user_id)
+            self._maybe_sweep(now)
+
+    def is_sticky(self, user_id) -> bool:
+        if user_id is None:
+            return False
+        cutoff = time.time() - self.sticky_seconds
+        with self._lock:
+            if self._written.get(str(user_id), 0) > cutoff:
+                return True
+        if self.sticky_dir:
+            try:
+                return os.stat(self._path(user_id)).st_mtime > cutoff
+            except (OSError, ValueError):
+                return False
+        return False
+
+    def _maybe_sweep(self, now):
+        with self._lock:
+            if now - self._last_sweep < STICKY_SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+        self.sweep(now)
+
+    def sweep(self, now=None):
+        """Delete marker files well past their window; returns how many."""
+        if not self.sticky_dir:
+            return 0
+        cutoff = (now or time.time()) - self.sticky_seconds - STICKY_SWEEP_INTERVAL
+        removed = 0
+        try:
+            entries = list(os.scandir(self.sticky_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            if not entry.name.startswith("u"):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+# -----------------------------------------------------------
+# Decorator for read-only handlers (place below @jwt_required())
+# -----------------------------------------------------------
+def read_replica(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        router = current_app.extensions.get("replica_router")
+        if router is not None and router.enabled:
+            try:
+                user_id = get_jwt_identity()
+            except RuntimeError:
+                user_id = None
+            g.db_use_replica = not router.is_sticky(user_id)
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,48 @@
+# app/etags.py
+
+# -----------------------------------------------------------
+# Conditional GET on the per-user data version (users.data_version)
+# - ETag is derived from (user id, data version, view scope)
+# - a matching If-None-Match is answered with 304 after one
+#   indexed SELECT of data_version; the view itself never runs
+# - writes bump the version via User.bump_data_version()
+# -----------------------------------------------------------
+from functools import wraps
+
+from flask import request, make_response
+from flask_jwt_extended import get_jwt_identity
+
+from .models import User
+
+
+def user_etag(user_id: int, version: int, scope: str) -> str:
+    return f"u{user_id}-v{version}-{scope}"
+
+
+def conditional_on_user_version(scope: str):
+    """Wrap a jwt_required GET view with ETag / If-None-Match handling."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                user_id = int(get_jwt_identity())
+            except (TypeError, ValueError):
+                return view(*args, **kwargs)
+
+            version = User.get_data_version(user_id)
+            if version is None:
+                return view(*args, **kwargs)
+
+            etag = user_etag(user_id, version, scope)
+            if request.if_none_match.contains_weak(etag):
+                resp = make_response("", 304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+
+            resp.set_etag(etag, weak=True)
+            resp.headers["Cache-Control"] = "private, no-cache"
+            return resp
+        return wrapper
+    return decorator
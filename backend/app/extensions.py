@@ -2,8 +2,24 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from .upstream import UpstreamClient
+from .pdf_cache import PdfCache
+from .db_routing import ReplicaRouter, RoutingSession
+from .query_stats import QueryStats
+from .metrics import Metrics
+from .profiler import RequestProfiler
+from .tracing import Tracer
+from .compression import Compressor
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
+upstream = UpstreamClient()
+pdf_cache = PdfCache()
+replica_router = ReplicaRouter()
+query_stats = QueryStats()
+metrics = Metrics()
+profiler = RequestProfiler()
+tracer = Tracer()
+compressor = Compressor()
@@ -0,0 +1,193 @@
+# app/json_provider.py
+
+# -----------------------------------------------------------
+# Faster JSON for API responses (app.json = FastJSONProvider(app))
+# - orjson >= 3.9 when installed (pinned in requirements.txt), else
+#   one reusable, preconfigured json.JSONEncoder (no per-call setup);
+#   an older orjson is ignored (no orjson.Fragment)
+# - response() writes bytes straight into the Response (no str
+#   round trip); debug mode keeps Flask's indented output
+# - datetime / date -> ISO 8601 (same text as .isoformat()),
+#   Decimal -> string, UUID -> string, dataclasses -> dict
+# - json_fragment(key, factory): encode an immutable value once
+#   (e.g. the product catalog) and splice the cached bytes into
+#   every response that contains it
+# Output keeps Flask's defaults: sorted keys, compact separators.
+# -----------------------------------------------------------
+import dataclasses
+import decimal
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+if orjson is not None and not hasattr(orjson, "Fragment"):  # orjson < 3.9
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+# -----------------------------------------------------------
+# Pre-encoded fragments
+# -----------------------------------------------------------
+class JSONFragment:
+    """Already-encoded JSON bytes, inserted verbatim by FastJSONProvider."""
+    __slots__ = ("encoded",)
+
+    def __init__(self, encoded: bytes):
+        self.encoded = encoded
+
+
+class _FragmentCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, factory):
+        with self._lock:
+            frag = self._items.get(key)
+            if frag is not None:
+                self._items.move_to_end(key)
+                return frag
+        encoded = encode_bytes(factory())
+        with self._lock:
+            frag = self._items.get(key)
+            if frag is None:
+                frag = JSONFragment(encoded)
+                self._items[key] = frag
+                while len(self._items) > self.maxsize:
+                    self._items.popitem(last=False)
+            return frag
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+_fragments = _FragmentCache()
+
+
+def json_fragment(key, factory) -> JSONFragment:
+    """Cached encoding of factory() under key; only for values that never change."""
+    return _fragments.get(key, factory)
+
+
+# -----------------------------------------------------------
+# Encoding
+# -----------------------------------------------------------
+def _default(o):
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+# fragments met during the current encode (per thread)
+_pending = threading.local()
+
+
+def _placeholder(frag):
+    # a string stands in for the fragment and is spliced back after
+    # encoding; the random per-encode token keeps payload values from
+    # ever matching it
+    placeholder = f"\x00jsonfrag:{_pending.token}:{len(_pending.fragments)}\x00"
+    _pending.fragments.append((placeholder, frag.encoded))
+    return placeholder
+
+
+def _stdlib_default(o):
+    if isinstance(o, JSONFragment):
+        return _placeholder(o)
+    return _default(o)
+
+
+def _orjson_default(o):
+    if isinstance(o, JSONFragment):
+        return orjson.Fragment(o.encoded)
+    return _default(o)
+
+
+def _splice(encoded: bytes, fragments) -> bytes:
+    for placeholder, fragment in fragments:
+        quoted = json.dumps(placeholder).encode("ascii")
+        encoded = encoded.replace(quoted, fragment, 1)
+    return encoded
+
+
+def _begin():
+    _pending.fragments = []
+    _pending.token = os.urandom(8).hex()
+
+
+_ENCODER = json.JSONEncoder(
+    default=_stdlib_default, sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+)
+
+
+def _stdlib_encode(obj) -> bytes:
+    return _ENCODER.encode(obj).encode("utf-8")
+
+
+def _orjson_encode(obj) -> bytes:
+    return orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+
+_encode = _orjson_encode if orjson is not None else _stdlib_encode
+
+
+def encode_bytes(obj, encoder=None) -> bytes:
+    _begin()
+    try:
+        encoded = (encoder or _encode)(obj)
+        return _splice(encoded, _pending.fragments) if _pending.fragments else encoded
+    finally:
+        _pending.fragments = None
+
+
+# -----------------------------------------------------------
+# Flask provider
+# -----------------------------------------------------------
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            return encode_bytes(obj).decode("utf-8")
+        # custom arguments (e.g. indent in debug mode): stdlib json
+        kwargs.setdefault("default", _stdlib_default)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        _begin()
+        try:
+            out = json.dumps(obj, **kwargs)
+            if _pending.fragments:
+                out = _splice(out.encode("utf-8"), _pending.fragments).decode("utf-8")
+            return out
+        finally:
+            _pending.fragments = None
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode_bytes(obj) + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,335 @@
+# app/metrics.py
+
+# -----------------------------------------------------------
+# In-process metrics in Prometheus text format (GET /metrics)
+# - Counter / Histogram families. Each thread updates its own
+#   shard (no lock on the hot path); a scrape sums the shards and
+#   folds shards of finished threads into a retired total
+# - gauges come from collectors evaluated at scrape time (DB pool)
+# - multiprocess mode (METRICS_MULTIPROC_DIR, e.g. gunicorn):
+#   each worker writes its totals to <dir>/<pid>.json at most every
+#   METRICS_FLUSH_INTERVAL seconds; a scrape on any worker sums all
+#   files. Gauges are kept per worker (pid label), live workers only.
+#   Empty the directory when the whole server restarts.
+# - scrapes need "Authorization: Bearer <METRICS_TOKEN>"; without a
+#   configured token the endpoint answers 404
+# -----------------------------------------------------------
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _merge(dst: dict, src: dict):
+    for key, value in list(src.items()):
+        if isinstance(value, list):
+            cur = dst.get(key)
+            if cur is None:
+                dst[key] = list(value)
+            else:
+                for i, v in enumerate(value):
+                    cur[i] += v
+        else:
+            dst[key] = dst.get(key, 0.0) + value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# -----------------------------------------------------------
+# Registry: families, per-thread shards, gauge collectors
+# -----------------------------------------------------------
+class Registry:
+    def __init__(self):
+        self.families = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()   # shard registration and scrapes only
+        self._shards = []               # [(thread, data)]
+        self._retired = {}
+        self._collectors = {}
+
+    def register(self, family):
+        self.families[family.name] = family
+
+    def add_collector(self, key, fn):
+        """fn() -> [(name, help, {label: value}, value)], evaluated at scrape time."""
+        self._collectors[key] = fn
+
+    def shard(self) -> dict:
+        data = getattr(self._local, "data", None)
+        if data is None:
+            data = self._local.data = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), data))
+        return data
+
+    def totals(self) -> dict:
+        out = {}
+        with self._lock:
+            live = []
+            for thread, data in self._shards:
+                if thread.is_alive():
+                    live.append((thread, data))
+                else:
+                    _merge(self._retired, data)
+            self._shards = live
+            _merge(out, self._retired)
+            for _, data in live:
+                _merge(out, data)
+        return out
+
+    def gauges(self):
+        out = []
+        for fn in list(self._collectors.values()):
+            try:
+                out.extend(fn())
+            except Exception:
+                current_app.logger.exception("metrics collector failed")
+        return out
+
+
+class _Family:
+    kind = "untyped"
+
+    def __init__(self, registry, name, help_text, labelnames=(), buckets=None):
+        self._registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+        registry.register(self)
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def inc(self, *labels, value=1.0):
+        shard = self._registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0.0) + value
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def observe(self, value, *labels):
+        shard = self._registry.shard()
+        key = (self.name, labels)
+        cells = shard.get(key)
+        if cells is None:
+            # one cell per bucket (non-cumulative), then sum, then count
+            cells = shard[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                cells[i] += 1
+                break
+        cells[-2] += value
+        cells[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+
+registry = Registry()
+
+
+# -----------------------------------------------------------
+# Families
+# -----------------------------------------------------------
+HTTP_REQUESTS = Counter(
+    registry, "http_requests_total", "HTTP requests by route and status.",
+    ("blueprint", "endpoint", "method", "status"),
+)
+HTTP_LATENCY = Histogram(
+    registry, "http_request_duration_seconds", "HTTP request latency by route.",
+    ("blueprint", "endpoint", "method"),
+)
+UPSTREAM_LATENCY = Histogram(
+    registry, "upstream_request_duration_seconds", "Amazon site API call latency.",
+    ("endpoint", "outcome"), buckets=UPSTREAM_BUCKETS,
+)
+SMTP_LATENCY = Histogram(
+    registry, "smtp_send_duration_seconds", "Time to send one email over SMTP.",
+    ("outcome",), buckets=UPSTREAM_BUCKETS,
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    registry, "password_hash_duration_seconds", "Password hash / verify time.",
+    ("op",), buckets=HASH_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    registry, "db_pool_checkout_wait_seconds", "Time to obtain a pooled DB connection.",
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    registry, "db_pool_checkout_timeouts_total", "Pool checkouts that hit pool_timeout.",
+)
+
+
+# -----------------------------------------------------------
+# Flask integration: request timing, /metrics rendering, flushes
+# -----------------------------------------------------------
+class Metrics:
+    def __init__(self, app=None):
+        self.registry = registry
+        self.enabled = True
+        self.multiproc_dir = ""
+        self.flush_interval = 5.0
+        self.token = ""
+        self._last_flush = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("METRICS_ENABLED", True))
+        self.multiproc_dir = app.config.get("METRICS_MULTIPROC_DIR") or ""
+        self.flush_interval = float(app.config.get("METRICS_FLUSH_INTERVAL", self.flush_interval))
+        self.token = app.config.get("METRICS_TOKEN") or ""
+        if self.multiproc_dir:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+        app.extensions["metrics"] = self
+        if self.enabled:
+            app.before_request(self._start)
+            app.after_request(self._finish)
+
+    def _start(self):
+        g._metrics_start = time.perf_counter()
+
+    def _finish(self, response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        blueprint = request.blueprint or ""
+        endpoint = request.endpoint or "<unmatched>"
+        HTTP_LATENCY.observe(time.perf_counter() - start, blueprint, endpoint, request.method)
+        HTTP_REQUESTS.inc(blueprint, endpoint, request.method, str(response.status_code))
+        if self.multiproc_dir:
+            self.flush()
+        return response
+
+    # -----------------------------------------------------------
+    # Multiprocess: this worker's totals -> <dir>/<pid>.json
+    # -----------------------------------------------------------
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        payload = {
+            "samples": [[name, list(labels), value] for (name, labels), value in registry.totals().items()],
+            "gauges": registry.gauges(),
+        }
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.multiproc_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp, os.path.join(self.multiproc_dir, f"{os.getpid()}.json"))
+        except OSError:
+            current_app.logger.exception("metrics flush failed")
+
+    def _collect(self):
+        if not self.multiproc_dir:
+            return registry.totals(), registry.gauges()
+
+        self.flush(force=True)
+        totals, gauges = {}, []
+        for entry in os.scandir(self.multiproc_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError):
+                continue
+            _merge(totals, {(n, tuple(l)): v for n, l, v in payload.get("samples", [])})
+
+            pid = entry.name[:-len(".json")]
+            if _pid_alive(pid):
+                for name, help_text, labels, value in payload.get("gauges", []):
+                    gauges.append((name, help_text, {**labels, "pid": pid}, value))
+        return totals, gauges
+
+    # -----------------------------------------------------------
+    # Prometheus text exposition
+    # -----------------------------------------------------------
+    def render(self) -> str:
+        totals, gauges = self._collect()
+        by_family = {}
+        for (name, labels), value in totals.items():
+            by_family.setdefault(name, []).append((tuple(labels), value))
+
+        lines = []
+        for name in sorted(registry.families):
+            fam = registry.families[name]
+            lines.append(f"# HELP {name} {fam.help}")
+            lines.append(f"# TYPE {name} {fam.kind}")
+            for labels, value in sorted(by_family.get(name, ())):
+                if fam.kind == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(fam.buckets, value):
+                        cumulative += count
+                        le = _labels(fam.labelnames, labels, (("le", _num(float(bound))),))
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    inf = _labels(fam.labelnames, labels, (("le", "+Inf"),))
+                    lines.append(f"{name}_bucket{inf} {_num(value[-1])}")
+                    lbl = _labels(fam.labelnames, labels)
+                    lines.append(f"{name}_sum{lbl} {_num(float(value[-2]))}")
+                    lines.append(f"{name}_count{lbl} {_num(value[-1])}")
+                else:
+                    lines.append(f"{name}{_labels(fam.labelnames, labels)} {_num(value)}")
+
+        seen = set()
+        for name, help_text, labels, value in sorted(gauges, key=lambda s: (s[0], sorted(s[2].items()))):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{_labels(labels.keys(), labels.values())} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+    def response(self):
+        if not self.token:
+            return Response("not found\n", status=404, mimetype="text/plain")
+        supplied = request.headers.get("Authorization", "").encode()
+        if not hmac.compare_digest(supplied, f"Bearer {self.token}".encode()):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(self.render(), headers={"Content-Type": CONTENT_TYPE, "Cache-Control": "no-store"})
+
+
+def _pid_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -3,19 +3,50 @@
 # --------------------------------------------------------------
 # Standard libs and helpers for timestamps and password hashing
 # --------------------------------------------------------------
+import re
 from datetime import datetime, timezone
+from functools import lru_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 
 # -----------------------------------------------------------
 # SQLAlchemy base (db) provided by your app's extensions
 # -----------------------------------------------------------
 from .extensions import db
+from .metrics import PASSWORD_HASH_LATENCY
 
 # -----------------------------------------------------------
 # Postgres-specific column type for text arrays (ARRAY)
 # -----------------------------------------------------------
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy import text, func
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint
+from sqlalchemy import text, func, update, event, DDL
+
+
+# -------------------------------------------------------------------
+# Dialect-aware INSERT that supports ON CONFLICT ... / RETURNING
+# (Postgres in production, SQLite in local dev)
+# -------------------------------------------------------------------
+def dialect_insert(model):
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
+# -------------------------------------------------------------------
+# Canonical site slug used for dedupe: lowercase, "amazon" prefix
+# stripped, punctuation collapsed (e.g. "Amazon DEN2" -> "den2")
+# -------------------------------------------------------------------
+_SLUG_JUNK_RE = re.compile(r"[^\w\-.]+")
+
+@lru_cache(maxsize=4096)
+def normalize_slug(raw: str) -> str:
+    if not raw:
+        return ""
+    s = str(raw).lower().strip()
+    if s.startswith("amazon"):
+        s = s[len("amazon"):].lstrip(":-_ .")
+    return " ".join(_SLUG_JUNK_RE.sub(" ", s).split())
 
 # -------------------------------------------------------------------
 # User: stores login credentials and verification status
@@ -30,6 +61,8 @@ class User(db.Model):
     profile_completed_at = db.Column(db.DateTime)
     password_reset_code       = db.Column(db.String(32), nullable=True)
     password_reset_expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # bumped on every write to profile / sites / shipping (ETag source)
+    data_version         = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     created_at           = db.Column(
                                 db.DateTime, 
                                 default=lambda: datetime.now(timezone.utc), 
@@ -50,15 +83,55 @@ class User(db.Model):
                 )
 
     # 1:n relationship to UserSite (normalized sites)
-    sites = db.relationship("UserSite", back_populates="user", cascade="all, delete-orphan", lazy="dynamic")
-    
+    # Plain (non-dynamic) collection so it can be eager-loaded together
+    # with the user via selectinload(); use sites_query() for filtering in SQL.
+    sites = db.relationship(
+                    "UserSite",
+                    back_populates="user",
+                    cascade="all, delete-orphan",
+                    order_by=lambda: (UserSite.created_at.asc(), UserSite.id.asc())
+                )
+
+    # 1:1 relationship to ShippingInformation
+    shipping_information = db.relationship(
+                    "ShippingInformation",
+                    back_populates="user",
+                    uselist=False,
+                    cascade="all, delete-orphan"
+                )
+
+    # Query API over this user's sites (for filtered / ordered access in SQL)
+    def sites_query(self):
+        return UserSite.query.filter(UserSite.user_id == self.id)
+
+    # Bump the per-user data version inside the caller's transaction
+    # (single UPDATE, no ORM load); every profile/sites/shipping write calls this.
+    # Also starts the user's read-your-writes window once the commit lands.
+    @classmethod
+    def bump_data_version(cls, user_id: int):
+        db.session().mark_written(user_id)
+        db.session.execute(
+            update(cls)
+            .where(cls.id == user_id)
+            .values(data_version=cls.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    def get_data_version(cls, user_id: int):
+        return db.session.execute(
+            db.select(cls.data_version).where(cls.id == user_id)
+        ).scalar()
+
     # Helper to hash and set the user's password
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        with PASSWORD_HASH_LATENCY.time("hash"):
+            self.password_hash = generate_password_hash(password)
 
     # Helper to validate a raw password against the stored hash
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        with PASSWORD_HASH_LATENCY.time("check"):
+            return check_password_hash(self.password_hash, password)
 
 # -------------------------------------------------------------------------
 # UserProfile: stores extended profile fields for a user (1:1)
@@ -93,12 +166,38 @@ class UserProfile(db.Model):
 # -------------------------------------------------------------------------
 class UserSite(db.Model):
     __tablename__ = "user_sites"
+    __table_args__ = (
+        # one row per (user, normalized slug); target of ON CONFLICT dedupe
+        db.Index("uq_user_sites_user_id_slug_norm", "user_id", "slug_norm", unique=True),
+
+        # at most one default site per user. On Postgres this is a partial
+        # exclusion constraint (same semantics as a partial unique index) so
+        # it can be DEFERRABLE: checked at end of statement, which lets one
+        # UPDATE move the flag between rows in any physical order.
+        ExcludeConstraint(
+            ("user_id", "="),
+            name="uq_user_sites_one_default",
+            using="btree",
+            where=text("is_default"),
+            deferrable=True,
+            initially="IMMEDIATE",
+        ).ddl_if(dialect="postgresql"),
+        db.Index(
+            "uq_user_sites_one_default", "user_id",
+            unique=True,
+            sqlite_where=text("is_default"),
+        ).ddl_if(dialect="sqlite"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # canonical short code for the site (no spaces ideally)
     site_slug = db.Column(db.String(100), nullable=False)
 
+    # normalize_slug(site_slug), kept in sync on assignment; all lookups
+    # and dedupe go through the unique (user_id, slug_norm) index
+    slug_norm = db.Column(db.String(100), nullable=False)
+
     # human friendly label shown in UI
     label = db.Column(db.String(255), nullable=True)
 
@@ -110,15 +209,86 @@ class UserSite(db.Model):
     # relationship back to user
     user = db.relationship("User", back_populates="sites")
 
+    @db.validates("site_slug")
+    def _sync_slug_norm(self, key, value):
+        self.slug_norm = normalize_slug(value)
+        return value
+
+    # ---------------------------------------------------------------
+    # Make `site_id` the user's only default site.
+    # Postgres: one statement, SET is_default = (id = :target) over all
+    # of the user's rows (row locks serialize concurrent switches; the
+    # deferrable constraint is checked once the statement finishes).
+    # SQLite checks unique indexes row by row, so there the flag is
+    # cleared first; SQLite serializes writers so this cannot race.
+    # Returns False (and changes nothing) if the site isn't the user's.
+    # ---------------------------------------------------------------
+    @classmethod
+    def switch_default(cls, user_id: int, site_id: int) -> bool:
+        owned = (
+            db.select(cls.id)
+            .where(cls.id == site_id, cls.user_id == user_id)
+            .exists()
+        )
+        if db.engine.dialect.name == "postgresql":
+            res = db.session.execute(
+                update(cls)
+                .where(cls.user_id == user_id, owned)
+                .values(is_default=(cls.id == site_id))
+                .execution_options(synchronize_session=False)
+            )
+            return (res.rowcount or 0) > 0
+
+        db.session.execute(
+            update(cls)
+            .where(cls.user_id == user_id, cls.is_default.is_(True), cls.id != site_id, owned)
+            .values(is_default=False)
+            .execution_options(synchronize_session=False)
+        )
+        res = db.session.execute(
+            update(cls)
+            .where(cls.id == site_id, cls.user_id == user_id)
+            .values(is_default=True)
+            .execution_options(synchronize_session=False)
+        )
+        return (res.rowcount or 0) > 0
+
     def to_dict(self):
         return {
             "id": self.id,
             "site_slug": self.site_slug,
             "label": self.label,
             "is_default": bool(self.is_default),
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": self.created_at
         }
     
+# -------------------------------------------------------------------------
+# Site: directory of known Amazon sites (served by /api/sites/search)
+# - slug: short code (e.g. "DEN2"), slug_norm: normalize_slug(slug)
+# - label: human friendly label (e.g. "Amazon DEN2")
+# - region: optional grouping (e.g. "US-West")
+# -------------------------------------------------------------------------
+class Site(db.Model):
+    __tablename__ = "sites"
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(100), nullable=False)
+    slug_norm = db.Column(db.String(100), nullable=False, unique=True, index=True)
+    label = db.Column(db.String(255), nullable=True)
+    region = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @db.validates("slug")
+    def _sync_slug_norm(self, key, value):
+        self.slug_norm = normalize_slug(value)
+        return value
+
+    def to_dict(self):
+        return {
+            "slug": self.slug,
+            "label": self.label or f"Amazon {self.slug}",
+            "region": self.region,
+        }
+
 # -------------------------------------------------------------------------
 # ShippingInformation: stores user's default shipping address (1:1)
 # -------------------------------------------------------------------------
@@ -159,13 +329,188 @@ class ShippingInformation(db.Model):
     )
 
     # relationship back to User (1:1)
-    user = db.relationship(
-        "User",
-        backref=db.backref(
-            "shipping_information",
-            uselist=False,
-            cascade="all, delete-orphan"
+    user = db.relationship("User", back_populates="shipping_information")
+
+    # Single-statement save keyed on the unique user_id:
+    # INSERT ... ON CONFLICT (user_id) DO UPDATE of the given fields only
+    # (unsent fields keep their value; a new row gets "" for them)
+    @classmethod
+    def upsert(cls, user_id: int, fields: dict):
+        insert_values = {f: "" for f in SHIPPING_COLUMNS}
+        insert_values.update(fields)
+        stmt = dialect_insert(cls).values(user_id=user_id, **insert_values)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={**fields, "updated_at": func.now()},
+            )
         )
+
+
+SHIPPING_COLUMNS = ("address1", "address2", "city", "state", "zip", "country", "shipto")
+
+
+
+
+# -------------------------------------------------------------------------
+# Order / Quote: local mirror of the remote account-data API
+# (/api/account-data?type=orders|quotes), keyed by site
+# - one row per (site_norm, name); name is the upstream document number
+# - payload keeps the upstream item as-is (lines, shipments, ...)
+# - new rows are inserted oldest-first, so "id DESC" is the upstream
+#   listing order and doubles as the keyset pagination key
+# -------------------------------------------------------------------------
+class AccountDocumentMixin:
+    id           = db.Column(db.Integer, primary_key=True)
+    site_norm    = db.Column(db.String(100), nullable=False)
+    name         = db.Column(db.String(100), nullable=False)
+    status       = db.Column(db.String(50))        # lowercased, for filtering
+    total        = db.Column(db.Numeric(12, 2))
+    payload      = db.Column(db.JSON, nullable=False)
+    content_hash = db.Column(db.String(40), nullable=False)
+    # name, status, part numbers, ship-to ... (full-text search source)
+    search_text  = db.Column(db.Text)
+    synced_at    = db.Column(
+                        db.DateTime(timezone=True),
+                        default=lambda: datetime.now(timezone.utc),
+                        nullable=False
+                    )
+
+
+class Order(AccountDocumentMixin, db.Model):
+    __tablename__ = "orders"
+    __table_args__ = (
+        db.UniqueConstraint("site_norm", "name", name="uq_orders_site_norm_name"),
+        db.Index("ix_orders_site_norm_id", "site_norm", "id"),
+        db.Index("ix_orders_site_norm_status_id", "site_norm", "status", "id"),
+    )
+
+
+class Quote(AccountDocumentMixin, db.Model):
+    __tablename__ = "quotes"
+    __table_args__ = (
+        db.UniqueConstraint("site_norm", "name", name="uq_quotes_site_norm_name"),
+        db.Index("ix_quotes_site_norm_id", "site_norm", "id"),
+        db.Index("ix_quotes_site_norm_status_id", "site_norm", "status", "id"),
     )
 
 
+# -------------------------------------------------------------------------
+# Full-text search index over search_text (queried by app/account_search.py)
+# - Postgres: generated tsvector column + GIN index
+# - SQLite: external-content FTS5 table kept current by triggers
+# Created with the tables here; the migration does the same for existing DBs.
+# -------------------------------------------------------------------------
+def search_index_ddl(table: str, dialect: str):
+    if dialect == "postgresql":
+        return [
+            f"ALTER TABLE {table} ADD COLUMN search_tsv tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(search_text, ''))) STORED",
+            f"CREATE INDEX ix_{table}_search_tsv ON {table} USING GIN (search_tsv)",
+        ]
+    if dialect == "sqlite":
+        return [
+            f"CREATE VIRTUAL TABLE {table}_fts USING fts5(search_text, content='{table}', content_rowid='id')",
+            f"CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {table}_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+            f"CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {table}_fts({table}_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+            f"CREATE TRIGGER {table}_fts_au AFTER UPDATE OF search_text ON {table} BEGIN "
+            f"INSERT INTO {table}_fts({table}_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+            f"INSERT INTO {table}_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+        ]
+    return []
+
+
+# -------------------------------------------------------------------------
+# Case-insensitive name prefix filter (?q= on the keyset lists)
+# - matches lower(name) LIKE 'prefix%', so the index is on lower(name);
+#   Postgres needs text_pattern_ops for LIKE under a non-C collation
+# -------------------------------------------------------------------------
+def name_prefix_index_ddl(table: str, dialect: str):
+    if dialect == "postgresql":
+        return [f"CREATE INDEX ix_{table}_site_norm_lower_name ON {table} (site_norm, lower(name) text_pattern_ops)"]
+    if dialect == "sqlite":
+        return [f"CREATE INDEX ix_{table}_site_norm_lower_name ON {table} (site_norm, lower(name))"]
+    return []
+
+
+for _model in (Order, Quote):
+    for _dialect in ("postgresql", "sqlite"):
+        for _stmt in search_index_ddl(_model.__tablename__, _dialect) + name_prefix_index_ddl(_model.__tablename__, _dialect):
+            event.listen(_model.__table__, "after_create", DDL(_stmt).execute_if(dialect=_dialect))
+
+
+# -------------------------------------------------------------------------
+# AccountSyncState: incremental sync bookkeeping per (site, doc type)
+# - cursor: "updated since" watermark sent to upstream on the next run
+# -------------------------------------------------------------------------
+class AccountSyncState(db.Model):
+    __tablename__ = "account_sync_state"
+    __table_args__ = (
+        db.UniqueConstraint("site_norm", "doc_type", name="uq_account_sync_state_site_type"),
+    )
+
+    id                = db.Column(db.Integer, primary_key=True)
+    site_norm         = db.Column(db.String(100), nullable=False)
+    doc_type          = db.Column(db.String(10), nullable=False)    # "order" | "quote"
+    account_name      = db.Column(db.String(255), nullable=False)
+    cursor            = db.Column(db.String(64))
+    remote_total      = db.Column(db.Integer)
+    last_synced_at    = db.Column(db.DateTime(timezone=True))
+    last_full_sync_at = db.Column(db.DateTime(timezone=True))
+    last_error        = db.Column(db.Text)
+
+
+# -------------------------------------------------------------------------
+# Cart / CartItem: server-side cart and quote draft (one per user and kind)
+# - version: optimistic concurrency token, bumped by every change
+# - unit_price comes from the catalog, never from the client
+# -------------------------------------------------------------------------
+class Cart(db.Model):
+    __tablename__ = "carts"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "kind", name="uq_carts_user_id_kind"),
+    )
+
+    id         = db.Column(db.Integer, primary_key=True)
+    user_id    = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind       = db.Column(db.String(10), nullable=False)     # "cart" | "quote"
+    version    = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(
+                    db.DateTime(timezone=True),
+                    server_default=func.now(),
+                    onupdate=func.now(),
+                    nullable=False
+                )
+
+    items = db.relationship(
+                "CartItem",
+                back_populates="cart",
+                cascade="all, delete-orphan",
+                order_by="CartItem.id"
+            )
+
+
+class CartItem(db.Model):
+    __tablename__ = "cart_items"
+    __table_args__ = (
+        db.UniqueConstraint("cart_id", "part_number", name="uq_cart_items_cart_id_part_number"),
+    )
+
+    id          = db.Column(db.Integer, primary_key=True)
+    cart_id     = db.Column(db.Integer, db.ForeignKey("carts.id", ondelete="CASCADE"), nullable=False)
+    part_number = db.Column(db.String(100), nullable=False)
+    name        = db.Column(db.String(255))
+    unit_price  = db.Column(db.Numeric(10, 2), nullable=False)
+    quantity    = db.Column(db.Integer, nullable=False)
+
+    cart = db.relationship("Cart", back_populates="items")
+
+    def to_dict(self):
+        return {
+            "partNumber": self.part_number,
+            "name": self.name,
+            "price": f"{self.unit_price:.2f}",
+            "quantity": self.quantity,
+        }
@@ -0,0 +1,163 @@
+# app/pdf_cache.py
+
+# -----------------------------------------------------------
+# Content-addressed disk cache for upstream quote PDFs
+#   <dir>/blobs/<sha256 of bytes>.pdf   the PDF itself
+#   <dir>/refs/<key>                    -> blob sha256
+# key = sha256(quote name + quote version); the version is the
+# mirror's content_hash, so a changed quote gets a new key and the
+# old entry is simply never looked up again (pruned by size later).
+# Writes go to a temp file and are renamed into place, so readers
+# never see a partial PDF.
+# -----------------------------------------------------------
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+# temp files older than this are leftovers of crashed tees (seconds)
+TMP_MAX_AGE = 3600
+# refs / tmp are swept at least this often, and after any blob eviction
+SWEEP_INTERVAL = 600
+
+
+class PdfCache:
+    def __init__(self, app=None):
+        self.root = None
+        self.max_bytes = 500 * 1024 * 1024
+        self.chunk_size = 64 * 1024
+        self._prune_lock = threading.Lock()
+        self._last_sweep = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.root = app.config.get("QUOTE_PDF_CACHE_DIR") or os.path.join(app.instance_path, "pdf-cache")
+        self.max_bytes = int(app.config.get("QUOTE_PDF_CACHE_MAX_BYTES", self.max_bytes))
+        self.chunk_size = int(app.config.get("QUOTE_PDF_CHUNK_SIZE", self.chunk_size))
+        for sub in ("blobs", "refs", "tmp"):
+            os.makedirs(os.path.join(self.root, sub), exist_ok=True)
+        app.extensions["pdf_cache"] = self
+
+    @staticmethod
+    def key(name: str, version: str) -> str:
+        return hashlib.sha256(f"{name}\0{version or ''}".encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, "blobs", f"{digest}.pdf")
+
+    def _ref_path(self, key: str) -> str:
+        return os.path.join(self.root, "refs", key)
+
+    # -----------------------------------------------------------
+    # Lookup: path of the cached PDF for key, or None
+    # -----------------------------------------------------------
+    def get(self, key: str):
+        try:
+            with open(self._ref_path(key), encoding="ascii") as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # recency for pruning
+        return path
+
+    # -----------------------------------------------------------
+    # Tee: yield chunks to the client while writing them to disk;
+    # the entry is committed only if the whole body arrived.
+    # -----------------------------------------------------------
+    def tee(self, key: str, chunks):
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"), suffix=".part")
+        digest = hashlib.sha256()
+        complete = False
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    out.write(chunk)
+                    digest.update(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            if complete:
+                self._commit(key, tmp, digest.hexdigest())
+            else:
+                _unlink(tmp)
+
+    def _commit(self, key: str, tmp: str, digest: str):
+        blob = self._blob_path(digest)
+        if os.path.exists(blob):
+            _unlink(tmp)
+        else:
+            os.replace(tmp, blob)
+
+        fd, ref_tmp = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"), suffix=".ref")
+        with os.fdopen(fd, "w", encoding="ascii") as f:
+            f.write(digest)
+        os.replace(ref_tmp, self._ref_path(key))
+        self.prune()
+
+    # -----------------------------------------------------------
+    # Keep the blob store under max_bytes (least recently used first),
+    # then drop refs whose blob is gone and stale temp files.
+    # -----------------------------------------------------------
+    def prune(self):
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            evicted = self._prune_blobs()
+            now = time.monotonic()
+            if evicted or now - self._last_sweep >= SWEEP_INTERVAL:
+                self._last_sweep = now
+                self._sweep_refs()
+                self._sweep_tmp()
+        finally:
+            self._prune_lock.release()
+
+    def _prune_blobs(self) -> int:
+        entries = []
+        for entry in os.scandir(os.path.join(self.root, "blobs")):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _unlink(path)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _sweep_refs(self):
+        for entry in os.scandir(os.path.join(self.root, "refs")):
+            try:
+                with open(entry.path, encoding="ascii") as f:
+                    digest = f.read().strip()
+            except OSError:
+                continue
+            if not digest or not os.path.exists(self._blob_path(digest)):
+                _unlink(entry.path)
+
+    def _sweep_tmp(self):
+        cutoff = time.time() - TMP_MAX_AGE
+        for entry in os.scandir(os.path.join(self.root, "tmp")):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    _unlink(entry.path)
+            except OSError:
+                continue
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
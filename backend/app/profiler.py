@@ -0,0 +1,179 @@
+# app/profiler.py
+
+# -----------------------------------------------------------
+# Opt-in stack-sampling profiler for requests (PROFILER_ENABLED)
+# - while a profiled request runs, one background thread samples
+#   its stack every PROFILER_INTERVAL_MS (sys._current_frames);
+#   with nothing to profile the thread blocks until a request starts
+# - a request is profiled when it is picked by PROFILER_SAMPLE_RATE,
+#   or always when PROFILER_SLOW_MS is set; in that case the
+#   profile is kept only if the request turned out to be slow
+# - kept profiles (collapsed stacks, top PROFILER_TOP_STACKS) go
+#   into a per-route ring buffer of PROFILER_RING_SIZE entries
+# - read back through /api/admin/profiles (routes/admin.py) as JSON
+#   or collapsed "a;b;c 12" lines for flamegraph.pl / speedscope
+# Buffers are per worker process.
+# -----------------------------------------------------------
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from flask import g, request
+
+
+class ProfileState:
+    __slots__ = ("samples", "started", "sampled")
+
+    def __init__(self, sampled: bool):
+        self.samples = Counter()
+        self.started = time.perf_counter()
+        self.sampled = sampled
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse_stack(frame, max_depth=128) -> str:
+    names = []
+    while frame is not None and len(names) < max_depth:
+        names.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class RequestProfiler:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.slow_seconds = 0.0
+        self.interval = 0.01
+        self.ring_size = 20
+        self.top_stacks = 200
+        self.token = ""
+        self._active = {}          # thread id -> ProfileState
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)   # _active became non-empty
+        self._buffers = {}         # route -> deque of entries
+        self._ids = itertools.count(1)
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("PROFILER_ENABLED", False))
+        self.sample_rate = float(app.config.get("PROFILER_SAMPLE_RATE", 0.0))
+        self.slow_seconds = float(app.config.get("PROFILER_SLOW_MS", 0)) / 1000.0
+        self.interval = max(float(app.config.get("PROFILER_INTERVAL_MS", 10)), 1.0) / 1000.0
+        self.ring_size = int(app.config.get("PROFILER_RING_SIZE", self.ring_size))
+        self.top_stacks = int(app.config.get("PROFILER_TOP_STACKS", self.top_stacks))
+        self.token = app.config.get("PROFILER_ADMIN_TOKEN") or ""
+        app.extensions["profiler"] = self
+        if self.enabled:
+            app.before_request(self._start)
+            app.teardown_request(self._finish)
+
+    # -----------------------------------------------------------
+    # Request hooks
+    # -----------------------------------------------------------
+    def _start(self):
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and not self.slow_seconds:
+            return
+        self._ensure_sampler()
+        state = ProfileState(sampled)
+        g._profile_state = state
+        with self._wakeup:
+            self._active[threading.get_ident()] = state
+            self._wakeup.notify()
+
+    def _finish(self, exc=None):
+        state = g.pop("_profile_state", None)
+        if state is None:
+            return
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+        duration = time.perf_counter() - state.started
+        slow = bool(self.slow_seconds) and duration >= self.slow_seconds
+        if not (state.sampled or slow):
+            return
+
+        route = request.endpoint or "<unmatched>"
+        entry = {
+            "id": next(self._ids),
+            "route": route,
+            "method": request.method,
+            "path": request.path,
+            "duration_ms": round(duration * 1000, 2),
+            "reason": "slow" if slow else "sampled",
+            "at": datetime.now(timezone.utc).isoformat(),
+            "sample_count": sum(state.samples.values()),
+            "interval_ms": self.interval * 1000,
+            "stacks": state.samples.most_common(self.top_stacks),
+        }
+        with self._lock:
+            buf = self._buffers.get(route)
+            if buf is None:
+                buf = self._buffers[route] = deque(maxlen=self.ring_size)
+            buf.append(entry)
+
+    # -----------------------------------------------------------
+    # Sampler thread (started lazily, once per worker process)
+    # -----------------------------------------------------------
+    def _ensure_sampler(self):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._active:
+                    self._wakeup.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for tid, state in active:
+                frame = frames.get(tid)
+                if frame is not None:
+                    state.samples[collapse_stack(frame)] += 1
+
+    # -----------------------------------------------------------
+    # Read side (admin endpoint)
+    # -----------------------------------------------------------
+    def entries(self, route=None):
+        with self._lock:
+            if route is not None:
+                return list(self._buffers.get(route, ()))
+            return [e for buf in self._buffers.values() for e in buf]
+
+    def get(self, entry_id: int):
+        for entry in self.entries():
+            if entry["id"] == entry_id:
+                return entry
+        return None
+
+    @staticmethod
+    def collapsed(entries) -> str:
+        """Merged collapsed stacks ("frame;frame;frame count" per line)."""
+        merged = Counter()
+        for entry in entries:
+            for stack, count in entry["stacks"]:
+                merged[stack] += count
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
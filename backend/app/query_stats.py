@@ -0,0 +1,144 @@
+# app/query_stats.py
+
+# -----------------------------------------------------------
+# Per-request SQL accounting
+# - cursor events on every engine (primary + replica) count
+#   statements and DB time for the current request
+# - statements are reduced to a "shape" (placeholders and IN
+#   lists collapsed); a shape repeated QUERY_STATS_NPLUSONE_THRESHOLD
+#   times in one request is logged as a likely N+1
+# - X-DB-* response headers when QUERY_STATS_HEADERS is on
+# - per-route totals served by GET /api/health/queries (bearer token,
+#   see routes/admin.py diagnostics_guard)
+# -----------------------------------------------------------
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|\$\d+|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE = re.compile(r"VALUES\s*(\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER_RE.sub("?", statement)
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    shape = _VALUES_RE.sub(r"VALUES \1", shape)
+    return _WS_RE.sub(" ", shape).strip()
+
+
+class RequestQueries:
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def most_repeated(self):
+        return self.shapes.most_common(1)[0] if self.shapes else (None, 0)
+
+
+class QueryStats:
+    def __init__(self, app=None):
+        self.enabled = True
+        self.headers = False
+        self.threshold = 5
+        self._lock = threading.Lock()
+        self._routes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("QUERY_STATS_ENABLED", True))
+        self.headers = bool(app.config.get("QUERY_STATS_HEADERS", app.debug))
+        self.threshold = int(app.config.get("QUERY_STATS_NPLUSONE_THRESHOLD", self.threshold))
+        app.extensions["query_stats"] = self
+        if not self.enabled:
+            return
+
+        from .extensions import db
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    # -----------------------------------------------------------
+    # Request hooks
+    # -----------------------------------------------------------
+    def _start(self):
+        g._request_queries = RequestQueries()
+
+    def _finish(self, response):
+        stats = g.pop("_request_queries", None)
+        if stats is None:
+            return response
+
+        route = request.endpoint or "<unmatched>"
+        shape, repeats = stats.most_repeated()
+        suspect = repeats >= self.threshold
+        if suspect:
+            current_app.logger.warning(
+                "possible N+1 on %s %s: %d x %s", request.method, route, repeats, shape[:300]
+            )
+        self._record(route, stats, suspect)
+
+        if self.headers:
+            response.headers["X-DB-Query-Count"] = str(stats.count)
+            response.headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+            response.headers["X-DB-Max-Repeat"] = str(repeats)
+            if suspect:
+                response.headers["X-DB-N-Plus-One"] = "1"
+        return response
+
+    def _record(self, route, stats, suspect):
+        with self._lock:
+            agg = self._routes.get(route)
+            if agg is None:
+                agg = self._routes[route] = {
+                    "requests": 0, "queries": 0, "db_seconds": 0.0,
+                    "max_queries": 0, "n_plus_one": 0,
+                }
+            agg["requests"] += 1
+            agg["queries"] += stats.count
+            agg["db_seconds"] += stats.seconds
+            agg["max_queries"] = max(agg["max_queries"], stats.count)
+            agg["n_plus_one"] += int(suspect)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: {
+                    **agg,
+                    "db_seconds": round(agg["db_seconds"], 6),
+                    "avg_queries": round(agg["queries"] / agg["requests"], 2),
+                }
+                for route, agg in sorted(self._routes.items())
+            }
+
+
+# -----------------------------------------------------------
+# Engine events (no-ops outside a request)
+# -----------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "_request_queries" in g:
+        context._query_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_stats_start", None)
+    if start is None or not has_request_context():
+        return
+    stats = g.get("_request_queries")
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - start
+        stats.shapes[statement_shape(statement)] += 1
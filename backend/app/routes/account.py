@@ -0,0 +1,262 @@
+# -----------------------------------------------------------
+# Orders & quotes served from the local mirror (Order / Quote)
+#   GET /api/account/orders?site=DEN2&status=&q=&limit=&cursor=
+#   GET /api/account/quotes?...
+#   GET /api/account/search?q=inv-120&type=quotes&site=&page=
+#   flask account sync [--full] [--site DEN2]   (cron: incremental)
+#   flask account reindex                       (rebuild search_text)
+# Lists are keyset-paginated on id DESC (upstream order); the remote
+# account-data API is only called by the sync. The first view of a
+# site starts a background sync and answers 202 {"syncing": true}.
+# -----------------------------------------------------------
+import base64
+
+import click
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func, select, update
+from ..account_search import search_documents
+from ..account_sync import DOC_TYPES, document_search_text, start_initial_sync, sync_account
+from ..extensions import db, upstream
+from ..models import AccountSyncState, Site, UserSite, normalize_slug
+
+account_bp = Blueprint("account", __name__)
+
+# route segment -> doc type
+LIST_TYPES = {"orders": "order", "quotes": "quote"}
+MAX_LIMIT = 100
+
+
+# -----------------------------------------------------------
+# Opaque keyset cursor: last id of the previous page
+# -----------------------------------------------------------
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+# -----------------------------------------------------------
+# Upstream account name for a mirrored site. The mirror is shared
+# by everyone with the site, so the name comes from the sites
+# directory (or the normalized slug), never from a user's label.
+# -----------------------------------------------------------
+def _account_name(site_norm: str, directory_slug=None) -> str:
+    return f"Amazon {directory_slug or site_norm.upper()}"
+
+
+def _directory_slugs(site_norms) -> dict:
+    rows = db.session.execute(
+        select(Site.slug_norm, Site.slug).where(Site.slug_norm.in_(list(site_norms)))
+    ).all()
+    return {norm: slug for norm, slug in rows}
+
+
+def _name_prefix(column, q: str):
+    # lower(name) LIKE 'prefix%' with a literal prefix, so the
+    # (site_norm, lower(name)) index applies
+    escaped = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return func.lower(column).like(escaped + "%", escape="\\")
+
+
+# -----------------------------------------------------------
+# GET /account/<orders|quotes>
+# Response keeps the upstream shape ({orders|quotes, total_*}) plus
+# next_cursor, page_size and synced_at. total_* is only counted for
+# the first page (null when a cursor is given).
+# -----------------------------------------------------------
+@account_bp.get("/<any(orders, quotes):list_type>")
+@jwt_required()
+def list_documents(list_type):
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify(message="Invalid token identity"), 401
+
+    doc_type = LIST_TYPES[list_type]
+    model, list_key, total_key = DOC_TYPES[doc_type]
+
+    site_norm = normalize_slug(request.args.get("site") or "")
+    if not site_norm:
+        return jsonify(message="site is required"), 400
+
+    # only sites the user has
+    site = UserSite.query.filter_by(user_id=user_id, slug_norm=site_norm).first()
+    if not site:
+        return jsonify(message="Site not found"), 404
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 5)), MAX_LIMIT))
+    except ValueError:
+        limit = 5
+
+    cursor = request.args.get("cursor")
+    after_id = decode_cursor(cursor) if cursor else None
+    if cursor and after_id is None:
+        return jsonify(message="Invalid cursor"), 400
+
+    state = AccountSyncState.query.filter_by(site_norm=site_norm, doc_type=doc_type).first()
+    if state is None or state.last_synced_at is None:
+        # first view of this site: fill the mirror out of band
+        if not upstream.configured:
+            return jsonify(message="Account data service not configured"), 503
+        app = current_app._get_current_object()
+        account_name = _account_name(site_norm, _directory_slugs([site_norm]).get(site_norm))
+        if not start_initial_sync(app, site_norm, account_name, doc_type):
+            return jsonify(message="Failed to load account data"), 502
+        return jsonify({
+            list_key: [],
+            total_key: 0,
+            "page_size": limit,
+            "next_cursor": None,
+            "synced_at": None,
+            "syncing": True,
+        }), 202
+
+    # filters
+    conds = [model.site_norm == site_norm]
+    status = (request.args.get("status") or "").strip().lower()
+    if status:
+        conds.append(model.status == status)
+    q = (request.args.get("q") or "").strip()
+    if q:
+        conds.append(_name_prefix(model.name, q))
+
+    stmt = select(model).where(*conds)
+    if after_id is not None:
+        stmt = stmt.where(model.id < after_id)
+    rows = db.session.execute(stmt.order_by(model.id.desc()).limit(limit + 1)).scalars().all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # COUNT(*) scans the whole filtered set; do it once, not per page
+    total = None
+    if after_id is None:
+        total = db.session.execute(select(func.count()).select_from(model).where(*conds)).scalar()
+
+    return jsonify({
+        list_key: [r.payload for r in rows],
+        total_key: total,
+        "page_size": limit,
+        "next_cursor": encode_cursor(rows[-1].id) if has_more else None,
+        "synced_at": state.last_synced_at.isoformat() if state and state.last_synced_at else None,
+    }), 200
+
+
+# -----------------------------------------------------------
+# GET /account/search — ranked full-text search over the mirror
+# (name, status, part numbers, ship-to) across the user's sites
+# or one of them (?site=). type = orders | quotes | all.
+# -----------------------------------------------------------
+SEARCH_TYPES = {"orders": ("order",), "quotes": ("quote",), "all": ("quote", "order")}
+
+@account_bp.get("/search")
+@jwt_required()
+def search():
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify(message="Invalid token identity"), 401
+
+    q = (request.args.get("q") or "").strip()
+    if len(q) < 2:
+        return jsonify(message="q must be at least 2 characters"), 400
+
+    doc_types = SEARCH_TYPES.get(request.args.get("type") or "all")
+    if doc_types is None:
+        return jsonify(message="type must be one of orders, quotes, all"), 400
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), 50))
+        page = max(1, int(request.args.get("page", 1)))
+    except ValueError:
+        return jsonify(message="Invalid page or limit"), 400
+
+    site_norms = db.session.execute(
+        select(UserSite.slug_norm).where(UserSite.user_id == user_id)
+    ).scalars().all()
+    wanted = normalize_slug(request.args.get("site") or "")
+    if wanted:
+        if wanted not in site_norms:
+            return jsonify(message="Site not found"), 404
+        site_norms = [wanted]
+
+    hits, has_more = search_documents(site_norms, q, doc_types, limit=limit, offset=(page - 1) * limit)
+
+    return jsonify({
+        "hits": [
+            {
+                "type": doc_type,
+                "site": row.site_norm,
+                "name": row.name,
+                "status": row.payload.get("status") if isinstance(row.payload, dict) else row.status,
+                "total": float(row.total) if row.total is not None else None,
+                "rank": round(rank, 6),
+                "document": row.payload,
+            }
+            for doc_type, row, rank in hits
+        ],
+        "page": page,
+        "page_size": limit,
+        "has_more": has_more,
+    }), 200
+
+
+# -----------------------------------------------------------
+# CLI: incremental (default) or full sync of every site in user_sites
+# -----------------------------------------------------------
+@account_bp.cli.command("sync")
+@click.option("--full", is_flag=True, help="Walk every page and prune removed documents.")
+@click.option("--site", "site_filter", default=None, help="Only sync this site (e.g. DEN2).")
+def sync_command(full, site_filter):
+    """Sync remote orders and quotes into the local mirror."""
+    site_norms = db.session.execute(select(UserSite.slug_norm).distinct()).scalars().all()
+    wanted = normalize_slug(site_filter) if site_filter else None
+    if wanted:
+        site_norms = [n for n in site_norms if n == wanted]
+    directory = _directory_slugs(site_norms)
+
+    failures = 0
+    for site_norm in site_norms:
+        account_name = _account_name(site_norm, directory.get(site_norm))
+        for doc_type in DOC_TYPES:
+            try:
+                stats = sync_account(site_norm, account_name, doc_type, full=full)
+                click.echo(f"{site_norm} {doc_type}s: {stats}")
+            except Exception as e:
+                failures += 1
+                click.echo(f"{site_norm} {doc_type}s: FAILED {e}", err=True)
+
+    if failures:
+        raise SystemExit(1)
+
+
+@account_bp.cli.command("reindex")
+@click.option("--batch", default=1000, show_default=True)
+def reindex_command(batch):
+    """Recompute search_text from the stored payloads (after changing what is indexed)."""
+    for doc_type, (model, _, _) in DOC_TYPES.items():
+        last_id, count = 0, 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.payload)
+                .where(model.id > last_id)
+                .order_by(model.id.asc())
+                .limit(batch)
+            ).all()
+            if not rows:
+                break
+            db.session.execute(
+                update(model),
+                [{"id": r.id, "search_text": document_search_text(r.payload or {})} for r in rows],
+            )
+            db.session.commit()
+            last_id, count = rows[-1].id, count + len(rows)
+        click.echo(f"{doc_type}s: reindexed {count} row(s)")
@@ -0,0 +1,66 @@
+# -----------------------------------------------------------
+# Admin diagnostics (bearer PROFILER_ADMIN_TOKEN; 404 when unset)
+#   GET /api/admin/profiles                       summaries, newest first
+#   GET /api/admin/profiles?route=auth.login&format=collapsed
+#   GET /api/admin/profiles/<id>[?format=collapsed]
+# format=collapsed returns "frame;frame;frame count" lines, ready for
+# flamegraph.pl or speedscope. Profiles are per worker process.
+# diagnostics_guard() protects the /api/health/db|queries endpoints.
+# -----------------------------------------------------------
+import hmac
+
+from flask import Blueprint, Response, abort, jsonify, request
+from ..extensions import metrics, profiler
+
+admin_bp = Blueprint("admin", __name__)
+
+
+@admin_bp.before_request
+def require_admin_token():
+    token = profiler.token
+    supplied = request.headers.get("Authorization", "")
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(supplied, f"Bearer {token}"):
+        return jsonify(message="Unauthorized"), 401
+
+
+def diagnostics_guard():
+    """None if the request carries METRICS_TOKEN or PROFILER_ADMIN_TOKEN as a
+    bearer token, else a 401 response (404 when neither token is configured)."""
+    tokens = [t for t in (metrics.token, profiler.token) if t]
+    if not tokens:
+        abort(404)
+    supplied = request.headers.get("Authorization", "").encode()
+    if not any(hmac.compare_digest(supplied, f"Bearer {t}".encode()) for t in tokens):
+        return jsonify(message="Unauthorized"), 401
+    return None
+
+
+def _collapsed_response(entries):
+    return Response(profiler.collapsed(entries), mimetype="text/plain")
+
+
+@admin_bp.get("/profiles")
+def list_profiles():
+    route = request.args.get("route") or None
+    entries = sorted(profiler.entries(route), key=lambda e: e["id"], reverse=True)
+
+    if request.args.get("format") == "collapsed":
+        return _collapsed_response(entries)
+
+    return jsonify(
+        enabled=profiler.enabled,
+        profiles=[{k: v for k, v in e.items() if k != "stacks"} for e in entries],
+    ), 200
+
+
+@admin_bp.get("/profiles/<int:entry_id>")
+def get_profile_entry(entry_id):
+    entry = profiler.get(entry_id)
+    if entry is None:
+        return jsonify(message="Profile not found"), 404
+
+    if request.args.get("format") == "collapsed":
+        return _collapsed_response([entry])
+    return jsonify(entry), 200
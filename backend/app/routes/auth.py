@@ -8,15 +8,20 @@ from flask_jwt_extended import (
 )
 from datetime import datetime, timezone, timedelta
 from urllib.parse import quote
+from sqlalchemy import delete as sa_delete
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 import os, json
 import requests
 
 # -----------------------------------------------------------
 # Import app-specific modules for database and helpers
 # -----------------------------------------------------------
-from ..extensions import db
-from ..models import User, UserProfile, UserSite, ShippingInformation
+from ..extensions import db, upstream
+from ..models import User, UserProfile, UserSite, ShippingInformation, normalize_slug, dialect_insert
+from ..etags import conditional_on_user_version
+from ..db_routing import read_replica
+from .settings import clean_shipping
 from ..utils import make_verify_token, load_verify_token, send_mail, generate_reset_code
 
 # Helper: ensure value becomes a list of non-empty strings
@@ -33,6 +38,55 @@ def listify(v):
         return [x.strip() for x in s.split(",") if x.strip()]
     return [s]
 
+# -----------------------------------------------------------
+# Serializers shared by /me, /profile and /session/bootstrap
+# -----------------------------------------------------------
+def me_to_dict(user, profile):
+    first_name = getattr(profile, "first_name", None) if profile else None
+    last_name = getattr(profile, "last_name", None) if profile else None
+    job_title = getattr(profile, "job_title", None) if profile else None
+    avatar = getattr(profile, "profile_image", None) if profile else None  # adjust field name if different
+
+    # build a human-friendly display name
+    if first_name or last_name:
+        name = f"{first_name or ''}{(' ' + last_name) if last_name else ''}".strip()
+    else:
+        # fallback: if user has a name field, use it; otherwise use local part of email
+        name = getattr(user, "name", None) or (user.email.split("@")[0] if user.email else None)
+
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_verified": user.is_verified,
+        "first_name": first_name,
+        "last_name": last_name,
+        "name": name,
+        "job_title": job_title,
+        "avatar": avatar,
+    }
+
+
+def default_site_label(sites):
+    """Label of the default site, else of the most recently created one."""
+    if not sites:
+        return None
+    site = next((x for x in sites if x.is_default), None)
+    if site is None:
+        site = max(sites, key=lambda x: (x.created_at is not None, x.created_at, x.id))
+    return site.label or f"Amazon {site.site_slug}"
+
+
+def profile_to_dict(user, profile, sites):
+    return {
+        "id": user.id,
+        "email": user.email,
+        "first_name": profile.first_name,
+        "last_name": profile.last_name,
+        "job_title": profile.job_title,
+        "amazon_site": default_site_label(sites),
+        "other_accounts": profile.other_accounts,
+    }
+
 # -----------------------------------------------------------
 # Initialize a Blueprint for authentication-related routes
 # -----------------------------------------------------------
@@ -418,7 +472,9 @@ def setup_profile():
         first_name = profile.first_name if profile.first_name else data.get("first_name", "Unknown")
         last_name = profile.last_name if profile.last_name else data.get("last_name", "User")
         
-        # We process ALL new or existing amazon_sites for address lookup
+        # Look up the address for each site until one succeeds; the user has a
+        # single shipping row (user_id is unique), so the first address wins
+        # and is saved through the same upsert as the settings page.
         sites_to_process = normalized_sites # uses the cleaned, normalized sites from above
 
         for full_account_name in sites_to_process:
@@ -430,34 +486,25 @@ def setup_profile():
                     "last_name": last_name
                 }
                 
-                # 2. Construct the API URL (Using the provided environment variable pattern)
-                api_url = current_app.config.get("AMAZON_SITE_API_URL", "https://dtg-backend.onrender.com/")
-                fetch_address_url = api_url.rstrip('/') + "/api/fetch-address"
-                
-                # 3. Call the external API
-                response = requests.post(fetch_address_url, json=api_payload, timeout=5)
+                # 2. Call the external API through the shared pooled client
+                #    (timeouts, retries, circuit breaker and coalescing live
+                #    in app/upstream.py). The address belongs to the site, so
+                #    concurrent lookups for one site share a call whoever asks.
+                response = upstream.post(
+                    "fetch_address", "/api/fetch-address", json=api_payload,
+                    coalesce_key=(normalize_slug(full_account_name),),
+                )
                 response.raise_for_status() # Raises an HTTPError for bad responses (4xx or 5xx)
                 address_data = response.json()
                 
-                # 4. Insert the fetched address data into shipping_information table
-                # Assuming you have a ShippingInformation ORM Model defined
-                
+                # 3. Upsert the fetched address into shipping_information
                 # Prepare 'shipto' using first_name and last_name (fetched from profile/data)
                 shipto_name = f"{first_name} {last_name}".strip()
-                
-                new_shipping_info = ShippingInformation(
-                    user_id=uid,
-                    address1=s(address_data.get("address1")),
-                    address2=s(address_data.get("address2")),
-                    city=s(address_data.get("city")),
-                    state=s(address_data.get("state")),
-                    zip=s(address_data.get("zip")),
-                    country=s(address_data.get("country")),
-                    shipto=s(address_data.get("shipto") or shipto_name) # Use API's shipto or fallback
-                )
-                
-                db.session.add(new_shipping_info)
-                current_app.logger.info("Inserted shipping info for user %s and site %s", uid, full_account_name)
+
+                address = {**address_data, "shipto": address_data.get("shipto") or shipto_name}
+                ShippingInformation.upsert(uid, clean_shipping(address))
+                current_app.logger.info("Saved shipping info for user %s from site %s", uid, full_account_name)
+                break
 
             except requests.exceptions.RequestException as req_e:
                 # Log the API call error but continue processing other sites/profile sync
@@ -470,7 +517,7 @@ def setup_profile():
         
         # -----------------------------
         # Sync user_sites table from profile.amazon_site
-        # (Rest of the original sync logic remains unchanged)
+        # (lookups and dedupe go through the (user_id, slug_norm) index)
         # -----------------------------
         from sqlalchemy import text # Retained for context, though likely imported at top
         
@@ -505,65 +552,55 @@ def setup_profile():
                     continue
                 desired.append({"slug": slug, "label": full_label})
 
-            desired_slugs = [d["slug"] for d in desired]
+            # one row per normalized slug (matches the unique index)
+            by_norm = {}
+            for d in desired:
+                by_norm.setdefault(normalize_slug(d["slug"]), d)
+            desired_norms = list(by_norm)
 
             # If no desired sites: delete all existing for this user
-            if not desired_slugs:
+            if not desired_norms:
                 db.session.execute(text("DELETE FROM user_sites WHERE user_id = :uid"), {"uid": uid})
             else:
-                # Fetch existing rows for this user (id, site_slug)
-                existing = db.session.execute(
-                    text("SELECT id, site_slug FROM user_sites WHERE user_id = :uid"),
-                    {"uid": uid}
-                ).fetchall()
-                existing_by_slug = {row[1]: row[0] for row in existing if row[1] is not None}
-
-                # Delete rows removed by the user
-                to_delete = [s for s in existing_by_slug.keys() if s not in desired_slugs]
-                for slug in to_delete:
-                    db.session.execute(
-                        text("DELETE FROM user_sites WHERE user_id = :uid AND site_slug = :slug"),
-                        {"uid": uid, "slug": slug}
+                # Delete rows removed by the user (one statement)
+                db.session.execute(
+                    sa_delete(UserSite).where(
+                        UserSite.user_id == uid,
+                        UserSite.slug_norm.not_in(desired_norms),
                     )
+                )
 
                 # Clear existing defaults
                 db.session.execute(text("UPDATE user_sites SET is_default = false WHERE user_id = :uid"), {"uid": uid})
 
-                # Upsert desired rows (update else insert) — do NOT touch created_at/updated_at
-                for i, info in enumerate(desired):
-                    slug = info["slug"]
-                    label = info["label"]
-                    is_default = (i == 0)
-
-                    # Try update
-                    res = db.session.execute(
-                        text("""
-                            UPDATE user_sites
-                            SET label = :label, is_default = :is_default
-                            WHERE user_id = :uid AND site_slug = :slug
-                        """),
-                        {"label": label, "is_default": is_default, "uid": uid, "slug": slug}
-                    )
-
-                    # If no row updated, insert
-                    if (res.rowcount or 0) == 0:
-                        db.session.execute(
-                            text("""
-                                INSERT INTO user_sites (user_id, site_slug, label, is_default)
-                                VALUES (:uid, :slug, :label, :is_default)
-                            """),
-                            {"uid": uid, "slug": slug, "label": label, "is_default": is_default}
-                        )
+                # Upsert desired rows through the (user_id, slug_norm) index in
+                # one statement — do NOT touch created_at on existing rows
+                stmt = dialect_insert(UserSite).values([
+                    {
+                        "user_id": uid,
+                        "site_slug": info["slug"],
+                        "slug_norm": norm,
+                        "label": info["label"],
+                        "is_default": (i == 0),
+                    }
+                    for i, (norm, info) in enumerate(by_norm.items())
+                ])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["user_id", "slug_norm"],
+                    set_={"label": stmt.excluded.label, "is_default": stmt.excluded.is_default},
+                )
+                db.session.execute(stmt)
 
         except Exception:
             current_app.logger.exception(
-                "Failed to sync user_sites for user %s; desired=%s existing_slugs=%s",
-                uid, desired_slugs, list(existing_by_slug.keys()) if 'existing_by_slug' in locals() else None
+                "Failed to sync user_sites for user %s; desired=%s",
+                uid, desired_norms if 'desired_norms' in locals() else None
             )
 
         # -----------------------------
         # commit final transaction (includes profile updates, user updates, shipping_information inserts, and user_sites sync)
         # -----------------------------
+        User.bump_data_version(user.id)
         db.session.commit()
 
         return jsonify(
@@ -892,6 +929,7 @@ def session_logout():
 
 @auth_bp.get("/me")
 @jwt_required()
+@read_replica
 def me():
     ident = get_jwt_identity()
     try:
@@ -913,28 +951,7 @@ def me():
         # If you didn't create a UserProfile model, you can also query directly using raw SQL/DB session
         profile = None
 
-    first_name = getattr(profile, "first_name", None) if profile else None
-    last_name = getattr(profile, "last_name", None) if profile else None
-    job_title = getattr(profile, "job_title", None) if profile else None
-    avatar = getattr(profile, "profile_image", None) if profile else None  # adjust field name if different
-
-    # build a human-friendly display name
-    if first_name or last_name:
-        name = f"{first_name or ''}{(' ' + last_name) if last_name else ''}".strip()
-    else:
-        # fallback: if user has a name field, use it; otherwise use local part of email
-        name = getattr(user, "name", None) or (user.email.split("@")[0] if user.email else None)
-
-    payload = {
-        "id": user.id,
-        "email": user.email,
-        "is_verified": user.is_verified,
-        "first_name": first_name,
-        "last_name": last_name,
-        "name": name,
-        "job_title": job_title,
-        "avatar": avatar,
-    }
+    payload = me_to_dict(user, profile)
 
     return jsonify(payload), 200
 
@@ -943,9 +960,16 @@ def me():
 # -----------------------------------------------------------
 @auth_bp.get("/profile")
 @jwt_required()
+@read_replica
+@conditional_on_user_version("profile")
 def get_profile():
     user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    # user + profile in one joined SELECT, sites in one selectin SELECT
+    user = db.session.get(
+        User,
+        int(user_id),
+        options=[joinedload(User.profile), selectinload(User.sites)],
+    )
 
     if not user:
         return jsonify(message="User not found"), 404
@@ -954,26 +978,10 @@ def get_profile():
     if not profile:
         return jsonify(message="Profile not found"), 404
 
-    # Find default site from UserSite (normalized). Fallback to first site or empty string.
-    default_site = None
-    default_site_obj = user.sites.filter_by(is_default=True).first()
-    if not default_site_obj:
-        default_site_obj = user.sites.order_by(UserSite.created_at.desc()).first()
+    # Find default site from UserSite (normalized). Fallback to latest site or None.
+    sites = user.sites
 
-    if default_site_obj:
-        default_site = default_site_obj.label or f"Amazon {default_site_obj.site_slug}"
-    else:
-        default_site = None
-
-    return jsonify({
-        "id": user.id,
-        "email": user.email,
-        "first_name": profile.first_name,
-        "last_name": profile.last_name,
-        "job_title": profile.job_title,
-        "amazon_site": default_site,                 
-        "other_accounts": profile.other_accounts,
-    })
+    return jsonify(profile_to_dict(user, profile, sites))
 
 # -----------------------------------------------------------
 # Profile -  update action
@@ -1025,24 +1033,24 @@ def update_profile():
     try:
         # use a nested transaction to avoid "transaction already begun" error
         with db.session.begin_nested():
-            # Unset previous defaults
-            UserSite.query.filter_by(user_id=user.id, is_default=True).update({"is_default": False})
-
             # Find or create the selected site
-            site = UserSite.query.filter_by(user_id=user.id, site_slug=site_code).first()
+            site = UserSite.query.filter_by(user_id=user.id, slug_norm=normalize_slug(site_code)).first()
             if site:
                 site.label = full_label
-                site.is_default = True
-                db.session.add(site)
             else:
                 site = UserSite(
                     user_id=user.id,
                     site_slug=site_code,
                     label=full_label,
-                    is_default=True,
+                    is_default=False,
                     created_at=datetime.now(timezone.utc)
                 )
                 db.session.add(site)
+            db.session.flush()
+
+            # Move the default flag to it in one statement
+            UserSite.switch_default(user.id, site.id)
+            User.bump_data_version(user.id)
 
         db.session.commit()
 
@@ -1057,15 +1065,9 @@ def update_profile():
 
     # Optional: call third-party API to refresh related data
     api_data = None
-    api_base = current_app.config.get("AMAZON_SITE_API_URL")
-    if api_base:
+    if upstream.configured:
         try:
-            import requests
-            resp = requests.get(
-                f"{api_base.rstrip('/')}/api/dashboard",
-                params={"site_code": site_code},
-                timeout=8
-            )
+            resp = upstream.get("dashboard", "/api/dashboard", params={"site_code": site_code}, coalesce=True)
             if resp.ok:
                 try:
                     api_data = resp.json()
@@ -1092,6 +1094,8 @@ def update_profile():
 # ----------------------------------------------------------------------
 @auth_bp.get("/profile/sites")
 @jwt_required()
+@read_replica
+@conditional_on_user_version("profile-sites")
 def get_profile_sites():
     """
     Return the list of user_sites rows for the current user.
@@ -1107,12 +1111,8 @@ def get_profile_sites():
     if not user:
         return jsonify(message="User not found"), 404
 
-    # load sites via relationship (or query UserSite directly)
-    try:
-        rows = user.sites.order_by(UserSite.id.asc()).all()
-    except Exception:
-        # fallback query if relationship doesn't support order_by
-        rows = UserSite.query.filter_by(user_id=user.id).order_by(UserSite.id.asc()).all()
+    # ordered by id in SQL via the relationship's query API
+    rows = user.sites_query().order_by(UserSite.id.asc()).all()
 
     result = []
     for r in rows:
@@ -0,0 +1,247 @@
+# -----------------------------------------------------------
+# Server-side cart and quote draft
+#   GET   /api/cart/<cart|quote>          full cart + totals
+#   PATCH /api/cart/<cart|quote>          line-level diff:
+#     { "version": 3,
+#       "ops": [ {"op": "add", "partNumber": "INV-120-12V", "quantity": 2},
+#                {"op": "set_qty", "partNumber": "CORD-IEC-6FT", "quantity": 5},
+#                {"op": "remove", "partNumber": "CAB-DC-4PIN"},
+#                {"op": "clear"} ] }
+#   -> { version, totals, items: [changed lines], removed: [part numbers] }
+#   409 with the current cart when "version" is stale.
+# Prices are always taken from the catalog (PRODUCTS_BY_PART).
+# -----------------------------------------------------------
+from decimal import Decimal
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import delete as sa_delete, func, select, update
+from ..extensions import db
+from ..models import Cart, CartItem, dialect_insert
+from .products import PRODUCTS_BY_PART
+
+cart_bp = Blueprint("cart", __name__)
+
+CART_OPS = ("add", "remove", "set_qty", "clear")
+MAX_QTY = 9999
+
+
+# -----------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------
+def cart_item_to_dict(item: CartItem):
+    out = item.to_dict()
+    product = PRODUCTS_BY_PART.get(item.part_number) or {}
+    if product.get("image"):
+        out["image"] = product["image"]
+    return out
+
+
+def cart_totals(cart_id):
+    """Subtotal / counts in one aggregate query; tax and shipping as in the portal."""
+    subtotal, total_items, lines = db.session.execute(
+        select(
+            func.coalesce(func.sum(CartItem.unit_price * CartItem.quantity), 0),
+            func.coalesce(func.sum(CartItem.quantity), 0),
+            func.count(CartItem.id),
+        ).where(CartItem.cart_id == cart_id)
+    ).one() if cart_id else (0, 0, 0)
+
+    cfg = current_app.config
+    subtotal = Decimal(str(subtotal)).quantize(Decimal("0.01"))
+    tax = (subtotal * Decimal(str(cfg.get("CART_TAX_RATE", "0.08")))).quantize(Decimal("0.01"))
+    shipping = Decimal(str(cfg.get("CART_SHIPPING_FLAT", "9.99"))) if lines else Decimal("0.00")
+    return {
+        "lines": int(lines),
+        "total_items": int(total_items),
+        "subtotal": str(subtotal),
+        "tax": str(tax),
+        "shipping": str(shipping),
+        "total": str(subtotal + tax + shipping),
+    }
+
+
+def cart_to_dict(kind, cart):
+    items = [cart_item_to_dict(i) for i in cart.items] if cart else []
+    return {
+        "kind": kind,
+        "version": cart.version if cart else 0,
+        "items": items,
+        "totals": cart_totals(cart.id if cart else None),
+    }
+
+
+def _current_user_id():
+    try:
+        return int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None
+
+
+def _load_cart(user_id, kind):
+    return Cart.query.filter_by(user_id=user_id, kind=kind).first()
+
+
+def collapse_ops(ops):
+    """
+    Reduce the op list to one final action per part number:
+      ("set", qty) | ("add", delta) | ("remove", None)
+    Returns (actions, clear, errors).
+    """
+    actions, clear, errors = {}, False, {}
+    for i, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in CART_OPS:
+            errors[str(i)] = f"op must be one of {', '.join(CART_OPS)}"
+            continue
+        if kind == "clear":
+            clear, actions = True, {}
+            continue
+
+        part = str(op.get("partNumber") or "").strip()
+        if part not in PRODUCTS_BY_PART or PRODUCTS_BY_PART[part].get("archived"):
+            errors[str(i)] = f"unknown part number '{part}'"
+            continue
+        if kind == "remove":
+            actions[part] = ("remove", None)
+            continue
+
+        qty = op.get("quantity")
+        if not isinstance(qty, int) or isinstance(qty, bool):
+            errors[str(i)] = "quantity must be an integer"
+            continue
+
+        prev = actions.get(part)
+        if kind == "set_qty":
+            actions[part] = ("set", qty) if qty > 0 else ("remove", None)
+        elif qty <= 0:
+            errors[str(i)] = "add quantity must be positive"
+        elif prev is None:
+            # after a clear the part is known to be absent
+            actions[part] = ("set", qty) if clear else ("add", qty)
+        elif prev[0] == "add":
+            actions[part] = ("add", prev[1] + qty)
+        elif prev[0] == "set":
+            actions[part] = ("set", prev[1] + qty)
+        else:
+            actions[part] = ("set", qty)
+    return actions, clear, errors
+
+
+def _upsert_lines(cart_id, lines, additive):
+    values = [
+        {
+            "cart_id": cart_id,
+            "part_number": part,
+            "name": PRODUCTS_BY_PART[part]["name"],
+            "unit_price": Decimal(PRODUCTS_BY_PART[part]["price"]),
+            "quantity": min(qty, MAX_QTY),
+        }
+        for part, qty in lines.items()
+    ]
+    stmt = dialect_insert(CartItem).values(values)
+    quantity = stmt.excluded.quantity
+    if additive:
+        # two-argument min() is SQLite's LEAST()
+        least = func.min if db.engine.dialect.name == "sqlite" else func.least
+        quantity = least(CartItem.quantity + stmt.excluded.quantity, MAX_QTY)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["cart_id", "part_number"],
+        set_={"quantity": quantity, "unit_price": stmt.excluded.unit_price, "name": stmt.excluded.name},
+    )
+    db.session.execute(stmt)
+
+
+# -----------------------------------------------------------
+# GET /cart/<kind>
+# -----------------------------------------------------------
+@cart_bp.get("/<any(cart, quote):kind>")
+@jwt_required()
+def get_cart(kind):
+    user_id = _current_user_id()
+    if user_id is None:
+        return jsonify(message="Invalid token identity"), 401
+    return jsonify(cart_to_dict(kind, _load_cart(user_id, kind))), 200
+
+
+# -----------------------------------------------------------
+# PATCH /cart/<kind> — apply a diff against an expected version
+# One conditional UPDATE claims the version (and row-locks the cart
+# on Postgres), then at most one DELETE and two upserts apply it.
+# -----------------------------------------------------------
+@cart_bp.patch("/<any(cart, quote):kind>")
+@jwt_required()
+def patch_cart(kind):
+    user_id = _current_user_id()
+    if user_id is None:
+        return jsonify(message="Invalid token identity"), 401
+
+    payload = request.get_json(silent=True) or {}
+    ops = payload.get("ops")
+    expected = payload.get("version")
+    if not isinstance(ops, list) or not ops:
+        return jsonify(message="No ops provided"), 400
+    if not isinstance(expected, int) or isinstance(expected, bool):
+        return jsonify(message="version is required"), 400
+
+    actions, clear, errors = collapse_ops(ops)
+    if errors:
+        return jsonify(message="Validation failed", errors=errors), 422
+
+    try:
+        cart = _load_cart(user_id, kind)
+        if cart is None:
+            # first change: create at version 0 (a concurrent creator wins the race)
+            db.session.execute(
+                dialect_insert(Cart)
+                .values(user_id=user_id, kind=kind, version=0)
+                .on_conflict_do_nothing(index_elements=["user_id", "kind"])
+            )
+            cart = _load_cart(user_id, kind)
+
+        claimed = db.session.execute(
+            update(Cart)
+            .where(Cart.id == cart.id, Cart.version == expected)
+            .values(version=Cart.version + 1, updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return jsonify(message="Cart version conflict", cart=cart_to_dict(kind, _load_cart(user_id, kind))), 409
+
+        removed = [p for p, (a, _) in actions.items() if a == "remove"]
+        if clear:
+            db.session.execute(sa_delete(CartItem).where(CartItem.cart_id == cart.id))
+        elif removed:
+            db.session.execute(
+                sa_delete(CartItem).where(CartItem.cart_id == cart.id, CartItem.part_number.in_(removed))
+            )
+
+        sets = {p: q for p, (a, q) in actions.items() if a == "set"}
+        adds = {p: q for p, (a, q) in actions.items() if a == "add"}
+        if sets:
+            _upsert_lines(cart.id, sets, additive=False)
+        if adds:
+            _upsert_lines(cart.id, adds, additive=True)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("patch_cart error")
+        return jsonify(message="Failed to update cart"), 500
+
+    changed_parts = list(sets) + list(adds)
+    changed = []
+    if changed_parts:
+        changed = CartItem.query.filter(
+            CartItem.cart_id == cart.id, CartItem.part_number.in_(changed_parts)
+        ).order_by(CartItem.id).all()
+
+    return jsonify({
+        "kind": kind,
+        "version": expected + 1,
+        "cleared": clear,
+        "items": [cart_item_to_dict(i) for i in changed],
+        "removed": removed,
+        "totals": cart_totals(cart.id),
+    }), 200
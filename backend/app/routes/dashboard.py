@@ -0,0 +1,114 @@
+# -----------------------------------------------------------
+# Dashboard summary across all of a user's Amazon sites
+#   GET /api/dashboard/summary
+# One upstream /api/dashboard call per site, run concurrently under
+# one shared deadline (DASHBOARD_SUMMARY_DEADLINE), merged into
+# per-site results plus totals. Replaces switching the default site
+# (PUT /auth/profile) once per site just to read its numbers.
+# -----------------------------------------------------------
+from numbers import Number
+
+import requests
+from urllib3.exceptions import TimeoutError as Urllib3Timeout
+from flask import Blueprint, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..extensions import db, upstream
+from ..models import UserSite
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+
+# -----------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------
+def _is_timeout(exc):
+    # with retries exhausted requests wraps read timeouts in ConnectionError
+    if isinstance(exc, requests.exceptions.Timeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, Urllib3Timeout)
+
+
+def _site_result(site, result):
+    out = {
+        "site_slug": site.site_slug,
+        "label": site.label,
+        "is_default": bool(site.is_default),
+    }
+    if isinstance(result, Exception):
+        out["status"] = "timeout" if _is_timeout(result) else "error"
+        out["error"] = str(result) or type(result).__name__
+        return out
+
+    if not result.ok:
+        out["status"] = "error"
+        out["error"] = f"upstream returned {result.status_code}"
+        return out
+
+    try:
+        out["data"] = result.json()
+        out["status"] = "ok"
+    except ValueError:
+        out["status"] = "error"
+        out["error"] = "upstream returned invalid JSON"
+    return out
+
+
+def merge_totals(results):
+    """Sum the top-level numeric fields (order / quote counts etc.) of every ok site."""
+    totals = {}
+    for r in results:
+        data = r.get("data")
+        if r["status"] != "ok" or not isinstance(data, dict):
+            continue
+        for k, v in data.items():
+            if isinstance(v, Number) and not isinstance(v, bool):
+                totals[k] = totals.get(k, 0) + v
+    return totals
+
+
+# -----------------------------------------------------------
+# GET /dashboard/summary
+# -----------------------------------------------------------
+@dashboard_bp.get("/summary")
+@jwt_required()
+def dashboard_summary():
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify(message="Invalid token identity"), 401
+
+    sites = (
+        UserSite.query
+        .filter(UserSite.user_id == user_id)
+        .order_by(UserSite.created_at.asc(), UserSite.id.asc())
+        .all()
+    )
+    # release the DB connection before waiting on upstream
+    db.session.remove()
+
+    if not sites:
+        return jsonify(sites=[], totals={}, partial=False), 200
+
+    if not upstream.configured:
+        return jsonify(message="Dashboard service not configured"), 503
+
+    deadline = float(current_app.config.get("DASHBOARD_SUMMARY_DEADLINE", 6))
+    calls = {s.slug_norm: {"params": {"site_code": s.site_slug}} for s in sites}
+    raw = upstream.fan_out("dashboard", "GET", "/api/dashboard", calls, deadline=deadline, coalesce=True)
+
+    results = [_site_result(s, raw[s.slug_norm]) for s in sites]
+    failed = [r["site_slug"] for r in results if r["status"] != "ok"]
+    for r in results:
+        if r["status"] != "ok":
+            current_app.logger.warning("dashboard summary: site %s %s: %s", r["site_slug"], r["status"], r["error"])
+
+    body = {
+        "sites": results,
+        "totals": merge_totals(results),
+        "partial": bool(failed),
+        "failed": failed,
+    }
+    # every site failed: nothing useful to show
+    status = 502 if len(failed) == len(results) else 200
+    return jsonify(body), status
@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
+from ..json_provider import json_fragment
+from ..compression import cache_compressed
 
 # Create a blueprint for products routes
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
@@ -158,20 +160,32 @@ PRODUCTS_DATA = [
     }
 ]
 
+# Lookup by part number (server-side cart pricing / validation)
+PRODUCTS_BY_PART = {p['partNumber']: p for p in PRODUCTS_DATA}
+
+# The catalog is static per process: GET /api/products returns this
+# snapshot (timestamp = when it was taken), so the body is byte-identical
+# across requests and its gzip / brotli variants are cached
+CATALOG_SNAPSHOT_AT = datetime.utcnow().isoformat() + "Z"
+
 
 
 
 
 # Get all products
 @products_bp.route('', methods=['GET'])
+@cache_compressed
 def get_all_products():
     """
     Fetch all products
     Returns: JSON with all products (archived ones excluded by default)
     """
     try:
-        # Filter out archived products by default
-        active_products = [p for p in PRODUCTS_DATA if not p.get('archived', False)]
+        # Filter out archived products by default; the list is static,
+        # so it is encoded once and spliced into every response
+        active_products = json_fragment(
+            "products:active", lambda: [p for p in PRODUCTS_DATA if not p.get('archived', False)]
+        )
         
         response = {
             "success": True,
@@ -179,7 +193,7 @@ def get_all_products():
             "data": {
                 "products": active_products
             },
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": CATALOG_SNAPSHOT_AT
         }
         
         return jsonify(response), 200
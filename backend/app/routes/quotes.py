@@ -0,0 +1,84 @@
+# -----------------------------------------------------------
+# Quote PDFs through a disk cache
+#   GET /api/quotes/<name>/pdf
+# Miss: stream the upstream /api/get-quote-pdf body to the client
+#       in chunks while writing it to the cache.
+# Hit:  send the cached file (ETag / If-None-Match / Range / If-Range).
+# The cache key includes the mirrored quote's content_hash, so a
+# quote that changed upstream is fetched (and cached) again.
+# -----------------------------------------------------------
+from flask import Blueprint, Response, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
+from ..extensions import db, upstream, pdf_cache
+from ..models import Quote, UserSite
+
+quotes_bp = Blueprint("quotes", __name__)
+
+
+@quotes_bp.get("/<name>/pdf")
+@jwt_required()
+def quote_pdf(name):
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify(message="Invalid token identity"), 401
+
+    # the quote must be on one of the user's sites; its hash is the version
+    version = db.session.execute(
+        select(Quote.content_hash)
+        .where(
+            Quote.name == name,
+            Quote.site_norm.in_(select(UserSite.slug_norm).where(UserSite.user_id == user_id)),
+        )
+        .limit(1)
+    ).scalar()
+    if version is None:
+        return jsonify(message="Quote not found"), 404
+
+    key = pdf_cache.key(name, version)
+    download_name = "Quote-%s.pdf" % name.replace('"', "")
+
+    cached = pdf_cache.get(key)
+    if cached:
+        resp = send_file(
+            cached,
+            mimetype="application/pdf",
+            as_attachment=True,
+            download_name=download_name,
+            conditional=True,
+            etag=key,
+            max_age=0,
+        )
+        resp.headers["Cache-Control"] = "private, no-cache"
+        return resp
+
+    if not upstream.configured:
+        return jsonify(message="Quote PDF service not configured"), 503
+
+    try:
+        up = upstream.get("quote_pdf", "/api/get-quote-pdf", params={"quote_name": name}, stream=True)
+    except Exception:
+        current_app.logger.exception("quote pdf upstream error for %s", name)
+        return jsonify(message="Failed to fetch quote PDF"), 502
+
+    if up.status_code != 200 or "pdf" not in (up.headers.get("Content-Type") or "").lower():
+        current_app.logger.warning("quote pdf upstream returned %s (%s) for %s",
+                                   up.status_code, up.headers.get("Content-Type"), name)
+        up.close()
+        return jsonify(message="Failed to generate quote PDF"), 502
+
+    def body():
+        try:
+            yield from pdf_cache.tee(key, up.iter_content(chunk_size=pdf_cache.chunk_size))
+        finally:
+            up.close()
+
+    resp = Response(body(), mimetype="application/pdf", direct_passthrough=True)
+    # requests decodes Content-Encoding, so the upstream length only holds without it
+    if up.headers.get("Content-Length") and not up.headers.get("Content-Encoding"):
+        resp.headers["Content-Length"] = up.headers["Content-Length"]
+    resp.headers["Content-Disposition"] = f'attachment; filename="{download_name}"'
+    resp.headers["Cache-Control"] = "private, no-cache"
+    resp.set_etag(key)
+    return resp
@@ -0,0 +1,55 @@
+# -----------------------------------------------------------
+# Session bootstrap — everything the portal needs for first paint
+# (me, profile, sites, settings, shipping) in one response
+# -----------------------------------------------------------
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload, selectinload
+from ..extensions import db
+from ..models import User
+from ..etags import conditional_on_user_version
+from ..db_routing import read_replica
+from .auth import me_to_dict, profile_to_dict
+from .settings import settings_to_dict, shipping_to_dict
+from .user_sites import user_site_to_dict
+
+session_bp = Blueprint("session", __name__)
+
+
+# -----------------------------------------------------------
+# GET /session/bootstrap
+# User + profile + shipping come from one joined SELECT,
+# sites from one selectin SELECT; nothing is lazy-loaded afterwards.
+# -----------------------------------------------------------
+@session_bp.get("/bootstrap")
+@jwt_required()
+@read_replica
+@conditional_on_user_version("bootstrap")
+def bootstrap():
+    try:
+        user_id = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return jsonify(message="Invalid token identity"), 401
+
+    user = db.session.get(
+        User,
+        user_id,
+        options=[
+            joinedload(User.profile),
+            joinedload(User.shipping_information),
+            selectinload(User.sites),
+        ],
+    )
+    if not user:
+        return jsonify(message="User not found"), 404
+
+    sites = user.sites
+    profile = user.profile
+
+    return jsonify({
+        "me": me_to_dict(user, profile),
+        "profile": profile_to_dict(user, profile, sites) if profile else None,
+        "sites": [user_site_to_dict(s) for s in sites],
+        "settings": settings_to_dict(profile),
+        "shipping": shipping_to_dict(user.shipping_information),
+    }), 200
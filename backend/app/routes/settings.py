@@ -3,8 +3,11 @@
 # -----------------------------------------------------------
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
 from ..extensions import db
-from ..models import UserProfile, User, ShippingInformation
+from ..models import UserProfile, User, ShippingInformation, dialect_insert
+from ..etags import conditional_on_user_version
+from ..db_routing import read_replica
 
 # -----------------------------------------------------------
 # Create a Blueprint for all settings/profile-related endpoints
@@ -37,38 +40,51 @@ def clean_list(v):
     return [clean_str(x) for x in str(v).split(",") if str(x).strip()]
 
 
+# -----------------------------------------------------------
+# Serializers shared by settings routes and /session/bootstrap
+# -----------------------------------------------------------
+SHIPPING_FIELDS = ("address1", "address2", "city", "state", "zip", "country", "shipto")
+
+
+def settings_to_dict(profile):
+    return {
+        "first_name": getattr(profile, "first_name", None),
+        "last_name": getattr(profile, "last_name", None),
+        "job_title": getattr(profile, "job_title", None),
+        "amazon_site": getattr(profile, "amazon_site", None),
+        "other_accounts": getattr(profile, "other_accounts", []) or [],
+    }
+
+
+def shipping_to_dict(ship):
+    # missing row -> empty strings, frontend will call 3rd-party API itself
+    return {f: (getattr(ship, f, None) or "") for f in SHIPPING_FIELDS}
+
+
 # -----------------------------------------------------------
 # GET /settings — returns the logged-in user's saved settings
 # Requires JWT authentication (must be logged in)
 # -----------------------------------------------------------
 @settings_bp.get("/settings")
 @jwt_required()
+@read_replica
+@conditional_on_user_version("settings")
 def get_settings():
     user_id = get_jwt_identity()   # extract user ID from JWT token
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
-
-    # If profile doesn't exist yet, create a blank one
-    if not profile:
-        profile = UserProfile(user_id=user_id, other_accounts=[])
-        db.session.add(profile)
-        db.session.commit()
-
-    user = None
-    email = None
-    try:
-        user = User.query.get(user_id)
-        email = getattr(user, "email", None)
-    except Exception:
-        email = None    
+
+    # Read-only: one SELECT of the profile columns. A user without a
+    # profile row yet gets the defaults; rows are only created by writes.
+    profile = db.session.execute(
+        select(
+            UserProfile.first_name,
+            UserProfile.last_name,
+            UserProfile.job_title,
+            UserProfile.other_accounts,
+        ).where(UserProfile.user_id == user_id)
+    ).first()
 
     # Return user profile data as JSON (for frontend Settings form)
-    return jsonify({
-        "first_name": getattr(profile, "first_name", None),
-        "last_name": getattr(profile, "last_name", None),
-        "job_title": getattr(profile, "job_title", None),
-        "amazon_site": getattr(profile, "amazon_site", None),
-        "other_accounts": getattr(profile, "other_accounts", []) or [],
-    })
+    return jsonify(settings_to_dict(profile))
 
 # -----------------------------------------------------------
 # PUT /settings — updates the user's settings/profile fields
@@ -80,20 +96,18 @@ def update_settings():
     user_id = get_jwt_identity()
     data = request.get_json(silent=True) or {}   # safely parse JSON body
 
-    # Find or create the user's profile record
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
-    if not profile:
-        profile = UserProfile(user_id=user_id)
-
-    # Update all profile fields with sanitized values
-    profile.first_name      = clean_str(data.get("first_name"))
-    profile.last_name       = clean_str(data.get("last_name"))
-    profile.job_title       = clean_str(data.get("job_title"))
-    profile.amazon_site     = clean_str(data.get("amazon_site"))
-    profile.other_accounts  = clean_list(data.get("other_accounts"))
+    # Insert-or-update in one statement (no SELECT, no create race)
+    values = {
+        "first_name": clean_str(data.get("first_name")),
+        "last_name": clean_str(data.get("last_name")),
+        "job_title": clean_str(data.get("job_title")),
+        "other_accounts": clean_list(data.get("other_accounts")),
+    }
+    stmt = dialect_insert(UserProfile).values(user_id=int(user_id), **values)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=values))
 
     # Save changes to the database
-    db.session.add(profile)
+    User.bump_data_version(int(user_id))
     db.session.commit()
 
     # Respond with success message
@@ -108,61 +122,80 @@ def update_settings():
 # -----------------------------------------------------------
 @settings_bp.get("/settings/shipping")
 @jwt_required()
+@read_replica
+@conditional_on_user_version("shipping")
 def get_shipping():
     user_id = get_jwt_identity()
     ship = ShippingInformation.query.filter_by(user_id=user_id).first()
 
-    if not ship:
-        # return empty → frontend will call 3rd-party API itself
-        return jsonify({
-            "address1": "",
-            "address2": "",
-            "city": "",
-            "state": "",
-            "zip": "",
-            "country": "",
-            "shipto": ""
-        }), 200
-
-    return jsonify({
-        "address1": ship.address1 or "",
-        "address2": ship.address2 or "",
-        "city": ship.city or "",
-        "state": ship.state or "",
-        "zip": ship.zip or "",
-        "country": ship.country or "",
-        "shipto": ship.shipto or "",
-    })
+    # missing row → empty strings; frontend will call 3rd-party API itself
+    return jsonify(shipping_to_dict(ship)), 200
+
+
+# -----------------------------------------------------------
+# Shipping field -> max length (matches the column sizes)
+# -----------------------------------------------------------
+SHIPPING_MAXLEN = {
+    "address1": 255,
+    "address2": 255,
+    "city": 100,
+    "state": 100,
+    "zip": 20,
+    "country": 50,
+    "shipto": 255,
+}
+
+
+def clean_shipping(data, partial=False):
+    """Trimmed shipping values; with partial=True only the keys present in data."""
+    out = {}
+    for field, maxlen in SHIPPING_MAXLEN.items():
+        if partial and field not in data:
+            continue
+        value = data.get(field)
+        out[field] = "" if value is None else str(value).strip()[:maxlen]
+    return out
 
 
 # -----------------------------------------------------------
 # PUT /settings/shipping
-# Save or update shipping info for the user
+# Save or replace shipping info for the user (one upsert)
 # -----------------------------------------------------------
 @settings_bp.put("/settings/shipping")
 @jwt_required()
 def save_shipping():
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     data = request.get_json(silent=True) or {}
 
-    def cs(value, maxlen=255):
-        if value is None:
-            return ""
-        return str(value).strip()[:maxlen]
-
-    ship = ShippingInformation.query.filter_by(user_id=user_id).first()
-    if not ship:
-        ship = ShippingInformation(user_id=user_id)
-
-    ship.address1 = cs(data.get("address1"))
-    ship.address2 = cs(data.get("address2"))
-    ship.city = cs(data.get("city"), 100)
-    ship.state = cs(data.get("state"), 100)
-    ship.zip = cs(data.get("zip"), 20)
-    ship.country = cs(data.get("country"), 50)
-    ship.shipto = cs(data.get("shipto"))
-
-    db.session.add(ship)
+    ShippingInformation.upsert(user_id, clean_shipping(data))
+    User.bump_data_version(user_id)
     db.session.commit()
 
     return jsonify(message="Shipping information saved"), 200
+
+
+# -----------------------------------------------------------
+# PATCH /settings/shipping
+# Update only the fields sent, e.g. {"zip": "80216"}
+# -----------------------------------------------------------
+@settings_bp.patch("/settings/shipping")
+@jwt_required()
+def patch_shipping():
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(message="Invalid JSON body"), 400
+
+    unknown = sorted(k for k in data if k not in SHIPPING_MAXLEN)
+    if unknown:
+        return jsonify(message="Unknown shipping field(s): " + ", ".join(unknown)), 422
+
+    fields = clean_shipping(data, partial=True)
+    if not fields:
+        return jsonify(message="No shipping fields provided"), 400
+
+    ShippingInformation.upsert(user_id, fields)
+    User.bump_data_version(user_id)
+    db.session.commit()
+
+    return jsonify(message="Shipping information updated", updated=sorted(fields)), 200
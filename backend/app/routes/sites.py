@@ -0,0 +1,106 @@
+# -----------------------------------------------------------
+# Site directory routes (autocomplete) and CLI commands
+#   GET /api/sites/search?q=den&limit=10
+#   flask sites import sites.csv     (columns: slug,label,region)
+#   flask sites sync-user-sites      (add every slug users already have)
+# CLI changes reach running web workers when their index expires
+# (SITE_DIRECTORY_TTL); invalidate() only resets this process.
+# -----------------------------------------------------------
+import csv
+
+import click
+from flask import Blueprint, request, jsonify
+from ..extensions import db
+from ..models import Site, UserSite, normalize_slug, dialect_insert
+from ..site_directory import site_directory
+from .user_sites import extract_slug_and_label
+
+sites_bp = Blueprint("sites", __name__)
+
+
+# -----------------------------------------------------------
+# GET /sites/search — served from the in-memory prefix index
+# Accepts "den", "DEN2", "Amazon DEN2", "amazon den", "denver air":
+# the whole query is normalized (normalize_slug) and matched as a
+# prefix of slugs, labels and regions. Response is a list of labels,
+# or of {slug,label,region} objects with ?full=1.
+# -----------------------------------------------------------
+@sites_bp.get("/search")
+def search_sites():
+    q = (request.args.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), 50))
+    except ValueError:
+        limit = 10
+
+    prefix = normalize_slug(q)
+    if not prefix:
+        return jsonify([]), 200
+
+    hits = site_directory.search(prefix, limit)
+    if request.args.get("full"):
+        body = hits
+    else:
+        body = [h["label"] for h in hits]
+
+    resp = jsonify(body)
+    resp.headers["Cache-Control"] = "public, max-age=60"
+    return resp, 200
+
+
+# -----------------------------------------------------------
+# Upsert directory rows keyed on slug_norm
+# -----------------------------------------------------------
+def _upsert_sites(rows, overwrite=True):
+    values = {}
+    for r in rows:
+        slug, label = extract_slug_and_label(r.get("slug") or "", r.get("label"))
+        norm = normalize_slug(slug)
+        if not norm:
+            continue
+        values[norm] = {
+            "slug": slug,
+            "slug_norm": norm,
+            "label": label or f"Amazon {slug}",
+            "region": (r.get("region") or "").strip() or None,
+        }
+    if not values:
+        return 0
+
+    stmt = dialect_insert(Site).values(list(values.values()))
+    if overwrite:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["slug_norm"],
+            set_={"label": stmt.excluded.label, "region": stmt.excluded.region},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=["slug_norm"])
+    db.session.execute(stmt)
+    db.session.commit()
+    # this process only; web workers reload after SITE_DIRECTORY_TTL
+    site_directory.invalidate()
+    return len(values)
+
+
+@sites_bp.cli.command("import")
+@click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+def import_sites(csv_path):
+    """Load/refresh the site directory from a CSV (slug,label,region)."""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        count = _upsert_sites(csv.DictReader(f))
+    click.echo(f"Upserted {count} site(s)")
+
+
+@sites_bp.cli.command("sync-user-sites")
+def sync_user_sites():
+    """Add every site users already have in user_sites to the directory."""
+    # slugs only: UserSite.label is free text typed by a user and the
+    # directory is served publicly, so new entries get "Amazon <slug>"
+    slugs = (
+        db.session.query(db.func.max(UserSite.site_slug))
+        .group_by(UserSite.slug_norm)
+        .all()
+    )
+    # keep curated label/region of sites already in the directory
+    count = _upsert_sites(({"slug": slug} for (slug,) in slugs), overwrite=False)
+    click.echo(f"Processed {count} site(s)")
@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from sqlalchemy import delete as sa_delete, or_, select
 from ..extensions import db
-from ..models import User, UserSite
-from typing import List, Dict
+from ..models import User, UserSite, normalize_slug, dialect_insert
+from ..etags import conditional_on_user_version
+from ..db_routing import read_replica
+from typing import Dict
 import re
 
 bp = Blueprint("user_sites", __name__)
@@ -12,14 +14,8 @@ bp = Blueprint("user_sites", __name__)
 # Helpers
 # ------------------------------------------------------------
 
-def normalize_slug(raw: str) -> str:
-    if not raw:
-        return ""
-    s = str(raw).lower().strip()
-    if s.startswith("amazon"):
-        s = s[len("amazon"):].lstrip(":-_ .")
-    s = "".join(ch if (ch.isalnum() or ch in "-_.") else " " for ch in s)
-    return " ".join(s.split()).strip()
+_WHITESPACE_RE = re.compile(r"\s")
+_TRAILING_CODE_RE = re.compile(r"([A-Za-z0-9\-_.]+)$")
 
 def extract_slug_and_label(raw_value: str, explicit_label: str | None):
     """
@@ -30,11 +26,11 @@ def extract_slug_and_label(raw_value: str, explicit_label: str | None):
     val = (raw_value or "").strip()
     lbl = (explicit_label or "").strip()
 
-    looks_like_label = bool(re.search(r"\s", val)) or val.lower().startswith("amazon")
+    looks_like_label = bool(_WHITESPACE_RE.search(val)) or val.lower().startswith("amazon")
 
     if looks_like_label and not lbl:
         lbl = val
-        m = re.search(r"([A-Za-z0-9\-_.]+)$", val)
+        m = _TRAILING_CODE_RE.search(val)
         slug = m.group(1) if m else val
     else:
         slug = val
@@ -42,6 +38,68 @@ def extract_slug_and_label(raw_value: str, explicit_label: str | None):
     return slug.strip(), (lbl or None)
 
 
+def site_item_error(item: Dict) -> str | None:
+    """Type check of the free-text fields of one request item."""
+    for field in ("site_slug", "label"):
+        value = item.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"{field} must be a string"
+    return None
+
+
+def normalize_site_items(items) -> Dict[str, Dict]:
+    """
+    Build {slug_norm: {"site_slug", "label"}} from request items
+    (extract slug + label properly, drop empties and duplicates).
+    """
+    normalized_in = {}
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        raw_val = (it.get("site_slug") or "").strip()
+        if not raw_val:
+            continue
+
+        explicit_label = it.get("label")
+        slug, label = extract_slug_and_label(raw_val, explicit_label)
+        normalized_key = normalize_slug(slug)
+
+        if not normalized_key:
+            continue
+        if normalized_key in normalized_in:
+            continue
+
+        normalized_in[normalized_key] = {
+            "site_slug": slug,   # short code only
+            "label": label       # full label if provided
+        }
+    return normalized_in
+
+
+def insert_sites(user_id: int, normalized_in: Dict[str, Dict]):
+    """
+    Dedupe against existing rows in the DB via the unique
+    (user_id, slug_norm) index; RETURNING gives back only the
+    rows actually inserted, so no per-row refresh is needed.
+    """
+    stmt = (
+        dialect_insert(UserSite)
+        .values([
+            {
+                "user_id": user_id,
+                "site_slug": raw["site_slug"],
+                "slug_norm": n,
+                "label": raw.get("label"),
+                "is_default": False,
+            }
+            for n, raw in normalized_in.items()
+        ])
+        .on_conflict_do_nothing(index_elements=["user_id", "slug_norm"])
+        .returning(*UserSite.__table__.c)
+    )
+    return sorted(db.session.execute(stmt).all(), key=lambda r: r.id)
+
+
 def get_current_user():
     ident = get_jwt_identity()
     try:
@@ -58,7 +116,7 @@ def user_site_to_dict(site: UserSite) -> Dict:
         "label": site.label,
         "address": getattr(site, "address", None),
         "is_default": bool(site.is_default),
-        "created_at": site.created_at.isoformat() if getattr(site, "created_at", None) else None,
+        "created_at": getattr(site, "created_at", None),  # ISO 8601 via the JSON provider
     }
 
 # ------------------------------------------------------------
@@ -67,13 +125,15 @@ def user_site_to_dict(site: UserSite) -> Dict:
 
 @bp.get("/sites")
 @jwt_required()
+@read_replica
+@conditional_on_user_version("sites")
 def list_user_sites():
     user = get_current_user()
     if not user:
         return jsonify(message="Invalid token identity"), 401
 
     try:
-        rows = user.sites.order_by(UserSite.created_at.asc()).all()
+        rows = user.sites_query().order_by(UserSite.created_at.asc(), UserSite.id.asc()).all()
         return jsonify([user_site_to_dict(r) for r in rows]), 200
     except Exception as e:
         current_app.logger.exception("Error fetching user sites")
@@ -93,67 +153,153 @@ def create_sites():
     if not isinstance(items, list) or len(items) == 0:
         return jsonify(message="No sites provided"), 400
 
+    errors = {}
+    for i, it in enumerate(items):
+        err = site_item_error(it) if isinstance(it, dict) else None
+        if err:
+            errors[str(i)] = err
+    if errors:
+        return jsonify(message="Validation failed", errors=errors), 422
+
     user = get_current_user()
     if not user:
         return jsonify(message="Invalid token identity"), 401
 
-    normalized_in = {}
+    normalized_in = normalize_site_items(items)
+    if not normalized_in:
+        return jsonify([]), 200
+
+    try:
+        rows = insert_sites(user.id, normalized_in)
+        if rows:
+            User.bump_data_version(user.id)
+        db.session.commit()
+
+        if not rows:
+            return jsonify([]), 200
+
+        created = [user_site_to_dict(r) for r in rows]
+        return jsonify(created), 201
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("create_sites error")
+        return jsonify(message="internal_server_error", detail=str(e)), 500
+
+
+# ------------------------------------------------------------
+# PATCH /sites  (Bulk add / remove / set-default)
+# Body: { "operations": [
+#           {"op": "add", "site_slug": "Amazon DEN2", "label": "..."},
+#           {"op": "remove", "id": 12}  |  {"op": "remove", "site_slug": "CTZ"},
+#           {"op": "set_default", "id": 7} | {"op": "set_default", "site_slug": "DEN2"}
+#       ] }
+# Validated up front, then applied in one transaction with one
+# set-based statement per kind:
+# DELETE (all removes) -> INSERT ... ON CONFLICT (all adds) -> one
+# default switch (last set_default wins). Returns the resulting list.
+# ------------------------------------------------------------
+
+BULK_OPS = ("add", "remove", "set_default")
+
+@bp.patch("/sites")
+@jwt_required()
+def bulk_update_sites():
+    payload = request.get_json(silent=True) or {}
+    ops = payload.get("operations")
+
+    if not isinstance(ops, list) or len(ops) == 0:
+        return jsonify(message="No operations provided"), 400
+
+    user = get_current_user()
+    if not user:
+        return jsonify(message="Invalid token identity"), 401
+
+    adds, remove_ids, remove_norms = [], set(), set()
+    default_ref = None
+    errors = {}
 
     # --------------------------------------------------------
-    # Build normalized list (extract slug + label properly)
+    # Validate everything before touching the DB
     # --------------------------------------------------------
-    for it in items:
-        raw_val = (it.get("site_slug") or "").strip()
-        if not raw_val:
+    for i, op in enumerate(ops):
+        kind = op.get("op") if isinstance(op, dict) else None
+        if kind not in BULK_OPS:
+            errors[str(i)] = f"op must be one of {', '.join(BULK_OPS)}"
+            continue
+        err = site_item_error(op)
+        if err:
+            errors[str(i)] = err
             continue
 
-        explicit_label = it.get("label")
-        slug, label = extract_slug_and_label(raw_val, explicit_label)
-        normalized_key = normalize_slug(slug)
+        if kind == "add":
+            if not (op.get("site_slug") or "").strip():
+                errors[str(i)] = "site_slug is required"
+                continue
+            adds.append(op)
+            continue
 
-        if not normalized_key:
+        ref_id, ref_norm = op.get("id"), None
+        if ref_id is None:
+            slug, _ = extract_slug_and_label(op.get("site_slug") or "", None)
+            ref_norm = normalize_slug(slug)
+        if ref_id is not None and (not isinstance(ref_id, int) or isinstance(ref_id, bool)):
+            errors[str(i)] = "id must be an integer"
             continue
-        if normalized_key in normalized_in:
+        if ref_id is None and not ref_norm:
+            errors[str(i)] = "id (int) or site_slug is required"
             continue
 
-        normalized_in[normalized_key] = {
-            "site_slug": slug,   # short code only
-            "label": label       # full label if provided
-        }
+        if kind == "remove":
+            if ref_id is not None:
+                remove_ids.add(ref_id)
+            else:
+                remove_norms.add(ref_norm)
+        else:
+            default_ref = (ref_id, ref_norm)
 
-    if not normalized_in:
-        return jsonify([]), 200
+    if errors:
+        return jsonify(message="Validation failed", errors=errors), 422
 
     try:
-        existing_rows = db.session.query(UserSite.site_slug).filter(UserSite.user_id == user.id).all()
-        existing_norm = set(normalize_slug(r[0]) for r in existing_rows if r[0])
-
-        to_create: List[UserSite] = []
-        for n, raw in normalized_in.items():
-            if n in existing_norm:
-                continue
-            us = UserSite(
-                user_id=user.id,
-                site_slug=raw["site_slug"],
-                label=raw.get("label"),
-                is_default=False
+        if remove_ids or remove_norms:
+            db.session.execute(
+                sa_delete(UserSite)
+                .where(
+                    UserSite.user_id == user.id,
+                    or_(UserSite.id.in_(remove_ids), UserSite.slug_norm.in_(remove_norms)),
+                )
+                .execution_options(synchronize_session=False)
             )
-            to_create.append(us)
-
-        if not to_create:
-            return jsonify([]), 200
 
-        with db.session.begin_nested():
-            db.session.add_all(to_create)
+        normalized_in = normalize_site_items(adds)
+        if normalized_in:
+            insert_sites(user.id, normalized_in)
+
+        if default_ref is not None:
+            ref_id, ref_norm = default_ref
+            if ref_id is None:
+                ref_id = db.session.execute(
+                    select(UserSite.id).where(
+                        UserSite.user_id == user.id, UserSite.slug_norm == ref_norm
+                    )
+                ).scalar()
+            if ref_id is None or not UserSite.switch_default(user.id, ref_id):
+                raise LookupError("set_default target not found")
+
+        User.bump_data_version(user.id)
         db.session.commit()
 
-        created = [user_site_to_dict(r) for r in to_create]
-        return jsonify(created), 201
-
-    except Exception as e:
+    except LookupError:
         db.session.rollback()
-        current_app.logger.exception("create_sites error")
-        return jsonify(message="internal_server_error", detail=str(e)), 500
+        return jsonify(message="Site not found for set_default"), 404
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("bulk_update_sites error")
+        return jsonify(message="Failed to update sites"), 500
+
+    rows = user.sites_query().order_by(UserSite.created_at.asc(), UserSite.id.asc()).all()
+    return jsonify([user_site_to_dict(r) for r in rows]), 200
 
 
 # ------------------------------------------------------------
@@ -167,20 +313,13 @@ def set_default(site_id):
     if not user:
         return jsonify(message="Invalid token identity"), 401
 
-    target = UserSite.query.filter_by(id=site_id, user_id=user.id).first()
-    if not target:
-        return jsonify(message="Site not found"), 404
-
     try:
-        with db.session.begin_nested():
-            db.session.query(UserSite).filter(
-                UserSite.user_id == user.id,
-                UserSite.is_default == True
-            ).update({"is_default": False})
-
-            target.is_default = True
-            db.session.add(target)
+        # ownership check + switch in one UPDATE (see UserSite.switch_default)
+        if not UserSite.switch_default(user.id, site_id):
+            db.session.rollback()
+            return jsonify(message="Site not found"), 404
 
+        User.bump_data_version(user.id)
         db.session.commit()
         return jsonify(ok=True), 200
 
@@ -208,6 +347,7 @@ def delete_site(site_id):
 
     try:
         db.session.delete(target)
+        User.bump_data_version(user.id)
         db.session.commit()
         return "", 204
 
@@ -0,0 +1,209 @@
+# app/singleflight.py
+
+# -----------------------------------------------------------
+# Single-flight request coalescing
+# Concurrent callers asking for the same key share one call to
+# `fn` and its result (or exception) instead of each doing it.
+#
+# - within a worker: threads wait on the leader's Event
+# - across workers (optional): leaders serialize on a lock file
+#   per key and reuse the result the first worker wrote there
+#   (files are 0600; expired results and idle lock files are
+#   deleted by a sweep at most every SWEEP_INTERVAL seconds)
+# -----------------------------------------------------------
+import hashlib
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+SWEEP_INTERVAL = 30.0
+# lock files untouched this long are removed (seconds)
+LOCK_IDLE_SECONDS = 300.0
+
+
+class SingleFlightTimeout(TimeoutError):
+    pass
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    sf = SingleFlight()
+    value = sf.do(key, fn, timeout=5)
+
+    Cross-worker sharing is enabled with `lock_dir`; `do()` then also
+    needs `dumps`/`loads` to write/read the leader's result as bytes.
+    Results written to disk are reused for `result_ttl` seconds, then deleted.
+    """
+
+    def __init__(self, lock_dir: str | None = None, result_ttl: float = 2.0):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.lock_dir = None
+        self.result_ttl = float(result_ttl)
+        self._last_sweep = 0.0
+        self.configure(lock_dir, result_ttl)
+
+    def configure(self, lock_dir: str | None = None, result_ttl: float | None = None):
+        if result_ttl is not None:
+            self.result_ttl = float(result_ttl)
+        self.lock_dir = lock_dir if (lock_dir and fcntl is not None) else None
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+
+    # -----------------------------------------------------------
+    # Thread-level coalescing
+    # -----------------------------------------------------------
+    def do(self, key, fn, timeout: float | None = None, dumps=None, loads=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise SingleFlightTimeout(f"Timed out waiting for in-flight call {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.lock_dir and dumps is not None and loads is not None:
+                call.result = self._do_across_workers(key, fn, timeout, dumps, loads)
+            else:
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    # -----------------------------------------------------------
+    # Worker-level coalescing through a per-key lock file
+    # -----------------------------------------------------------
+    def _do_across_workers(self, key, fn, timeout, dumps, loads):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        lock_path = os.path.join(self.lock_dir, f"{digest}.lock")
+        result_path = os.path.join(self.lock_dir, f"{digest}.result")
+
+        self._maybe_sweep()
+
+        cached = self._read_fresh(result_path, loads)
+        if cached is not None:
+            return cached
+
+        with os.fdopen(os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600), "r+b") as lock_file:
+            self._acquire(lock_file, timeout, key)
+            try:
+                os.utime(lock_file.fileno())  # last use, for the idle-lock sweep
+                # another worker may have finished while we waited
+                cached = self._read_fresh(result_path, loads)
+                if cached is not None:
+                    return cached
+
+                result = fn()
+                data = dumps(result)
+                if data is not None:
+                    # upstream bodies (addresses, ...): owner-only
+                    tmp_path = f"{result_path}.{os.getpid()}.tmp"
+                    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(data)
+                    os.replace(tmp_path, result_path)
+                return result
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _acquire(lock_file, timeout, key):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise SingleFlightTimeout(f"Timed out waiting for worker lock {key!r}")
+                time.sleep(0.01)
+
+    def _read_fresh(self, path, loads):
+        try:
+            if time.time() - os.path.getmtime(path) > self.result_ttl:
+                return None
+            with open(path, "rb") as f:
+                return loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    # -----------------------------------------------------------
+    # Sweep: expired results, leftover temp files, idle lock files
+    # -----------------------------------------------------------
+    def _maybe_sweep(self):
+        now = time.monotonic()
+        if now - self._last_sweep < SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        self.sweep()
+
+    def sweep(self):
+        if not self.lock_dir:
+            return
+        now = time.time()
+        for entry in os.scandir(self.lock_dir):
+            try:
+                age = now - entry.stat().st_mtime
+            except OSError:
+                continue
+            name = entry.name
+            if name.endswith(".result"):
+                if age > self.result_ttl:
+                    _unlink(entry.path)
+            elif name.endswith(".tmp"):
+                if age > SWEEP_INTERVAL:
+                    _unlink(entry.path)
+            elif name.endswith(".lock") and age > LOCK_IDLE_SECONDS:
+                self._unlink_idle_lock(entry.path)
+
+    @staticmethod
+    def _unlink_idle_lock(path):
+        # only when nobody holds it; a waiter that opened the file before
+        # the unlink can at worst lead one duplicate call, never a wrong result
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        try:
+            _unlink(path)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,84 @@
+# app/site_directory.py
+
+# -----------------------------------------------------------
+# In-memory prefix index over the `sites` directory table
+# - one sorted list of (key, entry) per worker, searched with bisect
+# - keys: normalized slug ("den2"), normalized label and region
+# - reloaded from the DB at most every SITE_DIRECTORY_TTL seconds,
+#   never per keystroke; invalidate() forces a reload in this process
+#   only (other workers see CLI imports once their TTL runs out)
+# -----------------------------------------------------------
+import bisect
+import threading
+import time
+
+from .models import Site, normalize_slug
+
+
+class SiteDirectory:
+    def __init__(self, app=None):
+        self.ttl = 300.0
+        # (sorted search keys, entry dict for each key) swapped as one
+        # tuple so readers never see keys and entries from different loads
+        self._index = ((), ())
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get("SITE_DIRECTORY_TTL", 300))
+        self.invalidate()
+        app.extensions["site_directory"] = self
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    # -----------------------------------------------------------
+    # Build the index (needs an app context for the DB read)
+    # -----------------------------------------------------------
+    def load(self):
+        rows = Site.query.order_by(Site.slug_norm.asc()).all()
+        pairs = []
+        for site in rows:
+            entry = site.to_dict()
+            keys = {site.slug_norm, normalize_slug(entry["label"])}
+            if site.region:
+                keys.add(normalize_slug(site.region))
+            pairs.extend((k, entry) for k in keys if k)
+        pairs.sort(key=lambda p: p[0])
+
+        self._index = (tuple(k for k, _ in pairs), tuple(e for _, e in pairs))
+        self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self.load()
+
+    # -----------------------------------------------------------
+    # Prefix search on an already-normalized key
+    # -----------------------------------------------------------
+    def search(self, prefix: str, limit: int = 10):
+        self._ensure_fresh()
+        keys, entries = self._index
+
+        lo = bisect.bisect_left(keys, prefix)
+        hi = bisect.bisect_left(keys, prefix + "\uffff", lo)
+
+        out, seen = [], set()
+        for i in range(lo, hi):
+            entry = entries[i]
+            if id(entry) in seen:
+                continue
+            seen.add(id(entry))
+            out.append(entry)
+            if len(out) >= limit:
+                break
+        return out
+
+
+site_directory = SiteDirectory()
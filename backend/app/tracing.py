@@ -0,0 +1,341 @@
+# app/tracing.py
+
+# -----------------------------------------------------------
+# Lightweight request tracing (TRACING_ENABLED)
+# - trace id from the incoming W3C `traceparent`, else from
+#   X-Trace-Id / X-Request-Id / X-Vercel-Id (hashed to 32 hex), else new
+# - sampled by TRACING_SAMPLE_RATE; the caller's sampled flag is
+#   followed only for peers in TRACING_TRUSTED_PARENTS (IPs / CIDRs),
+#   so an outside client cannot force every request to be traced
+# - one SERVER span per request; child spans for every SQL statement
+#   (cursor events), upstream HTTP call (app/upstream.py, which also
+#   forwards `traceparent`), send_mail and verify-token decoding
+# - the current span lives in a ContextVar, so upstream fan-out
+#   threads (run under copy_context) attach to the request's trace
+# - finished traces are exported off the request path as OTLP/JSON:
+#   one line per trace in TRACING_FILE and/or POSTed to
+#   TRACING_OTLP_ENDPOINT (e.g. http://localhost:4318/v1/traces)
+# - responses carry `traceparent` and X-Trace-Id
+# -----------------------------------------------------------
+import contextvars
+import hashlib
+import ipaddress
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from flask import request
+from sqlalchemy import event
+
+SPAN_INTERNAL, SPAN_SERVER, SPAN_CLIENT = 1, 2, 3
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_ID_HEADERS = ("X-Trace-Id", "X-Request-Id", "X-Vercel-Id")
+
+# (Trace, current Span) for the running request, or None
+_current = contextvars.ContextVar("trace_current", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start", "end", "attrs", "error", "trace")
+
+    def __init__(self, trace, name, kind, parent_id, attrs):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = None
+        self.attrs = attrs
+        self.error = None
+
+    def set(self, key, value):
+        self.attrs[key] = value
+
+    def to_otlp(self):
+        out = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end or time.time_ns()),
+            "attributes": [_otlp_attr(k, v) for k, v in self.attrs.items() if v is not None],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 0},
+        }
+        if self.parent_id:
+            out["parentSpanId"] = self.parent_id
+        return out
+
+
+def _otlp_attr(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# -----------------------------------------------------------
+# Span API (no-ops when the current request is not traced)
+# -----------------------------------------------------------
+def start_span(name, kind=SPAN_INTERNAL, **attrs):
+    cur = _current.get()
+    if cur is None:
+        return None
+    trace, parent = cur
+    return Span(trace, name, kind, parent.span_id if parent else None, attrs)
+
+
+def finish_span(span, error=None):
+    if span is None:
+        return
+    span.end = time.time_ns()
+    if error is not None:
+        span.error = repr(error)[:300]
+    span.trace.spans.append(span)
+
+
+@contextmanager
+def span(name, kind=SPAN_INTERNAL, **attrs):
+    s = start_span(name, kind, **attrs)
+    if s is None:
+        yield None
+        return
+    token = _current.set((s.trace, s))
+    try:
+        yield s
+    except BaseException as e:
+        s.error = repr(e)[:300]
+        raise
+    finally:
+        _current.reset(token)
+        finish_span(s)
+
+
+def traceparent():
+    """W3C traceparent for an outgoing call from the current span (or None)."""
+    cur = _current.get()
+    if cur is None or cur[1] is None:
+        return None
+    trace, parent = cur
+    return f"00-{trace.trace_id}-{parent.span_id}-01"
+
+
+def current_trace_id():
+    cur = _current.get()
+    return cur[0].trace_id if cur else None
+
+
+# -----------------------------------------------------------
+# Exporter: background thread, bounded queue (drops when full)
+# -----------------------------------------------------------
+class _Exporter:
+    def __init__(self, file_path, otlp_endpoint, service_name, logger):
+        self.file_path = file_path
+        self.otlp_endpoint = otlp_endpoint
+        self.service_name = service_name
+        self.logger = logger
+        self.queue = queue.Queue(maxsize=1000)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, spans):
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                    self._pid = os.getpid()
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def payload(self, spans):
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    _otlp_attr("service.name", self.service_name),
+                    _otlp_attr("process.pid", os.getpid()),
+                ]},
+                "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": [s.to_otlp() for s in spans]}],
+            }]
+        }
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < 50:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._export(batch)
+            except Exception:
+                self.logger.exception("trace export failed")
+
+    def _export(self, batch):
+        if self.file_path:
+            lines = "".join(json.dumps(self.payload(spans), separators=(",", ":")) + "\n" for spans in batch)
+            with open(self.file_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        if self.otlp_endpoint:
+            body = self.payload([s for spans in batch for s in spans])
+            requests.post(self.otlp_endpoint, json=body, timeout=2)
+
+
+# -----------------------------------------------------------
+# Flask integration
+# -----------------------------------------------------------
+class Tracer:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.sample_rate = 1.0
+        self.trusted_parents = ()
+        self._exporter = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("TRACING_ENABLED", False))
+        self.sample_rate = float(app.config.get("TRACING_SAMPLE_RATE", 1.0))
+        self.trusted_parents = tuple(
+            ipaddress.ip_network(n.strip(), strict=False)
+            for n in (app.config.get("TRACING_TRUSTED_PARENTS") or "").split(",")
+            if n.strip()
+        )
+        app.extensions["tracer"] = self
+        if not self.enabled:
+            return
+
+        file_path = app.config.get("TRACING_FILE") or ""
+        otlp_endpoint = app.config.get("TRACING_OTLP_ENDPOINT") or ""
+        if not file_path and not otlp_endpoint:
+            file_path = os.path.join(app.instance_path, "traces.jsonl")
+        if file_path:
+            os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        self._exporter = _Exporter(
+            file_path, otlp_endpoint, app.config.get("TRACING_SERVICE_NAME", "dtg-api"), app.logger,
+        )
+
+        from .extensions import db
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+                event.listen(engine, "handle_error", _handle_error)
+
+        app.before_request(self._start)
+        app.after_request(self._headers)
+        app.teardown_request(self._finish)
+
+    @staticmethod
+    def _incoming_context():
+        """(trace id, parent span id, sampled flag or None)"""
+        m = _TRACEPARENT_RE.match((request.headers.get("traceparent") or "").strip().lower())
+        if m and m.group(1) != "0" * 32:
+            return m.group(1), m.group(2), m.group(3) == "01"
+        for header in _ID_HEADERS:
+            value = (request.headers.get(header) or "").strip()
+            if value:
+                if re.fullmatch(r"[0-9a-fA-F]{32}", value):
+                    return value.lower(), None, None
+                return hashlib.md5(value.encode("utf-8")).hexdigest(), None, None
+        return os.urandom(16).hex(), None, None
+
+    def _trusted_parent(self) -> bool:
+        if not self.trusted_parents:
+            return False
+        try:
+            addr = ipaddress.ip_address(request.remote_addr or "")
+        except ValueError:
+            return False
+        return any(addr in net for net in self.trusted_parents)
+
+    def _start(self):
+        trace_id, parent_id, sampled = self._incoming_context()
+        if sampled is None or not self._trusted_parent():
+            # the trace id is kept either way; only the decision is local
+            sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if not sampled:
+            _current.set(None)
+            return
+
+        trace = Trace(trace_id)
+        root = Span(trace, f"{request.method} {request.path}", SPAN_SERVER, parent_id, {
+            "http.method": request.method,
+            "http.target": request.full_path.rstrip("?"),
+            "http.route": request.url_rule.rule if request.url_rule else None,
+            "http.request_id": request.headers.get("X-Request-Id"),
+        })
+        _current.set((trace, root))
+
+    def _headers(self, response):
+        cur = _current.get()
+        if cur is not None:
+            trace, root = cur
+            root.set("http.status_code", response.status_code)
+            response.headers["X-Trace-Id"] = trace.trace_id
+            response.headers["traceparent"] = f"00-{trace.trace_id}-{root.span_id}-01"
+        return response
+
+    def _finish(self, exc=None):
+        cur = _current.get()
+        if cur is None:
+            return
+        _current.set(None)
+        trace, root = cur
+        if request.url_rule is not None:
+            root.name = f"{request.method} {request.url_rule.rule}"
+        finish_span(root, exc)
+        self._exporter.submit(trace.spans)
+
+
+# -----------------------------------------------------------
+# SQL spans (cursor events)
+# -----------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    s = start_span("db.query", SPAN_CLIENT, **{
+        "db.system": conn.engine.dialect.name,
+        "db.statement": statement[:500],
+        "db.executemany": bool(executemany),
+    })
+    if s is not None:
+        context._trace_span = s
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    s = getattr(context, "_trace_span", None)
+    if s is not None:
+        context._trace_span = None
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            s.set("db.rowcount", cursor.rowcount)
+        finish_span(s)
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    s = getattr(context, "_trace_span", None) if context is not None else None
+    if s is not None:
+        context._trace_span = None
+        finish_span(s, exception_context.original_exception)
@@ -0,0 +1,353 @@
+# app/upstream.py
+
+# -----------------------------------------------------------
+# Shared HTTP client for the Amazon site API (AMAZON_SITE_API_URL)
+# - one pooled requests.Session per app (keep-alive, sized pool)
+# - per-endpoint timeouts, jittered retries on transient errors
+#   (GET/HEAD, plus POSTs to endpoints known to be read-only; calls
+#   under a fan-out deadline get a single attempt)
+# - per-endpoint circuit breaker so a dead upstream fails fast
+# - optional single-flight coalescing of identical calls
+# - bounded concurrent fan-out with one shared deadline
+# -----------------------------------------------------------
+import base64
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import UPSTREAM_LATENCY
+from .tracing import SPAN_CLIENT, span, traceparent
+from .singleflight import SingleFlight, SingleFlightTimeout
+
+
+# -----------------------------------------------------------
+# Raised instead of calling upstream while the breaker is open.
+# Subclasses RequestException so existing handlers catch it.
+# -----------------------------------------------------------
+class CircuitOpenError(requests.exceptions.RequestException):
+    pass
+
+
+# -----------------------------------------------------------
+# Minimal thread-safe circuit breaker
+# closed -> open after `failure_threshold` consecutive failures
+# open -> half-open after `reset_timeout` seconds (one trial call)
+# half-open -> closed on success, back to open on failure
+# -----------------------------------------------------------
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # half-open: let exactly one caller probe the upstream
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class UpstreamClient:
+    """
+    App-scoped client for the Amazon site API.
+
+    Usage:
+        resp = upstream.get("dashboard", "/api/dashboard", params={...})
+        resp = upstream.post("fetch_address", "/api/fetch-address", json={...})
+        results = upstream.fan_out("dashboard", "GET", "/api/dashboard",
+                                   {"DEN2": {"params": {...}}, ...}, deadline=6)
+
+    The first argument names the endpoint; it selects the timeout
+    (UPSTREAM_TIMEOUTS) and the circuit breaker used for the call.
+    Pass coalesce=True to share one in-flight call between concurrent
+    callers with the same (endpoint, method, path, params, json), or
+    coalesce_key=(...) to share it on the parts that decide the answer.
+    Pass retry=False for a single attempt.
+    """
+
+    # status codes worth retrying (gateway / overload errors)
+    RETRY_STATUSES = (502, 503, 504)
+
+    # POST endpoints that are read-only lookups and safe to retry
+    RETRY_POST_ENDPOINTS = frozenset({"fetch_address"})
+
+    def __init__(self, app=None):
+        self.base_url = ""
+        self.session = None
+        self._single_session = None
+        self.connect_timeout = 2.0
+        self.default_timeout = 5.0
+        self.timeouts = {}
+        self._breaker_threshold = 5
+        self._breaker_reset = 30.0
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._max_retries = 2
+        self._executor = None
+        self.flights = SingleFlight()
+        if app is not None:
+            self.init_app(app)
+
+    # -----------------------------------------------------------
+    # Read config and build the pooled session
+    # -----------------------------------------------------------
+    def init_app(self, app):
+        cfg = app.config
+        self.base_url = (cfg.get("AMAZON_SITE_API_URL") or "").rstrip("/")
+        self.connect_timeout = float(cfg.get("UPSTREAM_CONNECT_TIMEOUT", 2.0))
+        self.default_timeout = float(cfg.get("UPSTREAM_DEFAULT_TIMEOUT", 5.0))
+        self.timeouts = dict(cfg.get("UPSTREAM_TIMEOUTS") or {})
+        self._breaker_threshold = int(cfg.get("UPSTREAM_BREAKER_THRESHOLD", 5))
+        self._breaker_reset = float(cfg.get("UPSTREAM_BREAKER_RESET_SECONDS", 30.0))
+        self._breakers = {}
+
+        retries = int(cfg.get("UPSTREAM_MAX_RETRIES", 2))
+        self._max_retries = retries
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=float(cfg.get("UPSTREAM_BACKOFF_FACTOR", 0.3)),
+            backoff_jitter=float(cfg.get("UPSTREAM_BACKOFF_JITTER", 0.5)),
+            status_forcelist=self.RETRY_STATUSES,
+            # only reached by POSTs in RETRY_POST_ENDPOINTS (see _session_for)
+            allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+            raise_on_status=False,
+        )
+        pool_size = int(cfg.get("UPSTREAM_POOL_SIZE", 20))
+
+        for old in (self.session, self._single_session):
+            if old is not None:
+                old.close()
+        self.session = _pooled_session(HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry))
+        self._single_session = _pooled_session(HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0))
+
+        # cross-worker coalescing is opt-in (local lock-file directory)
+        self.flights.configure(
+            cfg.get("UPSTREAM_SINGLEFLIGHT_LOCK_DIR") or None,
+            cfg.get("UPSTREAM_SINGLEFLIGHT_RESULT_TTL", 2.0),
+        )
+
+        # shared pool for fan_out(); threads are created lazily
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=int(cfg.get("UPSTREAM_FANOUT_WORKERS", 16)),
+                thread_name_prefix="upstream-fanout",
+            )
+
+        app.extensions["upstream"] = self
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.base_url)
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def timeout_for(self, endpoint: str):
+        return (self.connect_timeout, float(self.timeouts.get(endpoint, self.default_timeout)))
+
+    def coalesce_timeout(self, endpoint: str, retry: bool = True) -> float:
+        # how long a follower waits for the leader: every attempt may
+        # use the full connect + read budget
+        connect, read = self.timeout_for(endpoint)
+        return (connect + read) * ((self._max_retries if retry else 0) + 1)
+
+    def _session_for(self, endpoint: str, method: str, retry: bool) -> requests.Session:
+        if retry and (method in ("GET", "HEAD") or endpoint in self.RETRY_POST_ENDPOINTS):
+            return self.session
+        return self._single_session
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            cb = self._breakers.get(endpoint)
+            if cb is None:
+                cb = CircuitBreaker(self._breaker_threshold, self._breaker_reset)
+                self._breakers[endpoint] = cb
+            return cb
+
+    # -----------------------------------------------------------
+    # Public entry point: optionally coalesce identical calls
+    # -----------------------------------------------------------
+    def request(self, endpoint: str, method: str, path: str, coalesce: bool = False,
+                coalesce_key=None, retry: bool = True, **kwargs) -> requests.Response:
+        if not coalesce and coalesce_key is None:
+            return self._request(endpoint, method, path, retry=retry, **kwargs)
+
+        if coalesce_key is None:
+            coalesce_key = (
+                json.dumps(kwargs.get("params"), sort_keys=True, default=str),
+                json.dumps(kwargs.get("json"), sort_keys=True, default=str),
+            )
+        key = (endpoint, method.upper(), path, *coalesce_key)
+        try:
+            return self.flights.do(
+                key,
+                lambda: self._request(endpoint, method, path, retry=retry, **kwargs),
+                timeout=self.coalesce_timeout(endpoint, retry),
+                dumps=_dump_response,
+                loads=_load_response,
+            )
+        except SingleFlightTimeout as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+
+    # -----------------------------------------------------------
+    # Core request: breaker check -> pooled call -> record outcome
+    # (recorded whatever happens, or a half-open breaker would keep
+    # its trial slot forever)
+    # -----------------------------------------------------------
+    def _request(self, endpoint: str, method: str, path: str, retry: bool = True, **kwargs) -> requests.Response:
+        if self.session is None:
+            raise RuntimeError("UpstreamClient used before init_app()")
+
+        cb = self.breaker(endpoint)
+        if not cb.allow():
+            raise CircuitOpenError(f"Upstream circuit open for '{endpoint}'")
+
+        ok = False
+        try:
+            resp = self._send(endpoint, method, path, retry, **kwargs)
+            ok = resp.status_code < 500
+            return resp
+        finally:
+            if ok:
+                cb.record_success()
+            else:
+                cb.record_failure()
+
+    def _send(self, endpoint: str, method: str, path: str, retry: bool, **kwargs) -> requests.Response:
+        session = self._session_for(endpoint, method.upper(), retry)
+        kwargs.setdefault("timeout", self.timeout_for(endpoint))
+        with span(f"upstream {method.upper()} {path}", SPAN_CLIENT, **{
+            "upstream.endpoint": endpoint, "http.method": method.upper(), "http.url": self.url(path),
+        }) as s:
+            header = traceparent()
+            if header:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), "traceparent": header}
+            start = time.perf_counter()
+            try:
+                resp = session.request(method, self.url(path), **kwargs)
+            except Exception:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint, "error")
+                raise
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint, f"{resp.status_code // 100}xx")
+            if s is not None:
+                s.set("http.status_code", resp.status_code)
+        return resp
+
+    # -----------------------------------------------------------
+    # Run the same call for many keys concurrently under one deadline.
+    # calls: {key: request kwargs}. Returns {key: Response or exception};
+    # keys still running at the deadline map to a Timeout (their threads
+    # finish in the background, bounded by the per-call timeout).
+    # Each call gets one attempt: retries could not finish in time.
+    # -----------------------------------------------------------
+    def fan_out(self, endpoint: str, method: str, path: str, calls: dict,
+                deadline: float, coalesce: bool = False) -> dict:
+        if self._executor is None:
+            raise RuntimeError("UpstreamClient used before init_app()")
+
+        connect, read = self.timeout_for(endpoint)
+        timeout = (min(connect, deadline), min(read, deadline))
+
+        futures = {}
+        for key, kwargs in calls.items():
+            kwargs = dict(kwargs)
+            kwargs.setdefault("timeout", timeout)
+            # copy_context: calls join the current request's trace
+            fut = self._executor.submit(
+                contextvars.copy_context().run,
+                self.request, endpoint, method, path, coalesce=coalesce, retry=False, **kwargs,
+            )
+            futures[fut] = key
+
+        done, pending = wait(futures, timeout=deadline)
+        for fut in pending:
+            fut.cancel()
+
+        results = {}
+        for fut, key in futures.items():
+            if fut in done:
+                results[key] = fut.exception() or fut.result()
+            else:
+                results[key] = requests.exceptions.Timeout(f"deadline of {deadline:g}s exceeded")
+        return results
+
+    def get(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request(endpoint, "GET", path, **kwargs)
+
+    def post(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        return self.request(endpoint, "POST", path, **kwargs)
+
+
+def _pooled_session(adapter: HTTPAdapter) -> requests.Session:
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept": "application/json"})
+    return session
+
+
+# -----------------------------------------------------------
+# (De)serialize responses shared across workers by SingleFlight.
+# Server errors are not shared; other workers retry themselves.
+# -----------------------------------------------------------
+def _dump_response(resp: requests.Response):
+    if resp.status_code >= 500:
+        return None
+    return json.dumps({
+        "status": resp.status_code,
+        "url": resp.url,
+        "headers": dict(resp.headers),
+        "encoding": resp.encoding,
+        "body": base64.b64encode(resp.content).decode("ascii"),
+    }).encode("utf-8")
+
+
+def _load_response(data: bytes) -> requests.Response:
+    raw = json.loads(data)
+    resp = requests.Response()
+    resp.status_code = raw["status"]
+    resp.url = raw["url"]
+    resp.headers.update(raw["headers"])
+    resp.encoding = raw["encoding"]
+    resp._content = base64.b64decode(raw["body"])
+    return resp
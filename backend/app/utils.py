@@ -1,10 +1,12 @@
 # -------------------------------------------------------------------
 # Imports for environment, email handling, and secure token creation
 # -------------------------------------------------------------------
-import os, smtplib, random
+import os, smtplib, random, time
 from email.message import EmailMessage
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from flask import current_app
+from .metrics import SMTP_LATENCY
+from .tracing import SPAN_CLIENT, span
 
 # -----------------------------------------------------------
 # Generate numeric code
@@ -38,7 +40,8 @@ def make_verify_token(user_id: int) -> str:
 # Ensures it’s not expired and was originally created for "verify" purpose
 # ------------------------------------------------------------------------
 def load_verify_token(token: str, max_age_seconds=60*60*24):
-    data = get_signer().loads(token, max_age=max_age_seconds)
+    with span("token.decode", purpose="verify"):
+        data = get_signer().loads(token, max_age=max_age_seconds)
     if data.get("purpose") != "verify":
         raise BadSignature("wrong purpose")
     return data
@@ -65,9 +68,16 @@ def send_mail(to: str, subject: str, html: str):
     msg.add_alternative(html, subtype="html")
 
     # Connect to SMTP server and send the message securely
-    with smtplib.SMTP(host, port) as s:
-        if use_tls:
-            s.starttls()            # enable encryption if configured
-        if user:
-            s.login(user, pwd)      # authenticate if credentials provided
-        s.send_message(msg)         # finally send the email
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span("smtp.send", SPAN_CLIENT, **{"smtp.host": host, "smtp.port": port}), \
+                smtplib.SMTP(host, port) as s:
+            if use_tls:
+                s.starttls()            # enable encryption if configured
+            if user:
+                s.login(user, pwd)      # authenticate if credentials provided
+            s.send_message(msg)         # finally send the email
+        outcome = "ok"
+    finally:
+        SMTP_LATENCY.observe(time.perf_counter() - start, outcome)
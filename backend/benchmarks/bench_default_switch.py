@@ -0,0 +1,144 @@
+# benchmarks/bench_default_switch.py
+
+# -----------------------------------------------------------
+# Concurrency benchmark for UserSite.switch_default
+# Many threads switch the default site of a few users at random
+# while a checker thread asserts "at most one default per user";
+# at the end every user must have exactly one default.
+#
+# Run from backend/ against a SCRATCH database (it creates and
+# deletes its own users):
+#   DATABASE_URL=postgresql://.../dtg_bench python -m benchmarks.bench_default_switch
+#   python -m benchmarks.bench_default_switch --threads 32 --seconds 10
+# -----------------------------------------------------------
+import argparse
+import random
+import threading
+import time
+import uuid
+
+from sqlalchemy import func
+
+from app import create_app
+from app.extensions import db
+from app.models import User, UserSite
+
+
+def setup(users: int, sites: int):
+    tag = uuid.uuid4().hex[:8]
+    db.metadata.create_all(db.engine, tables=[User.__table__, UserSite.__table__])
+    plan = {}
+    for u in range(users):
+        user = User(email=f"bench-{tag}-{u}@example.invalid", password_hash="x", is_verified=True)
+        db.session.add(user)
+        db.session.flush()
+        rows = [
+            UserSite(user_id=user.id, site_slug=f"B{u}S{i}", label=f"Amazon B{u}S{i}", is_default=(i == 0))
+            for i in range(sites)
+        ]
+        db.session.add_all(rows)
+        db.session.flush()
+        plan[user.id] = [r.id for r in rows]
+    db.session.commit()
+    return plan
+
+
+def defaults_per_user(user_ids):
+    rows = (
+        db.session.query(UserSite.user_id, func.count())
+        .filter(UserSite.user_id.in_(user_ids), UserSite.is_default.is_(True))
+        .group_by(UserSite.user_id)
+        .all()
+    )
+    counts = {uid: 0 for uid in user_ids}
+    counts.update(dict(rows))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent default-site switching")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=4, help="few users => heavy contention")
+    parser.add_argument("--sites", type=int, default=10)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        plan = setup(args.users, args.sites)
+    user_ids = list(plan)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"ok": 0, "errors": 0, "violations": 0}
+    latencies = []
+
+    def worker():
+        rnd = random.Random()
+        local_lat, ok, errors = [], 0, 0
+        with app.app_context():
+            while not stop.is_set():
+                uid = rnd.choice(user_ids)
+                sid = rnd.choice(plan[uid])
+                t0 = time.perf_counter()
+                try:
+                    UserSite.switch_default(uid, sid)
+                    db.session.commit()
+                    ok += 1
+                    local_lat.append(time.perf_counter() - t0)
+                except Exception:
+                    db.session.rollback()
+                    errors += 1
+            db.session.remove()
+        with lock:
+            stats["ok"] += ok
+            stats["errors"] += errors
+            latencies.extend(local_lat)
+
+    def checker():
+        with app.app_context():
+            while not stop.is_set():
+                counts = defaults_per_user(user_ids)
+                if any(c > 1 for c in counts.values()):
+                    with lock:
+                        stats["violations"] += 1
+                db.session.rollback()
+                time.sleep(0.01)
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    threads.append(threading.Thread(target=checker))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        final = defaults_per_user(user_ids)
+        # cleanup
+        UserSite.query.filter(UserSite.user_id.in_(user_ids)).delete(synchronize_session=False)
+        User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        dialect = db.engine.dialect.name
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+    print(f"dialect={dialect} threads={args.threads} users={args.users} sites/user={args.sites}")
+    print(f"switches ok={stats['ok']} errors={stats['errors']} in {elapsed:.2f}s "
+          f"-> {stats['ok'] / elapsed:.0f} switches/s")
+    print(f"latency ms p50={pct(0.50):.2f} p95={pct(0.95):.2f} p99={pct(0.99):.2f}")
+    print(f"checker saw >1 default: {stats['violations']} times")
+    print(f"final defaults per user: {final}")
+
+    bad = [uid for uid, c in final.items() if c != 1]
+    if stats["violations"] or bad:
+        raise SystemExit(f"INVARIANT VIOLATED (users without exactly one default: {bad})")
+    print("invariant held: exactly one default per user")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_json.py
+
+# -----------------------------------------------------------
+# JSON encoding microbenchmark: Flask's DefaultJSONProvider vs
+# FastJSONProvider (app/json_provider.py) on the two hot payloads
+#   catalog  GET /api/products body (static product list)
+#   sites    GET /api/user/sites body (N site rows with datetimes)
+# Variants:
+#   flask         DefaultJSONProvider.dumps, compact like jsonify
+#                 (rows pre-isoformatted, as the handlers used to do)
+#   fast-stdlib   preconfigured json.JSONEncoder, datetimes native
+#   fast-orjson   orjson >= 3.9, fragments native (skipped when not installed)
+#   +fragment     catalog list served from the encoded-fragment cache
+# No database or network needed. Run from backend/:
+#   python -m benchmarks.bench_json
+#   python -m benchmarks.bench_json --sites 200 --seconds 2
+# -----------------------------------------------------------
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import json_provider
+from app.json_provider import encode_bytes, json_fragment
+from app.routes.products import PRODUCTS_DATA
+
+COMPACT = (",", ":")
+
+
+def catalog_payload(fragment=False):
+    if fragment:
+        products = json_fragment(
+            "bench:products", lambda: [p for p in PRODUCTS_DATA if not p.get("archived", False)]
+        )
+    else:
+        products = [p for p in PRODUCTS_DATA if not p.get("archived", False)]
+    return {
+        "success": True,
+        "message": "Products retrieved successfully",
+        "data": {"products": products},
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+    }
+
+
+def sites_payload(n, isoformat=False):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        created = base + timedelta(minutes=i)
+        rows.append({
+            "id": i + 1,
+            "user_id": 1,
+            "site_slug": f"BENCH{i}",
+            "label": f"Amazon BENCH{i}",
+            "address": f"{i} Fulfillment Way, Seattle, WA",
+            "is_default": i == 0,
+            "created_at": created.isoformat() if isoformat else created,
+        })
+    return rows
+
+
+def measure(fn, seconds):
+    fn()  # warm-up (and fill the fragment cache)
+    calls, size = 0, 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            size = len(fn())
+        calls += 50
+    elapsed = time.perf_counter() - started
+    return calls / elapsed, elapsed / calls * 1e6, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON response encoding")
+    parser.add_argument("--sites", type=int, default=50, help="rows in the sites payload")
+    parser.add_argument("--seconds", type=float, default=1.0, help="per variant")
+    args = parser.parse_args()
+
+    default = DefaultJSONProvider(Flask(__name__))
+    stdlib = json_provider._stdlib_encode
+    orjson_enc = json_provider._orjson_encode if json_provider.orjson is not None else None
+
+    variants = [
+        ("catalog", "flask", lambda: default.dumps(catalog_payload(), separators=COMPACT).encode("utf-8")),
+        ("catalog", "fast-stdlib", lambda: encode_bytes(catalog_payload(), stdlib)),
+        ("catalog", "fast-stdlib+fragment", lambda: encode_bytes(catalog_payload(True), stdlib)),
+        ("catalog", "fast-orjson", lambda: encode_bytes(catalog_payload(), orjson_enc)),
+        ("catalog", "fast-orjson+fragment", lambda: encode_bytes(catalog_payload(True), orjson_enc)),
+        ("sites", "flask", lambda: default.dumps(sites_payload(args.sites, True), separators=COMPACT).encode("utf-8")),
+        ("sites", "fast-stdlib", lambda: encode_bytes(sites_payload(args.sites), stdlib)),
+        ("sites", "fast-orjson", lambda: encode_bytes(sites_payload(args.sites), orjson_enc)),
+    ]
+
+    print(f"orjson={json_provider.orjson.__version__ if orjson_enc else 'no'} sites={args.sites}")
+    print(f"{'payload':<8} {'variant':<22} {'ops/s':>10} {'us/op':>9} {'bytes':>7} {'speedup':>8}")
+    baseline = {}
+    for payload, name, fn in variants:
+        if "orjson" in name and orjson_enc is None:
+            continue
+        ops, us, size = measure(fn, args.seconds)
+        baseline.setdefault(payload, ops)
+        print(f"{payload:<8} {name:<22} {ops:>10.0f} {us:>9.1f} {size:>7} {ops / baseline[payload]:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""orders / quotes: search_text + full-text index
+
+Revision ID: 0c5d8e3f6a21
+Revises: e6b3f1a08c57
+Create Date: 2026-10-19 16:48:22.650137
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5d8e3f6a21'
+down_revision = 'e6b3f1a08c57'
+branch_labels = None
+depends_on = None
+
+TABLES = ('orders', 'quotes')
+
+
+def _sqlite_ddl(table):
+    return [
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5(search_text, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {table}_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f"CREATE TRIGGER {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {table}_fts({table}_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        f"CREATE TRIGGER {table}_fts_au AFTER UPDATE OF search_text ON {table} BEGIN "
+        f"INSERT INTO {table}_fts({table}_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {table}_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    ]
+
+
+def upgrade():
+    # search_text is filled by the sync; run `flask account reindex`
+    # once after upgrading to index rows synced before this revision.
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_text', sa.Text(), nullable=True))
+
+        if dialect == 'postgresql':
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_tsv tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('simple', coalesce(search_text, ''))) STORED"
+            )
+            with op.get_context().autocommit_block():
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_tsv ON {table} USING GIN (search_tsv)")
+        elif dialect == 'sqlite':
+            for stmt in _sqlite_ddl(table):
+                op.execute(stmt)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_tsv")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_tsv")
+        elif dialect == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('search_text')
@@ -0,0 +1,151 @@
+"""user_sites: batched slug_norm backfill + unique (user_id, slug_norm) index
+
+Revision ID: 3b6e0d5a9f12
+Revises: 7f3a9c2d41b8
+Create Date: 2026-10-19 10:02:17.530914
+
+Runs online: the backfill commits in small batches (no long-held row
+locks) and on Postgres the unique index is built CONCURRENTLY.
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b6e0d5a9f12'
+down_revision = '7f3a9c2d41b8'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+INDEX_NAME = 'uq_user_sites_user_id_slug_norm'
+
+_JUNK_RE = re.compile(r"[^\w\-.]+")
+
+
+# Frozen copy of app.models.normalize_slug (migrations must not import app code)
+def _normalize_slug(raw):
+    if not raw:
+        return ""
+    s = str(raw).lower().strip()
+    if s.startswith("amazon"):
+        s = s[len("amazon"):].lstrip(":-_ .")
+    return " ".join(_JUNK_RE.sub(" ", s).split())
+
+
+def _backfill(conn, user_sites, dedupe=False):
+    # One UPDATE ... SET slug_norm = CASE id ... per batch, each in its own
+    # transaction; walks the primary key so every batch is an index range.
+    # dedupe=True (once the unique index exists): a row that would collide
+    # with an existing (user_id, slug_norm) is deleted instead.
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(user_sites.c.id, user_sites.c.user_id, user_sites.c.site_slug, user_sites.c.is_default)
+            .where(user_sites.c.slug_norm.is_(None), user_sites.c.id > last_id)
+            .order_by(user_sites.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            return
+        mapping = {r.id: _normalize_slug(r.site_slug) for r in rows}
+        if dedupe:
+            _drop_colliding(conn, user_sites, rows, mapping)
+        if mapping:
+            conn.execute(
+                user_sites.update()
+                .where(user_sites.c.id.in_(list(mapping)))
+                .values(slug_norm=sa.case(mapping, value=user_sites.c.id))
+            )
+        last_id = rows[-1].id
+
+
+def _drop_colliding(conn, user_sites, rows, mapping):
+    # Removes colliding rows from `mapping` and deletes them; a dropped
+    # default hands the default flag to the row that is kept.
+    existing = {
+        (r.user_id, r.slug_norm): r.id
+        for r in conn.execute(
+            sa.select(user_sites.c.id, user_sites.c.user_id, user_sites.c.slug_norm)
+            .where(
+                user_sites.c.user_id.in_({r.user_id for r in rows}),
+                user_sites.c.slug_norm.in_(set(mapping.values())),
+            )
+        )
+    }
+    for r in rows:
+        key = (r.user_id, mapping[r.id])
+        kept = existing.setdefault(key, r.id)
+        if kept == r.id:
+            continue
+        del mapping[r.id]
+        conn.execute(user_sites.delete().where(user_sites.c.id == r.id))
+        if r.is_default:
+            conn.execute(user_sites.update().where(user_sites.c.id == kept).values(is_default=True))
+
+
+def _drop_duplicates(conn, user_sites):
+    # Keep the default row (else the oldest) of each (user, slug_norm) group
+    dupes = conn.execute(
+        sa.select(user_sites.c.user_id, user_sites.c.slug_norm)
+        .group_by(user_sites.c.user_id, user_sites.c.slug_norm)
+        .having(sa.func.count() > 1)
+    ).fetchall()
+    for user_id, slug_norm in dupes:
+        ids = conn.execute(
+            sa.select(user_sites.c.id)
+            .where(user_sites.c.user_id == user_id, user_sites.c.slug_norm == slug_norm)
+            .order_by(user_sites.c.is_default.desc(), user_sites.c.id)
+        ).scalars().all()
+        conn.execute(user_sites.delete().where(user_sites.c.id.in_(ids[1:])))
+
+
+def upgrade():
+    user_sites = sa.table(
+        'user_sites',
+        sa.column('id', sa.Integer),
+        sa.column('user_id', sa.Integer),
+        sa.column('site_slug', sa.String),
+        sa.column('slug_norm', sa.String),
+        sa.column('is_default', sa.Boolean),
+    )
+    is_pg = op.get_bind().dialect.name == 'postgresql'
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        _backfill(conn, user_sites)
+        _drop_duplicates(conn, user_sites)
+
+        if is_pg:
+            # a failed CONCURRENTLY build leaves an INVALID index behind,
+            # which IF NOT EXISTS would silently accept
+            valid = conn.execute(
+                sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+                {"name": INDEX_NAME},
+            ).scalar()
+            if valid is False:
+                op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {INDEX_NAME}")
+            op.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {INDEX_NAME} "
+                "ON user_sites (user_id, slug_norm)"
+            )
+
+    if not is_pg:
+        with op.batch_alter_table('user_sites', schema=None) as batch_op:
+            batch_op.create_index(INDEX_NAME, ['user_id', 'slug_norm'], unique=True)
+
+    # Rows written by old app instances during the deploy may still be NULL,
+    # and may now collide with the unique index
+    with op.get_context().autocommit_block():
+        _backfill(op.get_bind(), user_sites, dedupe=True)
+
+    with op.batch_alter_table('user_sites', schema=None) as batch_op:
+        batch_op.alter_column('slug_norm', existing_type=sa.String(length=100), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_sites', schema=None) as batch_op:
+        batch_op.alter_column('slug_norm', existing_type=sa.String(length=100), nullable=True)
+        batch_op.drop_index(INDEX_NAME)
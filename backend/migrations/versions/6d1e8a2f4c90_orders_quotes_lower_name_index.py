@@ -0,0 +1,35 @@
+"""orders / quotes: (site_norm, lower(name)) index for the name prefix filter
+
+Revision ID: 6d1e8a2f4c90
+Revises: 4f2a7c9e1b36
+Create Date: 2026-10-19 21:14:05.318220
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1e8a2f4c90'
+down_revision = '4f2a7c9e1b36'
+branch_labels = None
+depends_on = None
+
+TABLES = ('orders', 'quotes')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'postgresql':
+            with op.get_context().autocommit_block():
+                op.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_site_norm_lower_name "
+                    f"ON {table} (site_norm, lower(name) text_pattern_ops)"
+                )
+        else:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_site_norm_lower_name ON {table} (site_norm, lower(name))")
+
+
+def downgrade():
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_site_norm_lower_name")
@@ -0,0 +1,28 @@
+"""user_sites: add slug_norm column
+
+Revision ID: 7f3a9c2d41b8
+Revises: d23155c6545c
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3a9c2d41b8'
+down_revision = 'd23155c6545c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable, no default: adding it is a metadata-only change.
+    # Backfill and the unique index follow in 3b6e0d5a9f12.
+    with op.batch_alter_table('user_sites', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slug_norm', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_sites', schema=None) as batch_op:
+        batch_op.drop_column('slug_norm')
@@ -0,0 +1,27 @@
+"""users: add data_version
+
+Revision ID: 9a41c6e2d7f0
+Revises: 5e9d2b7c8a14
+Create Date: 2026-10-19 14:05:11.402871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a41c6e2d7f0'
+down_revision = '5e9d2b7c8a14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Constant server default: metadata-only on Postgres 11+, no table rewrite.
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,48 @@
+"""user_sites: at most one default site per user
+
+Revision ID: c81e4f07b2d3
+Revises: 3b6e0d5a9f12
+Create Date: 2026-10-19 11:26:51.204477
+
+Postgres gets a partial exclusion constraint (user_id WITH =) WHERE
+is_default, DEFERRABLE INITIALLY IMMEDIATE, so a single UPDATE can move
+the flag between rows; other dialects get a partial unique index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81e4f07b2d3'
+down_revision = '3b6e0d5a9f12'
+branch_labels = None
+depends_on = None
+
+NAME = 'uq_user_sites_one_default'
+
+
+def upgrade():
+    # Resolve existing violations: keep the lowest-id default per user
+    op.execute("""
+        UPDATE user_sites SET is_default = false
+        WHERE is_default AND id NOT IN (
+            SELECT MIN(id) FROM user_sites WHERE is_default GROUP BY user_id
+        )
+    """)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            f"ALTER TABLE user_sites ADD CONSTRAINT {NAME} "
+            "EXCLUDE USING btree (user_id WITH =) WHERE (is_default) "
+            "DEFERRABLE INITIALLY IMMEDIATE"
+        )
+    else:
+        op.create_index(NAME, 'user_sites', ['user_id'], unique=True,
+                        sqlite_where=sa.text('is_default'))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(f"ALTER TABLE user_sites DROP CONSTRAINT {NAME}")
+    else:
+        op.drop_index(NAME, table_name='user_sites')
@@ -0,0 +1,62 @@
+"""add orders / quotes mirror and account_sync_state
+
+Revision ID: e6b3f1a08c57
+Revises: 9a41c6e2d7f0
+Create Date: 2026-10-19 15:31:47.209614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3f1a08c57'
+down_revision = '9a41c6e2d7f0'
+branch_labels = None
+depends_on = None
+
+
+def _document_table(name):
+    op.create_table(name,
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('site_norm', sa.String(length=100), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('total', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('content_hash', sa.String(length=40), nullable=False),
+    sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('site_norm', 'name', name=f'uq_{name}_site_norm_name')
+    )
+    with op.batch_alter_table(name, schema=None) as batch_op:
+        batch_op.create_index(f'ix_{name}_site_norm_id', ['site_norm', 'id'], unique=False)
+        batch_op.create_index(f'ix_{name}_site_norm_status_id', ['site_norm', 'status', 'id'], unique=False)
+
+
+def upgrade():
+    _document_table('orders')
+    _document_table('quotes')
+
+    op.create_table('account_sync_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('site_norm', sa.String(length=100), nullable=False),
+    sa.Column('doc_type', sa.String(length=10), nullable=False),
+    sa.Column('account_name', sa.String(length=255), nullable=False),
+    sa.Column('cursor', sa.String(length=64), nullable=True),
+    sa.Column('remote_total', sa.Integer(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_full_sync_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('site_norm', 'doc_type', name='uq_account_sync_state_site_type')
+    )
+
+
+def downgrade():
+    op.drop_table('account_sync_state')
+    for name in ('quotes', 'orders'):
+        with op.batch_alter_table(name, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{name}_site_norm_status_id')
+            batch_op.drop_index(f'ix_{name}_site_norm_id')
+        op.drop_table(name)
@@ -0,0 +1,100 @@
+# tests/conftest.py
+
+# -----------------------------------------------------------
+# Test fixtures: the app on a throwaway SQLite database
+# (run from backend/: python -m pytest)
+# - DATABASE_URL is set before `app` is imported (Config reads env
+#   at import time); upstream calls are disabled
+# - Postgres ARRAY columns are created as JSON on SQLite and lists
+#   are bound as JSON text (ARRAY only exists on Postgres)
+# -----------------------------------------------------------
+import json
+import os
+import sqlite3
+import tempfile
+
+import pytest
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="dtg-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_PATH}"
+os.environ["AMAZON_SITE_API_URL"] = ""
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.dialects.postgresql import ARRAY  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import ShippingInformation, User, UserProfile, UserSite  # noqa: E402
+
+
+@compiles(ARRAY, "sqlite")
+def _array_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+sqlite3.register_adapter(list, json.dumps)
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+    yield app
+    # a fresh file per test (drop_all would miss the FTS side tables)
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    os.remove(_DB_PATH)
+
+
+@pytest.fixture
+def make_user(app):
+    def make(email="user@example.com", sites=("ABC1",), shipping=True):
+        with app.app_context():
+            user = User(email=email, is_verified=True)
+            user.set_password("password123")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(UserProfile(user_id=user.id, first_name="Test", last_name="User"))
+            for i, slug in enumerate(sites):
+                db.session.add(UserSite(user_id=user.id, site_slug=slug, label=f"Amazon {slug}", is_default=(i == 0)))
+            if shipping:
+                db.session.add(ShippingInformation(user_id=user.id, address1="1 Main St", city="Seattle"))
+            db.session.commit()
+            return user.id
+    return make
+
+
+@pytest.fixture
+def client_for(app):
+    def client(user_id):
+        c = app.test_client()
+        with app.app_context():
+            c.set_cookie("access_token_cookie", create_access_token(identity=str(user_id)))
+        return c
+    return client
+
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries(fn) -> (fn(), number of SQL statements it ran)"""
+    def count(fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return result, len(statements)
+    return count
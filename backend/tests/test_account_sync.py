@@ -0,0 +1,76 @@
+# tests/test_account_sync.py
+
+# -----------------------------------------------------------
+# The orders / quotes mirror is shared per site, so the upstream
+# account it is filled from must not follow a user's free-text
+# label (DEN2 labelled "Amazon SEA9" still syncs Amazon DEN2).
+# -----------------------------------------------------------
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import db
+from app.models import AccountSyncState, Order, Site, UserSite
+from app.routes import account
+
+
+@pytest.fixture
+def hostile_user(app, make_user):
+    uid = make_user(sites=["DEN2"])
+    with app.app_context():
+        UserSite.query.filter_by(user_id=uid).update({"label": "Amazon SEA9"})
+        db.session.commit()
+    return uid
+
+
+def test_first_view_syncs_canonical_account(monkeypatch, hostile_user, client_for):
+    started = []
+    monkeypatch.setattr(account, "upstream", SimpleNamespace(configured=True))
+    monkeypatch.setattr(account, "start_initial_sync", lambda app, *args: started.append(args) or True)
+
+    resp = client_for(hostile_user).get("/api/account/orders?site=DEN2")
+
+    assert resp.status_code == 202
+    assert started == [("den2", "Amazon DEN2", "order")]
+
+
+def test_first_view_uses_directory_slug(app, monkeypatch, hostile_user, client_for):
+    with app.app_context():
+        db.session.add(Site(slug="Den2", label="Amazon SEA9"))
+        db.session.commit()
+    started = []
+    monkeypatch.setattr(account, "upstream", SimpleNamespace(configured=True))
+    monkeypatch.setattr(account, "start_initial_sync", lambda app, *args: started.append(args) or True)
+
+    client_for(hostile_user).get("/api/account/quotes?site=den2")
+
+    assert started == [("den2", "Amazon Den2", "quote")]
+
+
+def test_sync_command_ignores_user_labels(app, monkeypatch, hostile_user, make_user):
+    make_user(email="other@example.com", sites=["DEN2", "ABC1"])
+    synced = []
+    monkeypatch.setattr(
+        account, "sync_account",
+        lambda site_norm, account_name, doc_type, full=False: synced.append((site_norm, account_name)) or {},
+    )
+
+    result = app.test_cli_runner().invoke(args=["account", "sync"])
+
+    assert result.exit_code == 0, result.output
+    assert sorted(set(synced)) == [("abc1", "Amazon ABC1"), ("den2", "Amazon DEN2")]
+
+
+def test_name_prefix_filter_is_literal(app, make_user, client_for):
+    uid = make_user(sites=["ABC1"])
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.session.add(AccountSyncState(site_norm="abc1", doc_type="order", account_name="Amazon ABC1", last_synced_at=now))
+        for name in ("SO_100", "SOX100", "so_200"):
+            db.session.add(Order(site_norm="abc1", name=name, status="sale", payload={"name": name}, content_hash="x"))
+        db.session.commit()
+
+    resp = client_for(uid).get("/api/account/orders?site=ABC1&q=so_")
+
+    assert sorted(o["name"] for o in resp.get_json()["orders"]) == ["SO_100", "so_200"]
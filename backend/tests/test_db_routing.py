@@ -0,0 +1,54 @@
+# tests/test_db_routing.py
+
+# -----------------------------------------------------------
+# ReplicaRouter sticky markers: shared through DB_REPLICA_STICKY_DIR,
+# expired marker files swept away
+# -----------------------------------------------------------
+import os
+import time
+
+from app import db_routing
+from app.db_routing import ReplicaRouter
+
+
+def _router(app, sticky_dir):
+    app.config.update(
+        SQLALCHEMY_BINDS={"replica": app.config["SQLALCHEMY_DATABASE_URI"]},
+        DB_REPLICA_STICKY_DIR=str(sticky_dir),
+        DB_REPLICA_STICKY_SECONDS=5,
+    )
+    return ReplicaRouter(app)
+
+
+def test_marker_is_seen_by_other_workers(app, tmp_path):
+    writer, reader = _router(app, tmp_path), _router(app, tmp_path)
+
+    with app.app_context():
+        writer.mark(7)
+
+    assert reader.is_sticky(7)
+    assert not reader.is_sticky(8)
+
+
+def test_sweep_removes_expired_markers(app, tmp_path):
+    router = _router(app, tmp_path)
+    now = time.time()
+    for name, age in (("u1", 0), ("u2", 6), ("u3", 5 + db_routing.STICKY_SWEEP_INTERVAL + 1)):
+        path = tmp_path / name
+        path.touch()
+        os.utime(path, (now - age, now - age))
+
+    assert router.sweep(now) == 1
+    assert sorted(os.listdir(tmp_path)) == ["u1", "u2"]
+
+
+def test_mark_sweeps_at_most_once_per_interval(app, tmp_path, monkeypatch):
+    router = _router(app, tmp_path)
+    sweeps = []
+    monkeypatch.setattr(router, "sweep", lambda now=None: sweeps.append(now))
+
+    with app.app_context():
+        for user_id in range(5):
+            router.mark(user_id)
+
+    assert len(sweeps) == 1
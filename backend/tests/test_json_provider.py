@@ -0,0 +1,36 @@
+# tests/test_json_provider.py
+
+# -----------------------------------------------------------
+# FastJSONProvider output: the same bytes from orjson, the stdlib
+# encoder and cached fragments
+# -----------------------------------------------------------
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app import json_provider
+from app.json_provider import encode_bytes, json_fragment
+
+ENCODERS = [json_provider._stdlib_encode]
+if json_provider.orjson is not None:
+    ENCODERS.append(json_provider._orjson_encode)
+
+PAYLOAD = {
+    "b": [{"sku": "P-1", "price": Decimal("9.50"), "name": "\x00jsonfrag:x:0\x00 ünï"}],
+    "a": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+}
+
+
+@pytest.mark.parametrize("encoder", ENCODERS)
+def test_fragment_matches_plain_encoding(encoder):
+    frag = json_fragment(("test", encoder.__name__), lambda: PAYLOAD["b"])
+
+    assert encode_bytes({**PAYLOAD, "b": frag}, encoder) == encode_bytes(PAYLOAD, encoder)
+
+
+def test_encoders_agree():
+    outputs = {encoder.__name__: encode_bytes(PAYLOAD, encoder) for encoder in ENCODERS}
+
+    assert len(set(outputs.values())) == 1, outputs
+    assert outputs["_stdlib_encode"].startswith(b'{"a":"2025-01-02T03:04:05+00:00"')
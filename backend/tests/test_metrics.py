@@ -0,0 +1,25 @@
+# tests/test_metrics.py
+
+# -----------------------------------------------------------
+# GET /metrics is only served to holders of METRICS_TOKEN
+# -----------------------------------------------------------
+from app.extensions import metrics
+
+
+def test_hidden_without_token(app, monkeypatch):
+    monkeypatch.setattr(metrics, "token", "")
+
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_requires_bearer_token(app, monkeypatch):
+    monkeypatch.setattr(metrics, "token", "s3cret")
+    client = app.test_client()
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer sécret"}).status_code == 401
+
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert b"# TYPE" in resp.data
@@ -0,0 +1,49 @@
+# tests/test_profiler.py
+
+# -----------------------------------------------------------
+# RequestProfiler: profiled requests get samples; the sampler
+# thread sleeps only while something is being profiled
+# -----------------------------------------------------------
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.profiler import RequestProfiler
+
+
+@pytest.fixture
+def profiled(app, monkeypatch):
+    app.config.update(PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=1.0, PROFILER_INTERVAL_MS=1)
+    rp = RequestProfiler(app)
+
+    @app.get("/_test/slow")
+    def slow():
+        time.sleep(0.05)
+        return "ok"
+
+    ticks = []
+    fake_time = SimpleNamespace(
+        sleep=lambda s: ticks.append(s) or time.sleep(s), perf_counter=time.perf_counter,
+    )
+    monkeypatch.setattr(sys.modules["app.profiler"], "time", fake_time)
+    return rp, app.test_client(), ticks
+
+
+def test_sampler_idles_without_profiled_requests(profiled):
+    rp, client, ticks = profiled
+
+    assert client.get("/_test/slow").status_code == 200
+    entry = rp.entries("slow")[0]
+    assert entry["sample_count"] > 0
+
+    time.sleep(0.02)  # let the sampler finish its last tick and block
+    idle_from = len(ticks)
+    time.sleep(0.1)
+    assert rp._thread.is_alive()
+    assert len(ticks) - idle_from <= 1
+
+    client.get("/_test/slow")
+    assert len(rp.entries("slow")) == 2
+    assert len(ticks) > idle_from + 1
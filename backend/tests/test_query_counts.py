@@ -0,0 +1,40 @@
+# tests/test_query_counts.py
+
+# -----------------------------------------------------------
+# Read endpoints run a fixed number of SQL statements, however many
+# sites the user has (eager loading in place of per-row lazy loads).
+# Today that is: data_version (ETag check), the user with profile /
+# shipping joined, and one selectin load of the sites.
+# If one of these fails, check for a new lazy relationship access.
+# -----------------------------------------------------------
+import pytest
+
+ENDPOINTS = {
+    "/api/auth/profile": 3,
+    "/api/auth/profile/sites": 3,
+    "/api/user/sites": 3,
+    "/api/session/bootstrap": 3,
+}
+
+
+@pytest.mark.parametrize("path,expected", sorted(ENDPOINTS.items()))
+@pytest.mark.parametrize("site_count", [1, 8])
+def test_fixed_query_count(make_user, client_for, count_queries, path, expected, site_count):
+    uid = make_user(sites=[f"ABC{i}" for i in range(site_count)])
+    client = client_for(uid)
+
+    resp, count = count_queries(lambda: client.get(path))
+
+    assert resp.status_code == 200
+    assert count == expected, f"{path}: {count} statements"
+
+
+@pytest.mark.parametrize("path", sorted(ENDPOINTS))
+def test_not_modified_is_one_query(make_user, client_for, count_queries, path):
+    client = client_for(make_user(sites=["ABC1", "ABC2"]))
+    etag = client.get(path).headers["ETag"]
+
+    resp, count = count_queries(lambda: client.get(path, headers={"If-None-Match": etag}))
+
+    assert resp.status_code == 304
+    assert count == 1
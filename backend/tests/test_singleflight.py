@@ -0,0 +1,125 @@
+# tests/test_singleflight.py
+
+# -----------------------------------------------------------
+# SingleFlight: shared results within a worker and across workers
+# (two instances on one lock directory), follower timeouts, sweep
+# -----------------------------------------------------------
+import os
+import threading
+import time
+
+import pytest
+
+from app import singleflight
+from app.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _wait_for_leader(sf, key):
+    deadline = time.monotonic() + 2
+    while key not in sf._calls:
+        assert time.monotonic() < deadline, "leader never started"
+        time.sleep(0.001)
+
+
+def test_leader_and_follower_share_one_call():
+    sf = SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return {"address1": "1 Main St"}
+
+    leader = threading.Thread(target=lambda: results.append(sf.do("k", fn, timeout=2)))
+    leader.start()
+    _wait_for_leader(sf, "k")
+    follower = threading.Thread(target=lambda: results.append(sf.do("k", fn, timeout=2)))
+    follower.start()
+    time.sleep(0.02)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(calls) == 1
+    assert len(results) == 2 and results[0] is results[1]
+
+
+def test_follower_gets_the_leaders_exception():
+    sf = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(2)
+        raise ValueError("upstream down")
+
+    def call():
+        try:
+            sf.do("k", fn, timeout=2)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    _wait_for_leader(sf, "k")
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.02)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_follower_times_out():
+    sf = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: sf.do("k", lambda: release.wait(2)))
+    leader.start()
+    _wait_for_leader(sf, "k")
+    try:
+        with pytest.raises(SingleFlightTimeout):
+            sf.do("k", lambda: "not called", timeout=0.05)
+    finally:
+        release.set()
+        leader.join()
+
+
+def test_result_shared_across_workers(tmp_path):
+    lock_dir = str(tmp_path / "flights")
+    workers = [SingleFlight(lock_dir, result_ttl=5), SingleFlight(lock_dir, result_ttl=5)]
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return "addr"
+
+    results = [sf.do("k", fn, timeout=1, dumps=str.encode, loads=bytes.decode) for sf in workers]
+
+    assert results == ["addr", "addr"]
+    assert len(calls) == 1
+    assert oct(os.stat(lock_dir).st_mode & 0o777) == "0o700"
+    assert all(os.stat(e.path).st_mode & 0o077 == 0 for e in os.scandir(lock_dir))
+
+
+def test_sweep_removes_stale_files(tmp_path):
+    sf = SingleFlight(str(tmp_path), result_ttl=2)
+    now = time.time()
+    ages = {
+        "old.result": 3,
+        "new.result": 0,
+        "old.result.1.tmp": singleflight.SWEEP_INTERVAL + 1,
+        "new.result.1.tmp": 0,
+        "idle.lock": singleflight.LOCK_IDLE_SECONDS + 1,
+        "busy.lock": 0,
+    }
+    for name, age in ages.items():
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        os.utime(path, (now - age, now - age))
+
+    sf.sweep()
+
+    assert sorted(os.listdir(tmp_path)) == ["busy.lock", "new.result", "new.result.1.tmp"]
@@ -0,0 +1,37 @@
+# tests/test_sites.py
+
+# -----------------------------------------------------------
+# /api/sites/search matches the whole normalized query
+# -----------------------------------------------------------
+import pytest
+
+from app.extensions import db
+from app.models import Site
+from app.site_directory import site_directory
+
+
+@pytest.fixture
+def directory(app):
+    with app.app_context():
+        db.session.add_all([
+            Site(slug="DEN2", label="Amazon Denver Air Hub", region="US-West"),
+            Site(slug="DEN4", label="Amazon Denver Ground"),
+            Site(slug="AIR1", label="Amazon Air Gateway"),
+        ])
+        db.session.commit()
+    site_directory.invalidate()
+    return app.test_client()
+
+
+@pytest.mark.parametrize("q,expected", [
+    ("denver air", ["Amazon Denver Air Hub"]),
+    ("Amazon Denver", ["Amazon Denver Air Hub", "Amazon Denver Ground"]),
+    ("Amazon DEN2", ["Amazon Denver Air Hub"]),
+    ("air", ["Amazon Air Gateway"]),
+    ("us-west", ["Amazon Denver Air Hub"]),
+])
+def test_search_normalizes_whole_query(directory, q, expected):
+    resp = directory.get("/api/sites/search", query_string={"q": q})
+
+    assert resp.status_code == 200
+    assert sorted(resp.get_json()) == expected
@@ -0,0 +1,52 @@
+# tests/test_tracing.py
+
+# -----------------------------------------------------------
+# Inbound traceparent: the trace id is always continued, the
+# sampled flag only from TRACING_TRUSTED_PARENTS
+# -----------------------------------------------------------
+import ipaddress
+
+import pytest
+
+from app import tracing
+from app.tracing import Tracer
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+SAMPLED = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+def _start(app, tracer, remote_addr, header=SAMPLED):
+    with app.test_request_context(
+        "/", headers={"traceparent": header}, environ_base={"REMOTE_ADDR": remote_addr},
+    ):
+        tracer._start()
+        cur = tracing._current.get()
+        tracing._current.set(None)
+    return cur
+
+
+@pytest.fixture
+def tracer():
+    t = Tracer()
+    t.sample_rate = 0.0
+    t.trusted_parents = (ipaddress.ip_network("10.0.0.0/8"),)
+    return t
+
+
+def test_untrusted_sampled_flag_is_ignored(app, tracer):
+    assert _start(app, tracer, "203.0.113.9") is None
+
+
+def test_trusted_parent_forces_sampling(app, tracer):
+    trace, root = _start(app, tracer, "10.1.2.3")
+
+    assert trace.trace_id == TRACE_ID
+    assert root.parent_id == "00f067aa0ba902b7"
+
+
+def test_untrusted_parent_keeps_trace_id_when_sampled_locally(app, tracer):
+    tracer.sample_rate = 1.0
+
+    trace, _ = _start(app, tracer, "203.0.113.9", header=f"00-{TRACE_ID}-00f067aa0ba902b7-00")
+
+    assert trace.trace_id == TRACE_ID
@@ -0,0 +1,85 @@
+# tests/test_upstream.py
+
+# -----------------------------------------------------------
+# UpstreamClient: breaker bookkeeping and which calls may retry
+# (no network: the sessions' request() is replaced)
+# -----------------------------------------------------------
+import pytest
+import requests
+
+from app.upstream import UpstreamClient
+
+
+@pytest.fixture
+def client(app):
+    app.config.update(
+        AMAZON_SITE_API_URL="http://upstream.invalid",
+        UPSTREAM_BREAKER_THRESHOLD=1,
+        UPSTREAM_BREAKER_RESET_SECONDS=0,
+    )
+    c = UpstreamClient()
+    c.init_app(app)
+    with app.app_context():
+        yield c
+
+
+def _ok(*args, **kwargs):
+    resp = requests.Response()
+    resp.status_code = 200
+    return resp
+
+
+def _recorder(monkeypatch, client):
+    used = []
+    for name in ("session", "_single_session"):
+        session = getattr(client, name)
+        monkeypatch.setattr(session, "request", lambda *a, name=name, **kw: used.append(name) or _ok())
+    return used
+
+
+def test_unexpected_error_releases_half_open_trial(monkeypatch, client):
+    def boom(*args, **kwargs):
+        raise ValueError("bad header")
+
+    monkeypatch.setattr(client.session, "request", boom)
+    for _ in range(3):
+        # reset timeout 0: each call is the half-open trial; a leaked
+        # trial slot would turn the next one into CircuitOpenError
+        with pytest.raises(ValueError):
+            client.get("dashboard", "/api/dashboard")
+
+    monkeypatch.setattr(client.session, "request", _ok)
+    assert client.get("dashboard", "/api/dashboard").status_code == 200
+    assert client.breaker("dashboard").state == "closed"
+
+
+def test_only_read_only_posts_retry(monkeypatch, client):
+    used = _recorder(monkeypatch, client)
+
+    client.get("dashboard", "/api/dashboard")
+    client.post("fetch_address", "/api/fetch-address", json={})
+    client.post("quote_submit", "/api/quotes", json={})
+    client.get("dashboard", "/api/dashboard", retry=False)
+
+    assert used == ["session", "session", "_single_session", "_single_session"]
+
+
+def test_fan_out_calls_are_single_attempt(monkeypatch, client):
+    used = _recorder(monkeypatch, client)
+
+    results = client.fan_out("dashboard", "GET", "/api/dashboard", {"A": {}, "B": {}}, deadline=5)
+
+    assert sorted(results) == ["A", "B"]
+    assert used == ["_single_session", "_single_session"]
+
+
+def test_coalesce_key_replaces_the_payload(monkeypatch, client):
+    keys = []
+    monkeypatch.setattr(client.flights, "do", lambda key, fn, **kw: keys.append(key) or fn())
+    _recorder(monkeypatch, client)
+
+    for first in ("Ann", "Bob"):
+        payload = {"account_name": "Amazon DEN2", "first_name": first}
+        client.post("fetch_address", "/api/fetch-address", json=payload, coalesce_key=("den2",))
+
+    assert keys == [("fetch_address", "POST", "/api/fetch-address", "den2")] * 2
@@ -0,0 +1,48 @@
+# tests/test_user_sites.py
+
+# -----------------------------------------------------------
+# Malformed site items are rejected per index with 422 (never a 500)
+# -----------------------------------------------------------
+import pytest
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "remove", "site_slug": 7},
+    {"op": "set_default", "site_slug": ["DEN2"]},
+    {"op": "add", "site_slug": {"code": "DEN2"}},
+    {"op": "add", "site_slug": "DEN2", "label": 5},
+    {"op": "remove", "id": True},
+    {"op": "set_default", "id": "7"},
+])
+def test_bulk_rejects_wrong_types(make_user, client_for, op):
+    client = client_for(make_user(sites=["ABC1"]))
+
+    resp = client.patch("/api/user/sites", json={"operations": [{"op": "add", "site_slug": "XYZ9"}, op]})
+
+    assert resp.status_code == 422
+    assert list(resp.get_json()["errors"]) == ["1"]
+    assert [s["site_slug"] for s in client.get("/api/user/sites").get_json()] == ["ABC1"]
+
+
+@pytest.mark.parametrize("item", [{"site_slug": 7}, {"site_slug": "DEN2", "label": False}])
+def test_create_rejects_wrong_types(make_user, client_for, item):
+    client = client_for(make_user(sites=["ABC1"]))
+
+    resp = client.post("/api/user/sites", json={"sites": [{"site_slug": "XYZ9"}, item]})
+
+    assert resp.status_code == 422
+    assert list(resp.get_json()["errors"]) == ["1"]
+
+
+def test_bulk_applies_valid_ops(make_user, client_for):
+    client = client_for(make_user(sites=["ABC1", "ABC2"]))
+
+    resp = client.patch("/api/user/sites", json={"operations": [
+        {"op": "remove", "site_slug": "abc1"},
+        {"op": "add", "site_slug": "Amazon DEN2"},
+        {"op": "set_default", "site_slug": "DEN2"},
+    ]})
+
+    assert resp.status_code == 200
+    sites = {s["site_slug"]: s["is_default"] for s in resp.get_json()}
+    assert sites == {"ABC2": False, "DEN2": True}
@@ -0,0 +1,35 @@
+// frontend/app/api/account/[type]/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_BASE = (process.env.FLASK_API_URL || process.env.NEXT_PUBLIC_API_BASE || "").replace(/\/$/, "");
+
+function forwardHeaders(req: Request) {
+  const h: Record<string, string> = { accept: "application/json" };
+  const cookie = req.headers.get("cookie");
+  if (cookie) h["cookie"] = cookie;
+  const auth = req.headers.get("authorization");
+  if (auth) h["authorization"] = auth;
+  return h;
+}
+
+// GET /api/account/orders|quotes?site=&status=&q=&limit=&cursor= (served from the Flask mirror)
+// GET /api/account/search?q=&type=&site=&page= (full-text search over the mirror)
+export async function GET(req: Request, { params }: any) {
+  if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
+  const type = params.type;
+  if (type !== "orders" && type !== "quotes" && type !== "search") {
+    return NextResponse.json({ error: "not_found" }, { status: 404 });
+  }
+
+  const search = new URL(req.url).search;
+  const flaskUrl = `${FLASK_BASE}/api/account/${type}${search}`;
+
+  try {
+    const flaskRes = await fetch(flaskUrl, { method: "GET", headers: forwardHeaders(req), cache: "no-store" });
+    const text = await flaskRes.text();
+    return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json" } });
+  } catch (err) {
+    console.error("[proxy] account GET fetch error:", err);
+    return NextResponse.json({ error: "proxy_account_failed", detail: String(err) }, { status: 500 });
+  }
+}
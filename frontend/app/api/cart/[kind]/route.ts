@@ -0,0 +1,40 @@
+// frontend/app/api/cart/[kind]/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_BASE = (process.env.FLASK_API_URL || process.env.NEXT_PUBLIC_API_BASE || "").replace(/\/$/, "");
+
+function forwardHeaders(req: Request) {
+  const h: Record<string, string> = { accept: "application/json" };
+  const cookie = req.headers.get("cookie");
+  if (cookie) h["cookie"] = cookie;
+  const auth = req.headers.get("authorization");
+  if (auth) h["authorization"] = auth;
+  const ct = req.headers.get("content-type");
+  if (ct) h["content-type"] = ct;
+  return h;
+}
+
+async function forward(req: Request, kind: string, method: "GET" | "PATCH") {
+  if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
+  if (kind !== "cart" && kind !== "quote") return NextResponse.json({ error: "not_found" }, { status: 404 });
+
+  try {
+    const body = method === "PATCH" ? await req.text() : undefined;
+    const flaskRes = await fetch(`${FLASK_BASE}/api/cart/${kind}`, { method, headers: forwardHeaders(req), body, cache: "no-store" });
+    const text = await flaskRes.text();
+    return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json" } });
+  } catch (err) {
+    console.error(`[proxy] cart ${method} fetch error:`, err);
+    return NextResponse.json({ error: "proxy_cart_failed", detail: String(err) }, { status: 500 });
+  }
+}
+
+// GET /api/cart/cart|quote — full cart + totals
+export async function GET(req: Request, { params }: any) {
+  return forward(req, params.kind, "GET");
+}
+
+// PATCH /api/cart/cart|quote — { version, ops: [...] } line-level diff
+export async function PATCH(req: Request, { params }: any) {
+  return forward(req, params.kind, "PATCH");
+}
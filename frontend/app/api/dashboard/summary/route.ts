@@ -0,0 +1,32 @@
+// frontend/app/api/dashboard/summary/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_API = process.env.FLASK_API_URL || "http://127.0.0.1:5000";
+
+// Dashboard numbers for every site of the user in one call (per-site + totals)
+export async function GET(request: Request) {
+  try {
+    const incomingAuth = request.headers.get("authorization") || "";
+    const incomingCookie = request.headers.get("cookie") || "";
+
+    const flaskRes = await fetch(`${FLASK_API}/api/dashboard/summary`, {
+      method: "GET",
+      headers: {
+        ...(incomingAuth ? { Authorization: incomingAuth } : {}),
+        ...(incomingCookie ? { cookie: incomingCookie } : {}),
+      },
+      credentials: "include",
+      cache: "no-store",
+    });
+
+    const text = await flaskRes.text();
+
+    return new NextResponse(text, {
+      status: flaskRes.status,
+      headers: { "content-type": flaskRes.headers.get("content-type") || "application/json" },
+    });
+  } catch (err: any) {
+    console.error("[/api/dashboard/summary] error:", err);
+    return NextResponse.json({ error: "server_error", message: String(err) }, { status: 500 });
+  }
+}
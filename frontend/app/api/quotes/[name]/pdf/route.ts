@@ -0,0 +1,34 @@
+// frontend/app/api/quotes/[name]/pdf/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_BASE = (process.env.FLASK_API_URL || process.env.NEXT_PUBLIC_API_BASE || "").replace(/\/$/, "");
+
+// request headers that make the Flask cache answer 304 / 206
+const PASS_REQUEST = ["cookie", "authorization", "range", "if-range", "if-none-match"];
+const PASS_RESPONSE = ["content-type", "content-length", "content-range", "accept-ranges", "content-disposition", "etag", "cache-control", "last-modified"];
+
+// GET /api/quotes/<name>/pdf — streams the (cached) PDF from Flask without buffering
+export async function GET(req: Request, { params }: any) {
+  if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
+  const flaskUrl = `${FLASK_BASE}/api/quotes/${encodeURIComponent(params.name)}/pdf`;
+
+  const headers: Record<string, string> = { accept: "application/pdf" };
+  for (const h of PASS_REQUEST) {
+    const v = req.headers.get(h);
+    if (v) headers[h] = v;
+  }
+
+  try {
+    const flaskRes = await fetch(flaskUrl, { method: "GET", headers, cache: "no-store" });
+    const out: Record<string, string> = {};
+    for (const h of PASS_RESPONSE) {
+      const v = flaskRes.headers.get(h);
+      if (v) out[h] = v;
+    }
+    const body = flaskRes.status === 304 ? null : flaskRes.body;
+    return new NextResponse(body, { status: flaskRes.status, headers: out });
+  } catch (err) {
+    console.error("[proxy] quote pdf fetch error:", err);
+    return NextResponse.json({ error: "proxy_quote_pdf_failed", detail: String(err) }, { status: 500 });
+  }
+}
@@ -0,0 +1,44 @@
+// frontend/app/api/session/bootstrap/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_API = process.env.FLASK_API_URL || "http://127.0.0.1:5000";
+
+// One round trip for first paint: me + profile + sites + settings + shipping
+export async function GET(request: Request) {
+  try {
+    const incomingAuth = request.headers.get("authorization") || "";
+    const incomingCookie = request.headers.get("cookie") || "";
+    const ifNoneMatch = request.headers.get("if-none-match") || "";
+
+    const flaskRes = await fetch(`${FLASK_API}/api/session/bootstrap`, {
+      method: "GET",
+      headers: {
+        ...(incomingAuth ? { Authorization: incomingAuth } : {}),
+        ...(incomingCookie ? { cookie: incomingCookie } : {}),
+        ...(ifNoneMatch ? { "if-none-match": ifNoneMatch } : {}),
+      },
+      credentials: "include",
+      cache: "no-store",
+    });
+
+    // pass conditional-GET headers through; 304 must not carry a body
+    const etagHeaders: Record<string, string> = {};
+    const etag = flaskRes.headers.get("etag");
+    if (etag) etagHeaders["etag"] = etag;
+    const cacheControl = flaskRes.headers.get("cache-control");
+    if (cacheControl) etagHeaders["cache-control"] = cacheControl;
+    if (flaskRes.status === 304) {
+      return new NextResponse(null, { status: 304, headers: etagHeaders });
+    }
+
+    const text = await flaskRes.text();
+
+    return new NextResponse(text, {
+      status: flaskRes.status,
+      headers: { "content-type": flaskRes.headers.get("content-type") || "application/json", ...etagHeaders },
+    });
+  } catch (err: any) {
+    console.error("[/api/session/bootstrap] error:", err);
+    return NextResponse.json({ error: "server_error", message: String(err) }, { status: 500 });
+  }
+}
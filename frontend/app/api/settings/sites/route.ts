@@ -13,15 +13,24 @@ function forwardHeaders(req: Request) {
   if (auth) headers["authorization"] = auth;
   const contentType = req.headers.get("content-type");
   if (contentType) headers["content-type"] = contentType;
+  const ifNoneMatch = req.headers.get("if-none-match");
+  if (ifNoneMatch) headers["if-none-match"] = ifNoneMatch;
   return headers;
 }
 
 export async function GET(req: Request) {
   if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
   const flaskUrl = `${FLASK_BASE}/api/user/sites`;
-  const flaskRes = await fetch(flaskUrl, { method: "GET", headers: forwardHeaders(req) });
+  const flaskRes = await fetch(flaskUrl, { method: "GET", headers: forwardHeaders(req), cache: "no-store" });
+  // pass conditional-GET headers through; 304 must not carry a body
+  const etagHeaders: Record<string, string> = {};
+  const etag = flaskRes.headers.get("etag");
+  if (etag) etagHeaders["etag"] = etag;
+  const cacheControl = flaskRes.headers.get("cache-control");
+  if (cacheControl) etagHeaders["cache-control"] = cacheControl;
+  if (flaskRes.status === 304) return new NextResponse(null, { status: 304, headers: etagHeaders });
   const text = await flaskRes.text();
-  return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json" } });
+  return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json", ...etagHeaders } });
 }
 
 export async function POST(req: Request) {
@@ -34,12 +43,22 @@ export async function POST(req: Request) {
   return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json" } });
 }
 
+// bulk add/remove/set-default in one transaction
+export async function PATCH(req: Request) {
+  if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
+  const flaskUrl = `${FLASK_BASE}/api/user/sites`;
+  const body = await req.text();
+  const flaskRes = await fetch(flaskUrl, { method: "PATCH", headers: forwardHeaders(req), body });
+  const text = await flaskRes.text();
+  return new NextResponse(text, { status: flaskRes.status, headers: { "content-type": flaskRes.headers.get("content-type") ?? "application/json" } });
+}
+
 /* optional OPTIONS handler to reduce preflight issues */
 export async function OPTIONS() {
   return new NextResponse(null, {
     status: 204,
     headers: {
-      "Access-Control-Allow-Methods": "GET,POST,OPTIONS",
+      "Access-Control-Allow-Methods": "GET,POST,PATCH,OPTIONS",
       "Access-Control-Allow-Headers": "Content-Type,Authorization",
     },
   });
@@ -0,0 +1,22 @@
+// frontend/app/api/sites/search/route.ts
+import { NextResponse } from "next/server";
+
+const FLASK_BASE = (process.env.FLASK_API_URL || process.env.NEXT_PUBLIC_API_BASE || "").replace(/\/$/, "");
+
+// Site autocomplete (default NEXT_PUBLIC_SITES_AUTOCOMPLETE_API) -> Flask in-memory site directory
+export async function GET(req: Request) {
+  if (!FLASK_BASE) return NextResponse.json({ error: "flask_base_not_configured" }, { status: 500 });
+  const { search } = new URL(req.url);
+  const flaskRes = await fetch(`${FLASK_BASE}/api/sites/search${search}`, {
+    method: "GET",
+    headers: { accept: "application/json" },
+  });
+  const text = await flaskRes.text();
+  return new NextResponse(text, {
+    status: flaskRes.status,
+    headers: {
+      "content-type": flaskRes.headers.get("content-type") ?? "application/json",
+      "cache-control": flaskRes.headers.get("cache-control") ?? "no-store",
+    },
+  });
+}
@@ -264,6 +264,10 @@ export default function OrdersPage() {
   const fetchControllerRef = useRef<AbortController | null>(null);
   const debounceRef = useRef<number | null>(null);
   const lastUrlRef = useRef<string | null>(null);
+  // keyset cursors per list: cursorsRef.current[base][p - 1] fetches page p
+  const cursorsRef = useRef<Record<string, (string | null)[]>>({});
+  // list total per base URL (the API only counts it on the first page)
+  const totalsRef = useRef<Record<string, number>>({});
 
   useEffect(() => {
     return () => {
@@ -320,9 +324,50 @@ export default function OrdersPage() {
     return found ? found.label ?? found.site_slug : siteSlug;
   };
 
-  const API_ROOT = process.env.NEXT_PUBLIC_SITES_API ?? "https://dtg-backend.onrender.com/api";
-  const buildAccountDataUrl = (accountName: string, type: "quotes" | "orders", pageParam = 1) =>
-    `${API_ROOT}/account-data?account_name=${encodeURIComponent(accountName)}&page=${pageParam}&type=${type}`;
+  // orders/quotes come from the local mirror (Flask keeps it in sync with the remote API)
+  const ACCOUNT_PAGE_SIZE = 5;
+  const buildAccountDataUrl = (siteSlug: string, type: "quotes" | "orders") =>
+    `/api/account/${type}?site=${encodeURIComponent(siteSlug)}&limit=${ACCOUNT_PAGE_SIZE}`;
+
+  // first view of a site: the backend syncs in the background (202, syncing: true)
+  const SYNC_POLL_MS = 2000;
+  const SYNC_POLL_ATTEMPTS = 30;
+  const wait = (ms: number, signal: AbortSignal) =>
+    new Promise<void>((resolve, reject) => {
+      const t = window.setTimeout(resolve, ms);
+      signal.addEventListener("abort", () => {
+        window.clearTimeout(t);
+        reject(new DOMException("Aborted", "AbortError"));
+      }, { once: true });
+    });
+
+  // Fetch page `target` by following keyset cursors from the nearest known page
+  const fetchAccountPage = async (base: string, target: number, signal: AbortSignal) => {
+    const cursors = cursorsRef.current[base] ?? (cursorsRef.current[base] = [null]);
+    const totalKey = base.includes("/orders?") ? "total_orders" : "total_quotes";
+    let p = Math.min(target, cursors.length);
+    let json: any = null;
+    let polls = 0;
+    while (true) {
+      const cursor = cursors[p - 1];
+      const res = await fetch(cursor ? `${base}&cursor=${encodeURIComponent(cursor)}` : base, { signal, cache: "no-store" });
+      if (!res.ok) {
+        const txt = await res.text().catch(() => res.statusText);
+        throw new Error(`Status ${res.status}: ${txt || res.statusText}`);
+      }
+      json = await res.json().catch(() => null);
+      if (json?.syncing && polls < SYNC_POLL_ATTEMPTS) {
+        polls += 1;
+        await wait(SYNC_POLL_MS, signal);
+        continue;
+      }
+      if (typeof json?.[totalKey] === "number") totalsRef.current[base] = json[totalKey];
+      else if (json && base in totalsRef.current) json[totalKey] = totalsRef.current[base];
+      if (json?.next_cursor) cursors[p] = json.next_cursor;
+      if (p >= target || !json?.next_cursor) return json;
+      p += 1;
+    }
+  };
 
   // fetch remote payload whenever account/filter/page changes
   useEffect(() => {
@@ -338,7 +383,8 @@ export default function OrdersPage() {
     if (!accountLabel) return;
 
     const typeParam = filter === "order" ? "orders" : "quotes";
-    const url = buildAccountDataUrl(accountLabel, typeParam, page);
+    const base = buildAccountDataUrl(selectedAccount, typeParam);
+    const url = `${base}&page=${page}`;
 
     if (lastUrlRef.current === url && !remoteError) return;
 
@@ -372,14 +418,7 @@ export default function OrdersPage() {
       setRemoteError(null);
       setRemotePayloadPreview(null);
 
-      fetch(url, { signal: controller.signal, cache: "no-store" })
-        .then(async (res) => {
-          if (!res.ok) {
-            const txt = await res.text().catch(() => res.statusText);
-            throw new Error(`Status ${res.status}: ${txt || res.statusText}`);
-          }
-          return res.json().catch(() => null);
-        })
+      fetchAccountPage(base, page, controller.signal)
         .then((json) => {
           setRemotePayloadPreview(json);
           lastUrlRef.current = url;
@@ -475,9 +514,8 @@ export default function OrdersPage() {
     setDownloadError(null);
 
     try {
-      // 1. Construct the API Endpoint
-      const API_ROOT = process.env.NEXT_PUBLIC_SITES_API ?? "https://dtg-backend.onrender.com/api";
-      const apiEndpoint = `${API_ROOT}/get-quote-pdf?quote_name=${encodeURIComponent(quoteName)}`;
+      // 1. Construct the API Endpoint (Flask streams it from upstream once, then serves its disk cache)
+      const apiEndpoint = `/api/quotes/${encodeURIComponent(quoteName)}/pdf`;
       
       // 2. Fetch the PDF
       const response = await fetch(apiEndpoint, {
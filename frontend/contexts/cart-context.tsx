@@ -1,6 +1,8 @@
 "use client"
 
-import React, { createContext, useContext, useState, useEffect } from "react"
+import React, { createContext, useContext, useState, useEffect, useRef } from "react"
+import { toast } from "sonner"
+import { createCartSync, type CartSync } from "@/lib/cart-sync"
 
 export interface CartItem {
   partNumber: string
@@ -30,17 +32,41 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
   const [items, setItems] = useState<CartItem[]>([])
   const [mounted, setMounted] = useState(false)
 
-  // Load from localStorage on mount
+  // Server copy (/api/cart/cart); local changes are sent as line-level diffs
+  const syncRef = useRef<CartSync<CartItem> | null>(null)
+  if (!syncRef.current) {
+    syncRef.current = createCartSync<CartItem>(
+      "cart",
+      (cart) => setItems(cart.items),
+      (message) => toast.error(message),
+    )
+  }
+  const sync = syncRef.current
+
+  // Load from localStorage on mount, then reconcile with the server
   useEffect(() => {
     setMounted(true)
     const saved = localStorage.getItem("cart-items")
+    let local: CartItem[] = []
     if (saved) {
       try {
-        setItems(JSON.parse(saved))
+        local = JSON.parse(saved)
+        setItems(local)
       } catch (e) {
         console.error("Failed to load cart items", e)
       }
     }
+
+    sync.load().then((server) => {
+      if (!server) return
+      if (server.version > 0) {
+        setItems(server.items)
+      } else {
+        // first time on the server: upload what this browser had
+        local.forEach((i) => sync.push({ op: "add", partNumber: i.partNumber, quantity: i.quantity }))
+      }
+    })
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [])
 
   // Save to localStorage whenever items change
@@ -51,6 +77,7 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
   }, [items, mounted])
 
   const addItem = (newItem: CartItem) => {
+    sync.push({ op: "add", partNumber: newItem.partNumber, quantity: newItem.quantity })
     setItems((current) => {
       const existing = current.find((item) => item.partNumber === newItem.partNumber)
       if (existing) {
@@ -65,6 +92,7 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
   }
 
   const removeItem = (partNumber: string) => {
+    sync.push({ op: "remove", partNumber })
     setItems((current) => current.filter((item) => item.partNumber !== partNumber))
   }
 
@@ -73,6 +101,7 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
       removeItem(partNumber)
       return
     }
+    sync.push({ op: "set_qty", partNumber, quantity })
     setItems((current) =>
       current.map((item) =>
         item.partNumber === partNumber ? { ...item, quantity } : item
@@ -81,6 +110,7 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
   }
 
   const clearCart = () => {
+    sync.push({ op: "clear" })
     setItems([])
   }
 
@@ -0,0 +1,119 @@
+// frontend/lib/cart-sync.ts
+// Keeps a local cart/quote list in step with the server copy (/api/cart/<kind>)
+// by sending small line-level diffs with the last known version.
+// Ops pushed before the first load() are held until it supplies the version.
+// When the local list may have drifted (ops rejected with 422, or ops queued
+// before the first load), the server copy is fetched again once the queue is
+// empty and handed to onServerCopy.
+
+export type CartOp =
+  | { op: "add"; partNumber: string; quantity: number }
+  | { op: "set_qty"; partNumber: string; quantity: number }
+  | { op: "remove"; partNumber: string }
+  | { op: "clear" };
+
+export interface ServerCart<T> {
+  version: number;
+  items: T[];
+  totals?: Record<string, any>;
+}
+
+export interface CartSync<T> {
+  load(): Promise<ServerCart<T> | null>;
+  push(op: CartOp): void;
+}
+
+export function createCartSync<T>(
+  kind: "cart" | "quote",
+  onServerCopy: (cart: ServerCart<T>) => void,
+  onRejected?: (message: string) => void,
+): CartSync<T> {
+  let version = 0;
+  let loaded = false;
+  let needsResync = false;
+  let queue: CartOp[] = [];
+  let timer: ReturnType<typeof setTimeout> | null = null;
+  let inFlight = false;
+
+  const fetchCart = async (): Promise<ServerCart<T> | null> => {
+    try {
+      const res = await fetch(`/api/cart/${kind}`, { credentials: "include", cache: "no-store" });
+      if (!res.ok) return null;
+      const json = await res.json();
+      version = json.version ?? 0;
+      return json;
+    } catch {
+      return null;
+    }
+  };
+
+  const resync = async () => {
+    needsResync = false;
+    const cart = await fetchCart();
+    // ops pushed meanwhile are applied on top of this copy by the server
+    if (cart && queue.length === 0) onServerCopy(cart);
+    else if (!cart) needsResync = true;
+  };
+
+  const flush = async () => {
+    timer = null;
+    if (!loaded || inFlight || queue.length === 0) return;
+    const ops = queue;
+    queue = [];
+    inFlight = true;
+    try {
+      const res = await fetch(`/api/cart/${kind}`, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        credentials: "include",
+        body: JSON.stringify({ version, ops }),
+      });
+      const json = await res.json().catch(() => null);
+      if (res.ok && json) {
+        version = json.version;
+      } else if (res.status === 409 && json?.cart) {
+        // someone else (another tab/device) changed it: take the server copy
+        version = json.cart.version;
+        onServerCopy(json.cart);
+      } else if (res.status === 422) {
+        // the server refused these ops: show the user and undo them locally
+        needsResync = true;
+        onRejected?.(`Some ${kind} changes could not be saved and were undone`);
+        console.warn(`[cart-sync] ${kind} ops rejected`, json?.errors ?? json);
+      } else {
+        console.warn(`[cart-sync] ${kind} PATCH failed`, res.status, json);
+      }
+    } catch (e) {
+      // offline: keep the ops for the next attempt
+      queue = ops.concat(queue);
+    } finally {
+      inFlight = false;
+      if (queue.length) schedule();
+      else if (needsResync) await resync();
+    }
+  };
+
+  const schedule = () => {
+    if (!timer) timer = setTimeout(flush, 300);
+  };
+
+  return {
+    async load(): Promise<ServerCart<T> | null> {
+      const cart = await fetchCart();
+      if (cart && !loaded) {
+        loaded = true;
+        if (queue.length) {
+          // pushed before the version was known: the caller is about to
+          // render `cart`, which does not include them yet
+          needsResync = true;
+          schedule();
+        }
+      }
+      return cart;
+    },
+    push(op: CartOp) {
+      queue.push(op);
+      if (loaded) schedule();
+    },
+  };
+}